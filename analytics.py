@@ -0,0 +1,67 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from database import get_read_db
+from utils.analytics import AnalyticsError, current_snapshot, run_query, run_snapshot_export
+from utils.auth_utils import require_admin
+from utils.data_version import REPORTS_SCOPE, VersionedCache, get_version
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+# Results only change when a new snapshot is published, so they are keyed on its name.
+_query_cache = VersionedCache(maxsize=128)
+
+
+def _snapshot_status(db: Session, snapshot: dict | None) -> dict | None:
+    if snapshot is None:
+        return None
+    public = {key: snapshot[key] for key in ("snapshot", "created_at", "reports_version", "rows")}
+    # Reports written since the export are not in the snapshot yet.
+    public["stale"] = snapshot["reports_version"] != get_version(db, REPORTS_SCOPE)
+    return public
+
+
+@router.get("/snapshot")
+def snapshot_status(db: Session = Depends(get_read_db), admin_user=Depends(require_admin)):
+    return {"snapshot": _snapshot_status(db, current_snapshot())}
+
+
+@router.post("/snapshot", status_code=status.HTTP_202_ACCEPTED)
+def refresh_snapshot(background_tasks: BackgroundTasks, admin_user=Depends(require_admin)):
+    """Export reports and submissions to a new Parquet snapshot in the background."""
+    background_tasks.add_task(run_snapshot_export)
+    return {"status": "scheduled"}
+
+
+@router.get("/query")
+def query(
+    dataset: str = "reports",
+    group_by: list[str] = Query(default=[]),
+    metrics: list[str] = Query(default=[]),
+    aggregate: str = "sum",
+    start_month: str | None = None,
+    end_month: str | None = None,
+    programme: str | None = None,
+    department: str | None = None,
+    db: Session = Depends(get_read_db),
+    admin_user=Depends(require_admin),
+):
+    """
+    Ad-hoc aggregates over the latest Parquet snapshot, run in DuckDB rather than the
+    transactional database, e.g. ?group_by=department&group_by=month&metrics=trained.
+    Dimensions: programme, department, month, quarter, year.
+    """
+    snapshot = current_snapshot()
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No analytics snapshot yet; run POST /analytics/snapshot or scripts/export_analytics_snapshot.py",
+        )
+    key = (dataset, tuple(group_by), tuple(metrics), aggregate, start_month, end_month, programme, department)
+    result = _query_cache.get(snapshot["snapshot"], key)
+    if result is None:
+        try:
+            result = run_query(dataset, group_by, metrics, aggregate, start_month, end_month, programme, department)
+        except AnalyticsError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        _query_cache.set(result["snapshot"]["snapshot"], key, result)
+    return {**result, "snapshot": _snapshot_status(db, snapshot)}
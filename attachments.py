@@ -0,0 +1,64 @@
+import os
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from database import get_read_db
+from models import Attachment, MonthlyReport, User
+from utils.attachments import ATTACHMENTS_ACCEL_REDIRECT, attachment_to_dict, blob_path
+from utils.auth_utils import get_current_user
+
+router = APIRouter(prefix="/attachments", tags=["attachments"])
+
+
+def _can_view(db: Session, user: User, attachment: Attachment) -> bool:
+    if user.role == "admin" or attachment.uploaded_by == user.id:
+        return True
+    if attachment.report_id is None:
+        return False
+    owner = db.query(MonthlyReport.submitted_by).filter(MonthlyReport.id == attachment.report_id).scalar()
+    return owner == user.id
+
+
+@router.get("/")
+def list_attachments(
+    report_id: int | None = None,
+    submission_id: int | None = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    if report_id is None and submission_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="report_id or submission_id is required")
+    query = db.query(Attachment)
+    if report_id is not None:
+        query = query.filter(Attachment.report_id == report_id)
+    if submission_id is not None:
+        query = query.filter(Attachment.submission_id == submission_id)
+    attachments = query.order_by(Attachment.id).all()
+    return [attachment_to_dict(a) for a in attachments if _can_view(db, current_user, a)]
+
+
+@router.get("/{attachment_id}")
+def download_attachment(
+    attachment_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    attachment = db.get(Attachment, attachment_id)
+    if not attachment:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+    if not _can_view(db, current_user, attachment):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to view this attachment")
+    path = blob_path(attachment.sha256)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment file is missing")
+
+    headers = {"X-Content-Type-Options": "nosniff"}
+    if ATTACHMENTS_ACCEL_REDIRECT:
+        # nginx serves the file itself (sendfile, Range support) from an internal location.
+        sha = attachment.sha256
+        headers["X-Accel-Redirect"] = f"{ATTACHMENTS_ACCEL_REDIRECT.rstrip('/')}/{sha[:2]}/{sha}"
+        headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(attachment.filename)}"
+        return Response(media_type=attachment.content_type, headers=headers)
+    # FileResponse streams from disk in chunks and answers Range requests (206).
+    return FileResponse(path, media_type=attachment.content_type, filename=attachment.filename, headers=headers)
@@ -4,13 +4,12 @@ from schemas import OTPRequest, OTPVerify, UserOut
 from database import get_db
 from models import OTP, User, Session as DBSession
 from utils.email import send_email
+from utils.rate_limit import OTP_EMAIL_RATE_LIMIT, enforce_key_limit
 from utils.security import generate_otp, generate_session_token, session_expiry, SESSION_EXPIRE_DAYS
 from datetime import datetime, timedelta, timezone
-from dotenv import load_dotenv
 from fastapi.responses import JSONResponse
 import os
 
-load_dotenv()
 OTP_EXP_MINUTES = int(os.getenv("OTP_EXP_MINUTES", 5))
 ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "").lower()
 ADMIN_BYPASS_KEY = os.getenv("ADMIN_BYPASS_KEY", "")
@@ -35,6 +34,8 @@ def request_otp(payload: OTPRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Admin email not configured")
     if payload.email.lower() != ADMIN_EMAIL:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access only")
+    # Caps OTP emails per address whichever IPs the requests come from.
+    enforce_key_limit("otp-request", payload.email, OTP_EMAIL_RATE_LIMIT)
     code = generate_otp()
     expires = _utc_now() + timedelta(minutes=OTP_EXP_MINUTES)
     otp = OTP(email=payload.email, code=code, expires_at=expires)
@@ -60,6 +61,8 @@ def verify_otp(payload: OTPVerify, response: Response, db: Session = Depends(get
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Admin email not configured")
     if payload.email.lower() != ADMIN_EMAIL:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access only")
+    # Guesses per address, so a code cannot be brute-forced from many IPs.
+    enforce_key_limit("otp-verify", payload.email, OTP_EMAIL_RATE_LIMIT)
     # Fetch the OTP entry for this email with matching code that is not used and not expired
     otp_entry = db.query(OTP).filter(OTP.email == payload.email, OTP.code == payload.code).order_by(OTP.created_at.desc()).first()
     if not otp_entry:
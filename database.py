@@ -1,18 +1,37 @@
+import time
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dmt.db")
+# Optional replica for read-heavy admin/analytics endpoints.
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+# After a write, the same client reads from the primary for this long to see its own changes.
+READ_AFTER_WRITE_SECONDS = int(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
+PRIMARY_UNTIL_COOKIE = "dmt_primary_until"
+# Connections per worker (server databases; SQLite opens one per session). A sync handler
+# holds at most one, so the worker's thread pool is sized to match: see THREADPOOL_SIZE.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Threads for sync handlers and run_in_threadpool. More threads than connections only queue
+# inside the pool, holding a thread while they wait; SQLite has no pool, so keep
+# Starlette's default of 40 there.
+_DEFAULT_THREADS = 40 if DATABASE_URL.startswith("sqlite") else DB_POOL_SIZE + DB_MAX_OVERFLOW
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(_DEFAULT_THREADS)))
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-    pool_pre_ping=True,
-)
+
+def _create_engine(url: str):
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False}, pool_pre_ping=True)
+    return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_pre_ping=True)
+
+
+engine = _create_engine(DATABASE_URL)
+read_engine = _create_engine(DATABASE_READ_URL) if DATABASE_READ_URL else engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 # Dependency
@@ -22,3 +41,30 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def _wrote_recently(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+# Dependency for read-only endpoints
+def get_read_db(request: Request):
+    use_primary = read_engine is engine or _wrote_recently(request)
+    db = SessionLocal() if use_primary else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def mark_write(response, now: float | None = None):
+    """Pin the client to the primary for READ_AFTER_WRITE_SECONDS (read-your-writes)."""
+    if read_engine is engine:
+        return
+    until = (now or time.time()) + READ_AFTER_WRITE_SECONDS
+    response.set_cookie(
+        PRIMARY_UNTIL_COOKIE, f"{until:.3f}", max_age=READ_AFTER_WRITE_SECONDS, httponly=True, samesite="lax"
+    )
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from fastapi import APIRouter, Cookie, Header, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from database import SessionLocal
+from utils.auth_utils import get_current_user
+from utils.events import EVENTS_HEARTBEAT_SECONDS, EVENTS_STREAM_MAX_SECONDS, bus, format_sse
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Browsers wait this long before reconnecting a dropped EventSource.
+RETRY_MILLISECONDS = 3000
+
+
+def _authenticate(session_token: str | None):
+    # A short-lived session: a Depends(get_db) session would be held for the whole stream.
+    db = SessionLocal()
+    try:
+        user = get_current_user(session_token, db)
+        return user.id, user.role == "admin"
+    finally:
+        db.close()
+
+
+async def _event_stream(request: Request, user_id: int, is_admin: bool, last_event_id: str | None):
+    subscription = bus.subscribe(user_id, is_admin)
+    deadline = time.monotonic() + EVENTS_STREAM_MAX_SECONDS
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n".encode("utf-8")
+        replayed = set()
+        if last_event_id:
+            missed = await run_in_threadpool(bus.replay, last_event_id)
+            if missed is None:
+                yield format_sse(None, "resync", {})
+            else:
+                for event_id, kind, data in missed:
+                    replayed.add(event_id)
+                    if subscription.wants(kind, data):
+                        yield format_sse(event_id, kind, data)
+
+        while not await request.is_disconnected():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event_id, kind, data = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=min(EVENTS_HEARTBEAT_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                # Comment lines keep proxies from closing an idle stream.
+                yield b": keep-alive\n\n"
+                continue
+            if subscription.overflowed:
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.overflowed = False
+                yield format_sse(None, "resync", {})
+                continue
+            if event_id in replayed or not subscription.wants(kind, data):
+                continue
+            yield format_sse(event_id, kind, data)
+    finally:
+        bus.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream(
+    request: Request,
+    session_token: str = Cookie(None),
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+):
+    """Server-Sent Events feed of report, submission and programme changes for live dashboards."""
+    user_id, is_admin = await run_in_threadpool(_authenticate, session_token)
+    return StreamingResponse(
+        _event_stream(request, user_id, is_admin, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,15 +1,36 @@
 import json
 import os
-from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from dataclasses import asdict, replace
+from datetime import date, datetime, time, timezone
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
 from fastapi.responses import FileResponse
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from database import get_db
-from models import Programme, FormToken, FormSubmission, MonthlyReport
+from sqlalchemy import Date, JSON, cast, func, literal, select, true, union_all
+from database import get_db, get_read_db
+from models import Programme, FormToken, FormSubmission
 from schemas import FormLinkRequest, PublicFormSubmission, FormSubmissionOut
+from utils.attachments import (
+    AttachmentError,
+    StoredFile,
+    add_attachments,
+    attachment_to_dict,
+    discard_unreferenced_blobs,
+    parse_payload_field,
+    receive_upload,
+)
+from utils.archive import ArchivedYearError, parquet_rows, report_source, submission_source
 from utils.auth_utils import require_admin
 from utils.email import send_email
+from utils.change_log import record_changes
+from utils.data_version import REPORTS_SCOPE, bump_version, get_version
+from utils.events import publish, publish_report, report_totals
+from utils.programme_registry import PROGRAMMES_SCOPE, ProgrammeRecord, registry
+from utils.notifications import notify_report_submitted
+from utils.idempotency import IDEMPOTENCY_HEADER, get_stored_response, store_response
+from utils.responses import RawJSONResponse, encode_rows
+from utils.upsert import upsert_report
 from utils.form_tokens import (
     FORM_TOKEN_ONE_TIME,
     generate_form_token,
@@ -19,6 +40,10 @@ from utils.form_tokens import (
 
 router = APIRouter(prefix="/forms", tags=["forms"])
 
+# Reports for a month are due by this day of the following month.
+REPORT_DEADLINE_DAY = int(os.getenv("REPORT_DEADLINE_DAY", "10"))
+COMPLIANCE_MAX_MONTHS = int(os.getenv("COMPLIANCE_MAX_MONTHS", "120"))
+
 
 def _utc_now():
     return datetime.now(timezone.utc)
@@ -30,6 +55,13 @@ def _is_expired(ts: datetime) -> bool:
     return ts < _utc_now()
 
 
+def _get_programme(programme_id: int, db: Session) -> ProgrammeRecord:
+    programme = registry.get(db, programme_id)
+    if not programme:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Programme not found")
+    return programme
+
+
 def _validate_token(programme_id: int, token: str, db: Session):
     # Validate signature/expiry, then enforce programme + recipient email lock.
     try:
@@ -40,9 +72,7 @@ def _validate_token(programme_id: int, token: str, db: Session):
     if payload["pid"] != programme_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token does not match programme")
 
-    programme = db.query(Programme).filter(Programme.id == programme_id).first()
-    if not programme:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Programme not found")
+    programme = _get_programme(programme_id, db)
 
     if not programme.recipient_email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Programme has no recipient email")
@@ -64,23 +94,49 @@ def _validate_token(programme_id: int, token: str, db: Session):
     return programme, payload["email"], token_row
 
 
+def _consume_token(token: str, db: Session) -> bool:
+    """Mark a one-time token used in a single conditional UPDATE; False when another
+    submission got there first. Runs inside the submission transaction, so the token
+    is only spent if the submission commits."""
+    tokens = FormToken.__table__
+    result = db.execute(
+        tokens.update()
+        .where(tokens.c.token_hash == hash_token(token), tokens.c.used.isnot(True))
+        .values(used=True)
+    )
+    return result.rowcount == 1
+
+
+def _submission_to_dict(submission: FormSubmission) -> dict:
+    return {
+        "id": submission.id,
+        "programme_id": submission.programme_id,
+        "recipient_email": submission.recipient_email,
+        "form_data": json.loads(submission.form_data),
+        "submitted_at": submission.submitted_at.isoformat() if submission.submitted_at else None,
+    }
+
+
 def _build_form_link(
-    programme_id: int,
+    programme: ProgrammeRecord,
     recipient_email: str,
     request: Request,
     db: Session,
-) -> tuple[str, datetime]:
-    programme = db.query(Programme).filter(Programme.id == programme_id).first()
-    if not programme:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Programme not found")
+) -> tuple[str, datetime, ProgrammeRecord]:
     normalized_email = recipient_email.strip().lower()
     if not normalized_email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Recipient email is required")
     if programme.recipient_email != normalized_email:
-        programme.recipient_email = normalized_email
-        db.add(programme)
+        db.query(Programme).filter(Programme.id == programme.id).update(
+            {Programme.recipient_email: normalized_email}, synchronize_session=False
+        )
+        programme = replace(programme, recipient_email=normalized_email)
+        bump_version(db, PROGRAMMES_SCOPE)
+        record_changes(db, "programme", [programme.id])
+        publish(db, "programme", {"programme": asdict(programme)})
+        version = get_version(db, PROGRAMMES_SCOPE)
         db.commit()
-        db.refresh(programme)
+        registry.put(programme, version)
 
     try:
         token, expires_at = generate_form_token(programme.id, programme.recipient_email)
@@ -101,7 +157,7 @@ def _build_form_link(
     base_url = os.getenv("APP_BASE_URL") or str(request.base_url)
     base_url = base_url.rstrip("/")
     form_link = f"{base_url}/forms/{programme.id}?token={token}"
-    return form_link, expires_at
+    return form_link, expires_at, programme
 
 
 @router.post("/admin/send-link")
@@ -111,12 +167,10 @@ def send_form_link(
     db: Session = Depends(get_db),
     admin_user=Depends(require_admin),
 ):
-    programme = db.query(Programme).filter(Programme.id == payload.programme_id).first()
-    if not programme:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Programme not found")
+    programme = _get_programme(payload.programme_id, db)
 
-    form_link, expires_at = _build_form_link(
-        programme_id=programme.id,
+    form_link, expires_at, programme = _build_form_link(
+        programme=programme,
         recipient_email=payload.recipient_email,
         request=request,
         db=db,
@@ -147,12 +201,10 @@ def create_form_link(
     db: Session = Depends(get_db),
     admin_user=Depends(require_admin),
 ):
-    programme = db.query(Programme).filter(Programme.id == payload.programme_id).first()
-    if not programme:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Programme not found")
+    programme = _get_programme(payload.programme_id, db)
 
-    form_link, expires_at = _build_form_link(
-        programme_id=programme.id,
+    form_link, expires_at, programme = _build_form_link(
+        programme=programme,
         recipient_email=payload.recipient_email,
         request=request,
         db=db,
@@ -189,13 +241,76 @@ def submit_form(
     programme_id: int,
     payload: PublicFormSubmission,
     token: str,
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER),
     db: Session = Depends(get_db),
 ):
+    return _save_submission(programme_id, payload, token, idempotency_key, db)
+
+
+@router.post("/{programme_id}/submit-with-attachments")
+async def submit_form_with_attachments(
+    programme_id: int,
+    token: str,
+    request: Request,
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER),
+    db: Session = Depends(get_db),
+):
+    """Multipart variant of the public submit: a JSON `payload` field plus evidence files in `files`."""
+    stored_response = await run_in_threadpool(_stored_submission, programme_id, token, idempotency_key, db)
+    if stored_response is not None:
+        return stored_response
+    # Reject bad or used links before accepting any file data.
+    await run_in_threadpool(_validate_token, programme_id, token, db)
+    fields, stored = await receive_upload(request)
+    try:
+        payload = parse_payload_field(PublicFormSubmission, fields)
+        return await run_in_threadpool(_save_submission, programme_id, payload, token, idempotency_key, db, stored)
+    finally:
+        # Drops blobs nothing references after this request: a failed save or a replay.
+        await run_in_threadpool(discard_unreferenced_blobs, stored)
+
+
+def _idempotency_scope(programme_id: int, token: str, idempotency_key: str | None) -> tuple[str, str | None]:
+    # Keys are bound to the token so a replay needs the original link as well.
+    scope = f"forms.submit:{programme_id}"
+    return scope, hash_token(f"{token}:{idempotency_key}") if idempotency_key else None
+
+
+def _stored_submission(programme_id: int, token: str, idempotency_key: str | None, db: Session):
+    scope, scoped_key = _idempotency_scope(programme_id, token, idempotency_key)
+    return get_stored_response(db, scope, scoped_key) if scoped_key else None
+
+
+def _save_submission(
+    programme_id: int,
+    payload: PublicFormSubmission,
+    token: str,
+    idempotency_key: str | None,
+    db: Session,
+    attachments: list[StoredFile] | None = None,
+):
+    scope, scoped_key = _idempotency_scope(programme_id, token, idempotency_key)
+    if scoped_key:
+        # Checked before token validation: a retry after a one-time token was consumed
+        # must still get the original response.
+        stored = get_stored_response(db, scope, scoped_key)
+        if stored is not None:
+            return stored
+
     programme, recipient_email, token_row = _validate_token(programme_id, token, db)
 
     if payload.programme_name != programme.name:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Programme name mismatch")
 
+    if FORM_TOKEN_ONE_TIME and token_row and not _consume_token(token, db):
+        # A concurrent submission consumed the token between validation and now; a
+        # retry carrying the same idempotency key gets that submission's response.
+        db.rollback()
+        stored = get_stored_response(db, scope, scoped_key) if scoped_key else None
+        if stored is not None:
+            return stored
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token already used")
+
     try:
         payload_dict = payload.dict()
         payload_dict["programme_name"] = programme.name
@@ -204,54 +319,66 @@ def submit_form(
             recipient_email=recipient_email,
             form_data=json.dumps(payload_dict, default=str),
         )
-        report = MonthlyReport(**payload_dict)
         db.add(submission)
-        db.add(report)
-        if FORM_TOKEN_ONE_TIME and token_row:
-            # Prevent token reuse after successful submission.
-            token_row.used = True
-            db.add(token_row)
-        db.commit()
-        db.refresh(submission)
+        before = report_totals(db, programme.name, payload_dict["reporting_month"])
+        # Resubmitting the same programme + month amends the existing report.
+        report, changed = upsert_report(db, payload_dict)
+        if changed:
+            bump_version(db, REPORTS_SCOPE)
+        db.flush()
+        record_changes(db, "submission", [submission.id], "insert")
+        response = _submission_to_dict(submission)
+        if attachments is not None:
+            rows = add_attachments(db, attachments, report_id=report.id, submission_id=submission.id)
+            response["attachments"] = [attachment_to_dict(row) for row in rows]
+        # The submission itself is always new; the report events only fire if it changed.
+        publish(db, "submission", {"submission": response, "programme_name": programme.name})
+        if changed:
+            publish_report(db, before, report)
+            notify_report_submitted(db, report, source="form")
+        if scoped_key:
+            store_response(db, scope, scoped_key, response)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            stored = get_stored_response(db, scope, scoped_key) if scoped_key else None
+            if stored is None:
+                raise
+            return stored
+    except AttachmentError as exc:
+        db.rollback()
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
+    except ArchivedYearError as exc:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
     except Exception as exc:
         print(f"Error saving form submission: {exc}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to save submission")
 
-    try:
-        if os.getenv("EMAIL_BACKEND", "console").lower() != "console":
-            admin_email = os.getenv("ADMIN_EMAIL", "")
-            if admin_email:
-                subject = f"New Form Submission: {programme.name}"
-                body = (
-                    "Hello Admin,\n\n"
-                    f"A new form submission has been received for {programme.name}.\n"
-                    f"Submitted at: {submission.submitted_at}\n\n"
-                    "Please review it in the admin dashboard.\n"
-                )
-                send_email(admin_email, subject, body)
-    except Exception as exc:
-        print(f"Failed to notify admin: {exc}")
-
-    return {
-        "id": submission.id,
-        "programme_id": submission.programme_id,
-        "recipient_email": submission.recipient_email,
-        "form_data": json.loads(submission.form_data),
-        "submitted_at": submission.submitted_at.isoformat() if submission.submitted_at else None,
-    }
+    return response
 
 
 @router.get("/admin/summary")
-def admin_summary(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
-    programmes = db.query(Programme).all()
+def admin_summary(db: Session = Depends(get_read_db), admin_user=Depends(require_admin)):
+    programmes = registry.all(db)
+    submissions = submission_source()
     counts = {
         row.programme_id: {"count": row.count, "last": row.last_submitted_at}
-        for row in db.query(
-            FormSubmission.programme_id.label("programme_id"),
-            func.count(FormSubmission.id).label("count"),
-            func.max(FormSubmission.submitted_at).label("last_submitted_at"),
-        ).group_by(FormSubmission.programme_id)
+        for row in db.execute(
+            select(
+                submissions.c.programme_id.label("programme_id"),
+                func.count().label("count"),
+                func.max(submissions.c.submitted_at).label("last_submitted_at"),
+            ).group_by(submissions.c.programme_id)
+        )
     }
+    # Years archived to Parquet live outside the database.
+    for row in parquet_rows("form_submissions"):
+        stats = counts.setdefault(row["programme_id"], {"count": 0, "last": None})
+        stats["count"] += 1
+        if stats["last"] is None or (row["submitted_at"] and row["submitted_at"] > stats["last"]):
+            stats["last"] = row["submitted_at"]
 
     result = []
     for programme in programmes:
@@ -268,26 +395,202 @@ def admin_summary(db: Session = Depends(get_db), admin_user=Depends(require_admi
     return result
 
 
-@router.get("/admin/submissions", response_model=list[FormSubmissionOut])
-def admin_submissions(
-    programme_id: int | None = None,
-    db: Session = Depends(get_db),
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_start(db: Session, expr, is_text: bool = False):
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(expr, "start of month")
+    if is_text:
+        expr = cast(expr, Date)
+    return cast(func.date_trunc("month", expr), Date)
+
+
+def _form_data_field(db: Session, form_data, key: str):
+    if db.get_bind().dialect.name == "sqlite":
+        return func.json_extract(form_data, f"$.{key}")
+    return func.json_extract_path_text(cast(form_data, JSON), key)
+
+
+def _as_utc(ts: datetime | None) -> datetime | None:
+    if ts is None:
+        return None
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def _compliance_query(db: Session, months: list[date]):
+    month_series = union_all(*[select(literal(month, Date).label("month")) for month in months]).cte("months")
+
+    # Hot and archive-table rows; Parquet-archived years are merged in by the caller.
+    report_rows = report_source()
+    report_month = _month_start(db, report_rows.c.reporting_month)
+    reports = (
+        select(
+            report_rows.c.programme_name.label("programme_name"),
+            report_month.label("month"),
+            func.min(report_rows.c.created_at).label("first_at"),
+        )
+        .where(report_rows.c.reporting_month >= months[0])
+        .where(report_rows.c.reporting_month < _add_months(months[-1], 1))
+        .group_by(report_rows.c.programme_name, report_month)
+        .subquery("reports")
+    )
+
+    # Legacy link submissions may have no matching MonthlyReport row.
+    submission_rows = submission_source()
+    submission_month = _month_start(
+        db, _form_data_field(db, submission_rows.c.form_data, "reporting_month"), is_text=True
+    )
+    submissions = (
+        select(
+            submission_rows.c.programme_id.label("programme_id"),
+            submission_month.label("month"),
+            func.min(submission_rows.c.submitted_at).label("first_at"),
+        )
+        .group_by(submission_rows.c.programme_id, submission_month)
+        .subquery("submissions")
+    )
+
+    return (
+        select(
+            Programme.id,
+            Programme.name,
+            month_series.c.month,
+            reports.c.first_at.label("report_first_at"),
+            submissions.c.first_at.label("submission_first_at"),
+        )
+        .select_from(Programme)
+        .join(month_series, true())
+        .outerjoin(
+            reports,
+            (reports.c.programme_name == Programme.name) & (reports.c.month == month_series.c.month),
+        )
+        .outerjoin(
+            submissions,
+            (submissions.c.programme_id == Programme.id) & (submissions.c.month == month_series.c.month),
+        )
+        .order_by(Programme.name, month_series.c.month)
+    )
+
+
+def _parquet_first_at(months: list[date]) -> tuple[dict, dict]:
+    """Earliest report per (programme name, month) and submission per (programme id, month)
+    among the Parquet-archived rows, which the compliance query cannot see."""
+    reports, submissions = {}, {}
+
+    def keep_first(found: dict, key, ts):
+        if ts and key[1] in months and (found.get(key) is None or ts < found[key]):
+            found[key] = ts
+
+    for row in parquet_rows("monthly_reports"):
+        if row["reporting_month"]:
+            keep_first(reports, (row["programme_name"], row["reporting_month"].replace(day=1)), row["created_at"])
+    for row in parquet_rows("form_submissions"):
+        try:
+            month = date.fromisoformat(str(json.loads(row["form_data"]).get("reporting_month"))[:10])
+        except (TypeError, ValueError):
+            continue
+        keep_first(submissions, (row["programme_id"], month.replace(day=1)), row["submitted_at"])
+    return reports, submissions
+
+
+@router.get("/admin/compliance")
+def admin_compliance(
+    start_month: date | None = None,
+    end_month: date | None = None,
+    deadline_day: int = REPORT_DEADLINE_DAY,
+    db: Session = Depends(get_read_db),
     admin_user=Depends(require_admin),
 ):
-    query = db.query(FormSubmission).order_by(FormSubmission.submitted_at.desc())
-    if programme_id:
-        query = query.filter(FormSubmission.programme_id == programme_id)
-    submissions = query.all()
-
-    response = []
-    for submission in submissions:
-        response.append(
+    if not 1 <= deadline_day <= 28:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="deadline_day must be between 1 and 28")
+    now = _utc_now()
+    end = (end_month or now.date()).replace(day=1)
+    start = (start_month or _add_months(end, -11)).replace(day=1)
+    if start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start_month must not be after end_month")
+    count = (end.year - start.year) * 12 + end.month - start.month + 1
+    if count > COMPLIANCE_MAX_MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Window may not exceed {COMPLIANCE_MAX_MONTHS} months",
+        )
+    months = [_add_months(start, i) for i in range(count)]
+    archived_reports, archived_submissions = _parquet_first_at(months)
+
+    programmes = {}
+    for row in db.execute(_compliance_query(db, months)):
+        month = row.month
+        deadline = datetime.combine(
+            _add_months(month, 1).replace(day=deadline_day), time.max, tzinfo=timezone.utc
+        )
+        candidates = [
+            ts
+            for ts in (
+                _as_utc(row.report_first_at),
+                _as_utc(row.submission_first_at),
+                _as_utc(archived_reports.get((row.name, month))),
+                _as_utc(archived_submissions.get((row.id, month))),
+            )
+            if ts
+        ]
+        submitted_at = min(candidates) if candidates else None
+        if submitted_at:
+            state = "submitted" if submitted_at <= deadline else "late"
+        else:
+            state = "missing" if now > deadline else "pending"
+        entry = programmes.setdefault(
+            row.id, {"programme_id": row.id, "programme_name": row.name, "months": []}
+        )
+        entry["months"].append(
             {
-                "id": submission.id,
-                "programme_id": submission.programme_id,
-                "recipient_email": submission.recipient_email,
-                "form_data": json.loads(submission.form_data),
-                "submitted_at": submission.submitted_at.isoformat() if submission.submitted_at else None,
+                "month": month.isoformat(),
+                "status": state,
+                "deadline": deadline.isoformat(),
+                "submitted_at": submitted_at.isoformat() if submitted_at else None,
+                "days_from_deadline": (
+                    round((submitted_at - deadline).total_seconds() / 86400, 1) if submitted_at else None
+                ),
             }
         )
-    return response
+
+    return {
+        "months": [month.isoformat() for month in months],
+        "deadline_day": deadline_day,
+        "programmes": list(programmes.values()),
+    }
+
+
+SUBMISSION_COLUMNS = ("id", "programme_id", "recipient_email", "form_data", "submitted_at")
+
+
+@router.get(
+    "/admin/submissions",
+    response_model=list[FormSubmissionOut],
+    response_class=RawJSONResponse,
+)
+def admin_submissions(
+    programme_id: int | None = None,
+    include_archived: bool = False,
+    db: Session = Depends(get_read_db),
+    admin_user=Depends(require_admin),
+):
+    source = submission_source(include_archive=include_archived)
+    query = select(*[source.c[name] for name in SUBMISSION_COLUMNS]).order_by(source.c.submitted_at.desc())
+    if programme_id:
+        query = query.where(source.c.programme_id == programme_id)
+    submissions = db.execute(query).all()
+    if include_archived:
+        # Years archived to Parquet live outside the database.
+        for row in parquet_rows("form_submissions"):
+            if not programme_id or row.get("programme_id") == programme_id:
+                submissions.append(tuple(row.get(name) for name in SUBMISSION_COLUMNS))
+
+    # form_data is JSON the app wrote itself, so it is emitted verbatim rather than
+    # parsed and re-validated per row.
+    body = encode_rows(SUBMISSION_COLUMNS, submissions, raw_json_columns=("form_data",))
+    return RawJSONResponse(content=body)
@@ -1,5 +1,9 @@
 const API_BASE = window.location.origin; // Use same origin as frontend
 let programmesCache = [];
+let statsCache = null;
+let reportsCache = [];
+let submissionsCache = [];
+let submissionSummary = new Map();
 const EMAILJS_CONFIG = window.EMAILJS_CONFIG || {};
 let emailjsReady = false;
 
@@ -119,41 +123,46 @@ async function loadStats() {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
 
-    const stats = await response.json();
-    const container = document.getElementById("stats-container");
-
-    container.innerHTML = `
-      <div class="stat-card">
-        <h3>Total Youth Registered</h3>
-        <div class="value">${stats.total_youth_registered || 0}</div>
-      </div>
-      <div class="stat-card">
-        <h3>Youth Trained</h3>
-        <div class="value">${stats.total_trained || 0}</div>
-      </div>
-      <div class="stat-card">
-        <h3>Training Percentage</h3>
-        <div class="value">${stats.training_percentage || 0}%</div>
-      </div>
-      <div class="stat-card">
-        <h3>Youth Funded</h3>
-        <div class="value">${stats.total_youth_funded || 0}</div>
-      </div>
-      <div class="stat-card">
-        <h3>Youth with Outcomes</h3>
-        <div class="value">${stats.total_youth_with_outcomes || 0}</div>
-      </div>
-      <div class="stat-card">
-        <h3>Total Reports</h3>
-        <div class="value">${stats.total_reports || 0}</div>
-      </div>
-    `;
+    statsCache = await response.json();
+    renderStatsCards();
   } catch (err) {
     console.error("Error loading stats:", err);
     showError("Failed to load statistics.");
   }
 }
 
+function renderStatsCards() {
+  const stats = statsCache || {};
+  const container = document.getElementById("stats-container");
+
+  container.innerHTML = `
+    <div class="stat-card">
+      <h3>Total Youth Registered</h3>
+      <div class="value">${stats.total_youth_registered || 0}</div>
+    </div>
+    <div class="stat-card">
+      <h3>Youth Trained</h3>
+      <div class="value">${stats.total_trained || 0}</div>
+    </div>
+    <div class="stat-card">
+      <h3>Training Percentage</h3>
+      <div class="value">${stats.training_percentage || 0}%</div>
+    </div>
+    <div class="stat-card">
+      <h3>Youth Funded</h3>
+      <div class="value">${stats.total_youth_funded || 0}</div>
+    </div>
+    <div class="stat-card">
+      <h3>Youth with Outcomes</h3>
+      <div class="value">${stats.total_youth_with_outcomes || 0}</div>
+    </div>
+    <div class="stat-card">
+      <h3>Total Reports</h3>
+      <div class="value">${stats.total_reports || 0}</div>
+    </div>
+  `;
+}
+
 async function loadAllReports() {
   try {
     const response = await fetch(`${API_BASE}/reports/`, {
@@ -169,70 +178,75 @@ async function loadAllReports() {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
 
-    const reports = await response.json();
-    const container = document.getElementById("reports-container");
+    reportsCache = await response.json();
+    renderReports();
+  } catch (err) {
+    console.error("Error loading reports:", err);
+    showError("Failed to load reports.");
+  }
+}
 
-    if (reports.length === 0) {
-      container.innerHTML = "<div class='no-data'>No reports available.</div>";
-      return;
-    }
+function renderReports() {
+  const reports = reportsCache;
+  const container = document.getElementById("reports-container");
 
-    if (isMobileView()) {
-      const cards = reports.map((r) => `
-        <div class="admin-card">
-          <h4>${r.programme_name}</h4>
-          <div class="admin-field"><label>Reporting Month</label>${r.reporting_month || "N/A"}</div>
-          <div class="admin-field"><label>Total Registered</label>${r.total_youth_registered || 0}</div>
-          <div class="admin-field"><label>Trained</label>${r.youth_trained || 0}</div>
-          <div class="admin-field"><label>Funded</label>${r.youth_funded || 0}</div>
-          <div class="admin-field"><label>Outcomes</label>${r.youth_with_outcomes || 0}</div>
-          <div class="admin-field"><label>Department</label>${r.focal_department || "N/A"}</div>
-          <div class="admin-field"><label>Challenges</label>${r.challenges ? r.challenges.substring(0, 80) + "..." : "N/A"}</div>
-          <div class="admin-field"><label>Submitted Date</label>${r.created_at ? new Date(r.created_at).toLocaleDateString() : "N/A"}</div>
-        </div>
-      `).join("");
-      container.innerHTML = `<div class="admin-cards">${cards}</div>`;
-      return;
-    }
+  if (reports.length === 0) {
+    container.innerHTML = "<div class='no-data'>No reports available.</div>";
+    return;
+  }
 
-    const rows = reports.map((r) => `
-      <tr>
-        <td><strong>${r.programme_name}</strong></td>
-        <td>${r.reporting_month || "N/A"}</td>
-        <td>${r.total_youth_registered || 0}</td>
-        <td>${r.youth_trained || 0}</td>
-        <td>${r.youth_funded || 0}</td>
-        <td>${r.youth_with_outcomes || 0}</td>
-        <td>${r.focal_department || "N/A"}</td>
-        <td>${r.challenges ? r.challenges.substring(0, 50) + "..." : "N/A"}</td>
-        <td>${r.created_at ? new Date(r.created_at).toLocaleDateString() : "N/A"}</td>
-      </tr>
+  if (isMobileView()) {
+    const cards = reports.map((r) => `
+      <div class="admin-card">
+        <h4>${r.programme_name}</h4>
+        <div class="admin-field"><label>Reporting Month</label>${r.reporting_month || "N/A"}</div>
+        <div class="admin-field"><label>Total Registered</label>${r.total_youth_registered || 0}</div>
+        <div class="admin-field"><label>Trained</label>${r.youth_trained || 0}</div>
+        <div class="admin-field"><label>Funded</label>${r.youth_funded || 0}</div>
+        <div class="admin-field"><label>Outcomes</label>${r.youth_with_outcomes || 0}</div>
+        <div class="admin-field"><label>Department</label>${r.focal_department || "N/A"}</div>
+        <div class="admin-field"><label>Challenges</label>${r.challenges ? r.challenges.substring(0, 80) + "..." : "N/A"}</div>
+        <div class="admin-field"><label>Submitted Date</label>${r.created_at ? new Date(r.created_at).toLocaleDateString() : "N/A"}</div>
+      </div>
     `).join("");
-
-    container.innerHTML = `
-      <table class="admin-table">
-        <thead>
-          <tr>
-            <th>Programme</th>
-            <th>Reporting Month</th>
-            <th>Total Registered</th>
-            <th>Trained</th>
-            <th>Funded</th>
-            <th>Outcomes</th>
-            <th>Department</th>
-            <th>Challenges</th>
-            <th>Submitted Date</th>
-          </tr>
-        </thead>
-        <tbody>
-          ${rows}
-        </tbody>
-      </table>
-    `;
-  } catch (err) {
-    console.error("Error loading reports:", err);
-    showError("Failed to load reports.");
+    container.innerHTML = `<div class="admin-cards">${cards}</div>`;
+    return;
   }
+
+  const rows = reports.map((r) => `
+    <tr>
+      <td><strong>${r.programme_name}</strong></td>
+      <td>${r.reporting_month || "N/A"}</td>
+      <td>${r.total_youth_registered || 0}</td>
+      <td>${r.youth_trained || 0}</td>
+      <td>${r.youth_funded || 0}</td>
+      <td>${r.youth_with_outcomes || 0}</td>
+      <td>${r.focal_department || "N/A"}</td>
+      <td>${r.challenges ? r.challenges.substring(0, 50) + "..." : "N/A"}</td>
+      <td>${r.created_at ? new Date(r.created_at).toLocaleDateString() : "N/A"}</td>
+    </tr>
+  `).join("");
+
+  container.innerHTML = `
+    <table class="admin-table">
+      <thead>
+        <tr>
+          <th>Programme</th>
+          <th>Reporting Month</th>
+          <th>Total Registered</th>
+          <th>Trained</th>
+          <th>Funded</th>
+          <th>Outcomes</th>
+          <th>Department</th>
+          <th>Challenges</th>
+          <th>Submitted Date</th>
+        </tr>
+      </thead>
+      <tbody>
+        ${rows}
+      </tbody>
+    </table>
+  `;
 }
 
 async function loadProgrammes() {
@@ -252,7 +266,7 @@ async function loadProgrammes() {
     const programmes = await programmesResponse.json();
     const summary = await summaryResponse.json();
     programmesCache = programmes;
-    const summaryMap = new Map(summary.map((s) => [s.programme_id, s]));
+    submissionSummary = new Map(summary.map((s) => [s.programme_id, s]));
     const container = document.getElementById("programmes-container");
 
     if (programmes.length === 0) {
@@ -264,7 +278,7 @@ async function loadProgrammes() {
 
     if (isMobileView()) {
       const cards = programmes.map((p) => {
-        const stats = summaryMap.get(p.id) || { submission_count: 0, last_submitted_at: null };
+        const stats = submissionSummary.get(p.id) || { submission_count: 0, last_submitted_at: null };
         const lastSubmitted = stats.last_submitted_at ? new Date(stats.last_submitted_at).toLocaleString() : "N/A";
         return `
           <div class="admin-card">
@@ -279,8 +293,8 @@ async function loadProgrammes() {
               <label>Recipient Email</label>
               <input type="email" id="email-${p.id}" value="${p.recipient_email || ""}" placeholder="Recipient email" style="width: 100%; padding: 8px; border: 1px solid #ddd; border-radius: 6px;" />
             </div>
-            <div class="admin-field"><label>Submission Count</label>${stats.submission_count || 0}</div>
-            <div class="admin-field"><label>Last Submitted</label>${lastSubmitted}</div>
+            <div class="admin-field"><label>Submission Count</label><span id="count-${p.id}">${stats.submission_count || 0}</span></div>
+            <div class="admin-field"><label>Last Submitted</label><span id="last-${p.id}">${lastSubmitted}</span></div>
             <div class="admin-actions">
               <button onclick="saveProgramme(${p.id})" style="background: #006400; color: white; border: none; padding: 8px 12px; border-radius: 6px; cursor: pointer;">Save</button>
               <button id="send-${p.id}" onclick="sendFormLink(${p.id})" style="background: #004d00; color: white; border: none; padding: 8px 12px; border-radius: 6px; cursor: pointer;">Send Link</button>
@@ -295,7 +309,7 @@ async function loadProgrammes() {
 
     const rows = programmes.map((p) => `
       ${(() => {
-        const stats = summaryMap.get(p.id) || { submission_count: 0, last_submitted_at: null };
+        const stats = submissionSummary.get(p.id) || { submission_count: 0, last_submitted_at: null };
         const lastSubmitted = stats.last_submitted_at ? new Date(stats.last_submitted_at).toLocaleString() : "N/A";
         return `
       <tr>
@@ -308,8 +322,8 @@ async function loadProgrammes() {
         <td>
           <input type="email" id="email-${p.id}" value="${p.recipient_email || ""}" placeholder="Recipient email" style="width: 100%; padding: 8px; border: 1px solid #ddd; border-radius: 6px;" />
         </td>
-        <td>${stats.submission_count || 0}</td>
-        <td>${lastSubmitted}</td>
+        <td><span id="count-${p.id}">${stats.submission_count || 0}</span></td>
+        <td><span id="last-${p.id}">${lastSubmitted}</span></td>
         <td style="white-space: nowrap;">
           <button onclick="saveProgramme(${p.id})" style="background: #006400; color: white; border: none; padding: 8px 12px; border-radius: 6px; cursor: pointer; margin-right: 6px;">Save</button>
           <button id="send-${p.id}" onclick="sendFormLink(${p.id})" style="background: #004d00; color: white; border: none; padding: 8px 12px; border-radius: 6px; cursor: pointer;">Send Link</button>
@@ -551,57 +565,62 @@ async function loadFormSubmissions() {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
 
-    const submissions = await response.json();
-    const container = document.getElementById("form-submissions-container");
+    submissionsCache = await response.json();
+    renderFormSubmissions();
+  } catch (err) {
+    console.error("Error loading form submissions:", err);
+    showError("Failed to load form submissions.");
+  }
+}
 
-    if (submissions.length === 0) {
-      container.innerHTML = "<div class='no-data'>No form submissions yet.</div>";
-      return;
-    }
+function renderFormSubmissions() {
+  const submissions = submissionsCache;
+  const container = document.getElementById("form-submissions-container");
 
-    const programmeMap = new Map(programmesCache.map((p) => [p.id, p.name]));
+  if (submissions.length === 0) {
+    container.innerHTML = "<div class='no-data'>No form submissions yet.</div>";
+    return;
+  }
 
-    if (isMobileView()) {
-      const cards = submissions.map((s) => `
-        <div class="admin-card">
-          <h4>${programmeMap.get(s.programme_id) || s.programme_id || "N/A"}</h4>
-          <div class="admin-field"><label>Recipient Email</label>${s.recipient_email}</div>
-          <div class="admin-field"><label>Submitted At</label>${s.submitted_at ? new Date(s.submitted_at).toLocaleString() : "N/A"}</div>
-          <div class="admin-field"><label>Form Data</label><div>${formatFormData(s.form_data)}</div></div>
-        </div>
-      `).join("");
-      container.innerHTML = `<div class="admin-cards">${cards}</div>`;
-      return;
-    }
+  const programmeMap = new Map(programmesCache.map((p) => [p.id, p.name]));
 
-    const rows = submissions.map((s) => `
-      <tr>
-        <td>${programmeMap.get(s.programme_id) || s.programme_id || "N/A"}</td>
-        <td>${s.recipient_email}</td>
-        <td>${s.submitted_at ? new Date(s.submitted_at).toLocaleString() : "N/A"}</td>
-        <td><div style="max-width: 420px;">${formatFormData(s.form_data)}</div></td>
-      </tr>
+  if (isMobileView()) {
+    const cards = submissions.map((s) => `
+      <div class="admin-card">
+        <h4>${programmeMap.get(s.programme_id) || s.programme_id || "N/A"}</h4>
+        <div class="admin-field"><label>Recipient Email</label>${s.recipient_email}</div>
+        <div class="admin-field"><label>Submitted At</label>${s.submitted_at ? new Date(s.submitted_at).toLocaleString() : "N/A"}</div>
+        <div class="admin-field"><label>Form Data</label><div>${formatFormData(s.form_data)}</div></div>
+      </div>
     `).join("");
-
-    container.innerHTML = `
-      <table class="admin-table">
-        <thead>
-          <tr>
-            <th>Programme</th>
-            <th>Recipient Email</th>
-            <th>Submitted At</th>
-            <th>Form Data</th>
-          </tr>
-        </thead>
-        <tbody>
-          ${rows}
-        </tbody>
-      </table>
-    `;
-  } catch (err) {
-    console.error("Error loading form submissions:", err);
-    showError("Failed to load form submissions.");
+    container.innerHTML = `<div class="admin-cards">${cards}</div>`;
+    return;
   }
+
+  const rows = submissions.map((s) => `
+    <tr>
+      <td>${programmeMap.get(s.programme_id) || s.programme_id || "N/A"}</td>
+      <td>${s.recipient_email}</td>
+      <td>${s.submitted_at ? new Date(s.submitted_at).toLocaleString() : "N/A"}</td>
+      <td><div style="max-width: 420px;">${formatFormData(s.form_data)}</div></td>
+    </tr>
+  `).join("");
+
+  container.innerHTML = `
+    <table class="admin-table">
+      <thead>
+        <tr>
+          <th>Programme</th>
+          <th>Recipient Email</th>
+          <th>Submitted At</th>
+          <th>Form Data</th>
+        </tr>
+      </thead>
+      <tbody>
+        ${rows}
+      </tbody>
+    </table>
+  `;
 }
 
 function showError(message) {
@@ -629,6 +648,69 @@ async function logout() {
 }
 
 // Load admin dashboard on page load
+// Live updates: apply pushed deltas to the cached data instead of refetching it.
+function applyReportEvent({ report, totals }) {
+  const index = reportsCache.findIndex((r) => r.id === report.id);
+  if (index >= 0) {
+    reportsCache[index] = report;
+  } else {
+    reportsCache.unshift(report);
+  }
+  renderReports();
+
+  if (statsCache) {
+    Object.entries(totals || {}).forEach(([key, delta]) => {
+      statsCache[key] = (statsCache[key] || 0) + delta;
+    });
+    const registered = statsCache.total_youth_registered || 0;
+    statsCache.training_percentage = registered > 0
+      ? Math.round((statsCache.total_trained / registered) * 10000) / 100
+      : 0;
+    renderStatsCards();
+  }
+}
+
+function applySubmissionEvent({ submission }) {
+  const stats = submissionSummary.get(submission.programme_id) || { submission_count: 0, last_submitted_at: null };
+  stats.submission_count = (stats.submission_count || 0) + 1;
+  stats.last_submitted_at = submission.submitted_at;
+  submissionSummary.set(submission.programme_id, stats);
+
+  const countEl = document.getElementById(`count-${submission.programme_id}`);
+  if (countEl) countEl.textContent = stats.submission_count;
+  const lastEl = document.getElementById(`last-${submission.programme_id}`);
+  if (lastEl && stats.last_submitted_at) lastEl.textContent = new Date(stats.last_submitted_at).toLocaleString();
+
+  const filter = document.getElementById("form-submissions-filter")?.value || "";
+  if (!filter || Number(filter) === submission.programme_id) {
+    submissionsCache.unshift(submission);
+    renderFormSubmissions();
+  }
+}
+
+function applyProgrammeEvent({ programme }) {
+  const index = programmesCache.findIndex((p) => p.id === programme.id);
+  if (index >= 0) programmesCache[index] = { ...programmesCache[index], ...programme };
+
+  // Leave fields alone while the admin is editing them.
+  const descInput = document.getElementById(`desc-${programme.id}`);
+  if (descInput && document.activeElement !== descInput) descInput.value = programme.description || "";
+  const emailInput = document.getElementById(`email-${programme.id}`);
+  if (emailInput && document.activeElement !== emailInput) emailInput.value = programme.recipient_email || "";
+}
+
+function startLiveUpdates() {
+  if (typeof subscribeLiveEvents !== "function") return;
+  subscribeLiveEvents({
+    report: applyReportEvent,
+    submission: applySubmissionEvent,
+    programme: applyProgrammeEvent,
+    reports_changed: () => Promise.all([loadStats(), loadAllReports()]),
+    resync: () => loadAdminDashboard(),
+  });
+}
+
 document.addEventListener("DOMContentLoaded", () => {
-  loadAdminDashboard();
+  loadAdminDashboard().then(startLiveUpdates);
+  if (typeof startNotifications === "function") startNotifications();
 });
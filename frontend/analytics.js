@@ -1,27 +1,34 @@
 const API_BASE = window.location.origin;
 let chartsRegistry = {};
 let analyticsData = {};
+let analyticsReports = [];
+let analyticsPartners = { categories: [], top_partners: [] };
+let liveRenderTimer = null;
 
 document.addEventListener("DOMContentLoaded", async () => {
   Chart.register(ChartDataLabels);
   await loadAnalytics();
   populateMonthFilter();
+  startLiveUpdates();
 });
 
 async function loadAnalytics() {
   try {
-    // Fetch all reports
-    const response = await fetch(`${API_BASE}/reports/`, {
-      method: "GET",
-      credentials: "include",
-    });
+    // Fetch all reports and the partner index (aggregated server-side)
+    const [response] = await Promise.all([
+      fetch(`${API_BASE}/reports/`, {
+        method: "GET",
+        credentials: "include",
+      }),
+      loadPartners(),
+    ]);
 
     if (!response.ok) {
       throw new Error(`HTTP error! status: ${response.status}`);
     }
 
-    const reports = await response.json();
-    analyticsData = processReportsData(reports);
+    analyticsReports = await response.json();
+    analyticsData = processReportsData(analyticsReports);
 
     // Render stats
     renderStats();
@@ -34,6 +41,48 @@ async function loadAnalytics() {
   }
 }
 
+async function loadPartners() {
+  try {
+    const response = await fetch(`${API_BASE}/reports/partners`, {
+      method: "GET",
+      credentials: "include",
+    });
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    analyticsPartners = await response.json();
+  } catch (err) {
+    console.error("Error loading partnerships:", err);
+  }
+}
+
+// Pushed report changes are folded into the loaded rows; charts redraw at most once a second.
+function applyReportEvent({ report }) {
+  const index = analyticsReports.findIndex((r) => r.id === report.id);
+  if (index >= 0) {
+    analyticsReports[index] = report;
+  } else {
+    analyticsReports.unshift(report);
+  }
+  if (liveRenderTimer) return;
+  liveRenderTimer = setTimeout(async () => {
+    liveRenderTimer = null;
+    await loadPartners();
+    analyticsData = processReportsData(analyticsReports);
+    renderStats();
+    renderCharts();
+  }, 1000);
+}
+
+function startLiveUpdates() {
+  if (typeof subscribeLiveEvents !== "function") return;
+  subscribeLiveEvents({
+    report: applyReportEvent,
+    reports_changed: () => loadAnalytics(),
+    resync: () => loadAnalytics(),
+  });
+}
+
 function processReportsData(reports) {
   const data = {
     totalRegistered: 0,
@@ -42,7 +91,6 @@ function processReportsData(reports) {
     totalOutcomes: 0,
     monthlyData: {},
     departmentData: {},
-    partnersData: { private: 0, ngo: 0, government: 0, academic: 0 },
     submitCount: reports.length,
   };
 
@@ -79,17 +127,6 @@ function processReportsData(reports) {
     data.departmentData[dept].reports += 1;
     data.departmentData[dept].registered += report.total_youth_registered || 0;
     data.departmentData[dept].trained += report.youth_trained || 0;
-
-    // Partnerships
-    if (report.partnerships) {
-      const partnerships = report.partnerships.split(",").map((p) => p.trim());
-      partnerships.forEach((p) => {
-        if (p.includes("Private")) data.partnersData.private++;
-        if (p.includes("NGO")) data.partnersData.ngo++;
-        if (p.includes("Government")) data.partnersData.government++;
-        if (p.includes("Academic")) data.partnersData.academic++;
-      });
-    }
   });
 
   return data;
@@ -281,7 +318,17 @@ function renderOutcomesChart() {
   });
 }
 
+const PARTNER_CATEGORY_LABELS = {
+  private: "Private Sector",
+  ngo: "NGOs",
+  government: "Government",
+  academic: "Academic",
+  development: "Development Partners",
+  other: "Other",
+};
+
 function renderPartnershipsChart() {
+  const categories = analyticsPartners.categories || [];
   const ctx = document.getElementById("partnershipsChart").getContext("2d");
 
   if (chartsRegistry.partnerships)
@@ -290,16 +337,11 @@ function renderPartnershipsChart() {
   chartsRegistry.partnerships = new Chart(ctx, {
     type: "bar",
     data: {
-      labels: ["Private Sector", "NGOs", "Government", "Academic"],
+      labels: categories.map((c) => PARTNER_CATEGORY_LABELS[c.category] || c.category),
       datasets: [
         {
           label: "Partnerships",
-          data: [
-            analyticsData.partnersData.private,
-            analyticsData.partnersData.ngo,
-            analyticsData.partnersData.government,
-            analyticsData.partnersData.academic,
-          ],
+          data: categories.map((c) => c.partners),
           backgroundColor: "#006400",
           borderColor: "#004d00",
           borderWidth: 2,
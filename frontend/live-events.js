@@ -0,0 +1,22 @@
+// Live dashboard updates pushed by the server over Server-Sent Events (GET /events/stream).
+// The browser reconnects on its own and resumes from the last event id it saw; when the
+// server cannot replay what was missed it sends "resync" and the page reloads its data once.
+function subscribeLiveEvents(handlers) {
+  if (!window.EventSource) return null;
+
+  const source = new EventSource(`${window.location.origin}/events/stream`, {
+    withCredentials: true,
+  });
+
+  Object.entries(handlers).forEach(([kind, handler]) => {
+    source.addEventListener(kind, (event) => {
+      try {
+        handler(JSON.parse(event.data || "{}"));
+      } catch (err) {
+        console.error(`Error handling live "${kind}" event:`, err);
+      }
+    });
+  });
+
+  return source;
+}
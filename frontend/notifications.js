@@ -0,0 +1,136 @@
+// In-app notifications (GET /notifications/) for the admin header: an unread badge and a
+// dropdown feed. New items arrive through a long poll (since=<newest seq>&wait=...), so the
+// feed is downloaded once; older items are paged in with before=<next_before>.
+const NOTIFICATIONS_WAIT_SECONDS = 25;
+const NOTIFICATIONS_RETRY_MS = 5000;
+const notificationsState = {
+  items: [],
+  newestSeq: 0,
+  nextBefore: null,
+  unread: 0,
+};
+
+async function fetchNotifications(params) {
+  const query = new URLSearchParams(params).toString();
+  const response = await fetch(`${window.location.origin}/notifications/?${query}`, {
+    method: "GET",
+    credentials: "include",
+  });
+  if (!response.ok) {
+    throw new Error(`Failed to load notifications (${response.status})`);
+  }
+  return response.json();
+}
+
+function renderNotificationBadge() {
+  const badge = document.getElementById("notifications-badge");
+  if (!badge) return;
+  badge.hidden = notificationsState.unread <= 0;
+  badge.textContent = notificationsState.unread > 99 ? "99+" : String(notificationsState.unread);
+}
+
+function renderNotifications() {
+  renderNotificationBadge();
+  const list = document.getElementById("notifications-list");
+  if (!list) return;
+  list.replaceChildren();
+
+  if (!notificationsState.items.length) {
+    const empty = document.createElement("div");
+    empty.className = "notification-item";
+    empty.textContent = "No notifications yet.";
+    list.appendChild(empty);
+  }
+  notificationsState.items.forEach((item) => {
+    const row = document.createElement("div");
+    row.className = `notification-item${item.read ? "" : " unread"}`;
+    const title = document.createElement("strong");
+    title.textContent = item.title;
+    row.appendChild(title);
+    if (item.body) {
+      const body = document.createElement("div");
+      body.textContent = item.body;
+      row.appendChild(body);
+    }
+    const time = document.createElement("time");
+    time.textContent = item.created_at ? new Date(item.created_at).toLocaleString() : "";
+    row.appendChild(time);
+    list.appendChild(row);
+  });
+
+  const more = document.getElementById("notifications-more");
+  if (more) more.hidden = !notificationsState.nextBefore;
+}
+
+async function loadNotifications() {
+  const page = await fetchNotifications({ limit: 20 });
+  notificationsState.items = page.items;
+  notificationsState.newestSeq = page.items.length ? page.items[0].seq : 0;
+  notificationsState.nextBefore = page.next_before;
+  notificationsState.unread = page.unread;
+  renderNotifications();
+}
+
+async function loadOlderNotifications() {
+  if (!notificationsState.nextBefore) return;
+  const page = await fetchNotifications({ limit: 20, before: notificationsState.nextBefore });
+  notificationsState.items = notificationsState.items.concat(page.items);
+  notificationsState.nextBefore = page.next_before;
+  notificationsState.unread = page.unread;
+  renderNotifications();
+}
+
+async function pollNotifications() {
+  // One request at a time; each returns as soon as something newer than newestSeq exists.
+  for (;;) {
+    try {
+      const page = await fetchNotifications({
+        since: notificationsState.newestSeq,
+        wait: NOTIFICATIONS_WAIT_SECONDS,
+        limit: 100,
+      });
+      if (page.items.length) {
+        // `since` pages come oldest first.
+        notificationsState.items = page.items.slice().reverse().concat(notificationsState.items);
+        notificationsState.newestSeq = page.items[page.items.length - 1].seq;
+      }
+      notificationsState.unread = page.unread;
+      renderNotifications();
+    } catch (err) {
+      console.warn("Notification poll failed:", err);
+      await new Promise((resolve) => setTimeout(resolve, NOTIFICATIONS_RETRY_MS));
+    }
+  }
+}
+
+async function markAllNotificationsRead() {
+  const response = await fetch(`${window.location.origin}/notifications/read`, {
+    method: "POST",
+    credentials: "include",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ up_to: notificationsState.newestSeq }),
+  });
+  if (!response.ok) return;
+  const result = await response.json();
+  notificationsState.items.forEach((item) => {
+    if (item.seq <= notificationsState.newestSeq) item.read = true;
+  });
+  notificationsState.unread = result.unread;
+  renderNotifications();
+}
+
+function startNotifications() {
+  const button = document.getElementById("notifications-btn");
+  const panel = document.getElementById("notifications-panel");
+  if (!button || !panel) return;
+
+  button.addEventListener("click", () => {
+    panel.hidden = !panel.hidden;
+  });
+  document.getElementById("notifications-mark-read")?.addEventListener("click", markAllNotificationsRead);
+  document.getElementById("notifications-older")?.addEventListener("click", loadOlderNotifications);
+
+  loadNotifications()
+    .catch((err) => console.warn("Failed to load notifications:", err))
+    .then(pollNotifications);
+}
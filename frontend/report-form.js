@@ -62,12 +62,26 @@ async function handleFormSubmit(e) {
   };
 
   try {
-    const response = await fetch(`${API_BASE}/reports/`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      credentials: "include",
-      body: JSON.stringify(formData),
-    });
+    const files = document.getElementById("attachments")?.files || [];
+    let response;
+    if (files.length) {
+      // Evidence files are streamed with the report as multipart form data.
+      const body = new FormData();
+      body.append("payload", JSON.stringify(formData));
+      Array.from(files).forEach((file) => body.append("files", file));
+      response = await fetch(`${API_BASE}/reports/with-attachments`, {
+        method: "POST",
+        credentials: "include",
+        body,
+      });
+    } else {
+      response = await fetch(`${API_BASE}/reports/`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        credentials: "include",
+        body: JSON.stringify(formData),
+      });
+    }
 
     console.log("Response status:", response.status);
     
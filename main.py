@@ -1,15 +1,26 @@
+import os
+from dotenv import load_dotenv
+
+# Loaded once, before any app module reads its settings at import time.
+load_dotenv()
+
+from anyio import to_thread
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from dotenv import load_dotenv
-import os
-from database import engine, Base, SessionLocal
-from utils.migrations import ensure_programme_columns
-from programmes import preload_programmes
-import auth, programmes, reports, notifications, forms
+from database import THREADPOOL_SIZE, engine, SessionLocal, mark_write
+from utils.migrations import prepare_database
+from utils.readiness import check_ready
+from utils.briefings import shutdown_pool
+from utils.email import drain_outbox
+from utils.rate_limit import limit_request_async
+import auth, programmes, reports, notifications, forms, events, attachments, sync, analytics
 
-load_dotenv()
+# Schema migrations and the catalogue sync belong to the deploy (scripts/migrate.py). With
+# this on, a booting worker also applies anything still pending, which costs two quick
+# queries when there is nothing to do.
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
 
 app = FastAPI(title="Digital Monitoring Tool API")
 
@@ -22,12 +33,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Send a client's reads to the primary for a short window after it writes
+# (no-op unless DATABASE_READ_URL is set).
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        mark_write(response)
+    return response
+
+# Throttle the public and login routes per client and per key, and shed them with a fast
+# 503 while the DB pool is exhausted instead of queueing behind a burst.
+@app.middleware("http")
+async def rate_limit(request: Request, call_next):
+    rejected = await limit_request_async(request, engine)
+    if rejected is not None:
+        return rejected
+    return await call_next(request)
+
 # include routers FIRST (must be before StaticFiles mount)
 app.include_router(auth.router)
 app.include_router(programmes.router)
 app.include_router(reports.router)
 app.include_router(notifications.router)
 app.include_router(forms.router)
+app.include_router(events.router)
+app.include_router(attachments.router)
+app.include_router(sync.router)
+app.include_router(analytics.router)
+
+# Probes are declared here too: the frontend mount below would shadow them.
+@app.get("/health")
+def health():
+    # Liveness only: the process is up. Route traffic on /ready.
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    is_ready, checks = check_ready()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "not ready", "checks": checks},
+    )
 
 # Mount frontend folder at root (must be last)
 app.mount("/", StaticFiles(directory="frontend", html=True), name="frontend")
@@ -35,28 +83,33 @@ app.mount("/", StaticFiles(directory="frontend", html=True), name="frontend")
 # global exception handlers
 @app.exception_handler(HTTPException)
 def http_exception_handler(request: Request, exc: HTTPException):
-    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=exc.headers)
 
 @app.exception_handler(Exception)
 def generic_exception_handler(request: Request, exc: Exception):
     # In production, you would log the exception details
     return JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
 
+@app.on_event("startup")
+async def size_threadpool():
+    # Sized with the DB pool (database.THREADPOOL_SIZE); must run on the event loop.
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+
 @app.on_event("startup")
 def on_startup():
-    # create DB and tables
-    Base.metadata.create_all(bind=engine)
-    # ensure backward-compatible programme columns exist
-    database_url = os.getenv("DATABASE_URL", "sqlite:///./dmt.db")
-    ensure_programme_columns(engine, database_url.startswith("sqlite"))
-    # preload sample programmes
-    db = SessionLocal()
-    try:
-        preload_programmes(db)
-    finally:
-        db.close()
+    # Caches (programme registry, data versions) fill on first use or via GET /ready.
+    if MIGRATE_ON_STARTUP:
+        try:
+            prepare_database(engine, SessionLocal)
+        except Exception as exc:
+            # Keep the worker up so GET /ready can report why it is not ready.
+            print(f"Database migration failed: {exc}")
 
 
-@app.get("/health")
-def health():
-    return {"status": "ok"}
+@app.on_event("shutdown")
+def on_shutdown():
+    # Runs once in-flight requests have finished (or the server's graceful timeout passed).
+    drain_outbox()
+    shutdown_pool()
+
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Date, UniqueConstraint, Index, Float, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -35,9 +35,16 @@ class Programme(Base):
     department = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     recipient_email = Column(String, nullable=True, index=True)
+    # Annual targets used by /reports/forecast; NULL when no target has been set.
+    target_registered = Column(Integer, nullable=True)
+    target_trained = Column(Integer, nullable=True)
+    target_funded = Column(Integer, nullable=True)
 
 class MonthlyReport(Base):
     __tablename__ = "monthly_reports"
+    __table_args__ = (
+        UniqueConstraint("programme_name", "reporting_month", name="uq_monthly_reports_programme_month"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     programme_name = Column(String, nullable=False)
     submitted_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
@@ -75,3 +82,154 @@ class FormSubmission(Base):
     recipient_email = Column(String, index=True, nullable=False)
     form_data = Column(Text, nullable=False)
     submitted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class AppMeta(Base):
+    __tablename__ = "app_meta"
+    key = Column(String, primary_key=True)
+    value = Column(Text, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Closed reporting years are moved here by utils/archive.py; ids are preserved.
+class MonthlyReportArchive(Base):
+    __tablename__ = "monthly_reports_archive"
+    id = Column(Integer, primary_key=True)
+    programme_name = Column(String, nullable=False)
+    submitted_by = Column(Integer, nullable=True)
+    focal_department = Column(String, nullable=True)
+    focal_aide_hm = Column(String, nullable=True)
+    focal_ministry_official = Column(String, nullable=True)
+    reporting_month = Column(Date, nullable=False, index=True)
+    programme_launch_date = Column(Date, nullable=True)
+    total_youth_registered = Column(Integer, nullable=False, default=0)
+    youth_trained = Column(Integer, nullable=False, default=0)
+    youth_funded = Column(Integer, nullable=False, default=0)
+    youth_with_outcomes = Column(Integer, nullable=False, default=0)
+    partnerships = Column(Text, nullable=True)
+    challenges = Column(Text, nullable=True)
+    mitigation_strategies = Column(Text, nullable=True)
+    scale_up_plans = Column(Text, nullable=True)
+    success_story = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class FormSubmissionArchive(Base):
+    __tablename__ = "form_submissions_archive"
+    id = Column(Integer, primary_key=True)
+    programme_id = Column(Integer, nullable=True, index=True)
+    recipient_email = Column(String, nullable=False)
+    form_data = Column(Text, nullable=False)
+    submitted_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Outbox for live dashboard events (utils/events.py); pruned after EVENTS_RETENTION_SECONDS.
+class LiveEvent(Base):
+    __tablename__ = "live_events"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+# Evidence files for reports and form submissions. The file itself is stored once per
+# sha256 under ATTACHMENTS_DIR; report_id/submission_id are plain columns rather than
+# foreign keys so attachments still resolve after their rows are archived (ids are kept).
+class Attachment(Base):
+    __tablename__ = "attachments"
+    id = Column(Integer, primary_key=True, index=True)
+    report_id = Column(Integer, nullable=True, index=True)
+    submission_id = Column(Integer, nullable=True, index=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    uploaded_by = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Partners parsed from MonthlyReport.partnerships on every write (utils/partners.py), so
+# partner analytics are indexed aggregates. Like attachments, report_id is a plain column
+# and the programme/month are copied in, so rows stay valid after their report is archived.
+class ReportPartner(Base):
+    __tablename__ = "report_partners"
+    __table_args__ = (
+        Index("ix_report_partners_category_month", "category", "reporting_month"),
+    )
+    id = Column(Integer, primary_key=True)
+    report_id = Column(Integer, nullable=False, index=True)
+    programme_name = Column(String, nullable=False, index=True)
+    reporting_month = Column(Date, nullable=False)
+    name = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+
+# Recurring themes in challenges/mitigation text (utils/themes.py). centroid holds the
+# float32 sum of member TF-IDF vectors, so new reports update it without a full refit.
+class ChallengeTheme(Base):
+    __tablename__ = "challenge_themes"
+    id = Column(Integer, primary_key=True)
+    label = Column(String, nullable=False)
+    terms = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False, default=0)
+    centroid = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Theme of each report; report_id is a plain column like report_partners. Rows are deleted
+# when the report text changes so the next theme update reassigns the report.
+class ReportTheme(Base):
+    __tablename__ = "report_themes"
+    report_id = Column(Integer, primary_key=True)
+    theme_id = Column(Integer, nullable=True, index=True)
+    programme_name = Column(String, nullable=False)
+    reporting_month = Column(Date, nullable=False, index=True)
+    similarity = Column(Float, nullable=True)
+
+# In-app notifications (utils/notifications.py), one row per recipient. Feeds page on
+# (user_id, seq), seq being numbered in commit order after the writing transaction commits
+# (NULL until then); unread totals are read from notification_counters instead of COUNT(*).
+class Notification(Base):
+    __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_id_seq", "user_id", "seq"),
+    )
+    id = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=True, unique=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False)
+    title = Column(String, nullable=False)
+    body = Column(Text, nullable=True)
+    link = Column(String, nullable=True)
+    data = Column(Text, nullable=True)
+    read_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Unread notifications per user, adjusted in the same transaction as every insert and read.
+class NotificationCounter(Base):
+    __tablename__ = "notification_counters"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
+
+# Append-only log of writes to reports, form submissions and programmes (utils/change_log.py).
+# seq is the GET /sync/changes cursor, numbered in commit order after the writing transaction
+# commits (NULL until then); rows carry no data, the feed reads the current row.
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    id = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=True, unique=True, index=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)
+    changed_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,28 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import time
+from fastapi import APIRouter, Cookie, Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta
-from database import get_db
-from models import User, MonthlyReport
-from utils.email import send_email
-from utils.auth_utils import require_admin
+from database import SessionLocal, get_db
+from models import ChallengeTheme, MonthlyReport, ReportTheme, User
+from schemas import NotificationReadRequest
+from utils.email import email_health, send_many
+from utils.auth_utils import get_current_user, require_admin
+from utils.notifications import (
+    NOTIFICATION_LONG_POLL_SECONDS,
+    NOTIFICATION_MAX_PAGE_SIZE,
+    NOTIFICATION_PAGE_SIZE,
+    NOTIFICATION_POLL_SECONDS,
+    latest_seq,
+    list_notifications,
+    mark_read,
+    notify_admins,
+    notify_report_submitted as notify_report_notice,
+    unread_count,
+)
 import os
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
-# Keep track of notifications in memory (in production, use database)
-notifications_store = {}
 
-@router.get("/", response_model=list)
-async def get_notifications(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
+def _feed_page(session_token: str | None, before, since, limit: int, unread_only: bool, wait_for_new: bool):
+    # Short-lived sessions, so a long poll does not hold a pooled connection while it waits.
+    db = SessionLocal()
+    try:
+        user = get_current_user(session_token, db)
+        if wait_for_new and latest_seq(db, user.id) <= since:
+            return None
+        items = list_notifications(db, user.id, before=before, since=since, limit=limit, unread_only=unread_only)
+        next_before = items[-1]["seq"] if since is None and len(items) == limit else None
+        return {"items": items, "unread": unread_count(db, user.id), "next_before": next_before}
+    finally:
+        db.close()
+
+
+@router.get("/")
+async def get_notifications(
+    before: int | None = None,
+    since: int | None = None,
+    limit: int = NOTIFICATION_PAGE_SIZE,
+    unread_only: bool = False,
+    wait: float = 0,
+    session_token: str = Cookie(None),
+):
+    """
+    The current user's notification feed, newest first. Page back with `before` (the
+    previous page's `next_before`); fetch only new items with `since` (the newest seq seen),
+    adding `wait` seconds to hold the request open until something arrives.
+    """
+    limit = max(1, min(limit, NOTIFICATION_MAX_PAGE_SIZE))
+    wait = max(0.0, min(wait, NOTIFICATION_LONG_POLL_SECONDS)) if since is not None else 0.0
+    deadline = time.monotonic() + wait
+    while True:
+        waiting = time.monotonic() < deadline
+        page = await run_in_threadpool(_feed_page, session_token, before, since, limit, unread_only, waiting)
+        if page is not None:
+            return page
+        await asyncio.sleep(min(NOTIFICATION_POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+
+
+@router.get("/unread-count")
+def get_unread_count(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return {"unread": unread_count(db, current_user.id)}
+
+
+@router.post("/read")
+def mark_notifications_read(
+    payload: NotificationReadRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Mark the given notifications (or everything up to `up_to`, or everything) read."""
+    marked = mark_read(db, current_user.id, ids=payload.ids, up_to=payload.up_to)
+    db.commit()
+    return {"marked": marked, "unread": unread_count(db, current_user.id)}
+
+@router.get("/email-health")
+def get_email_health(admin_user=Depends(require_admin)):
     """
-    Get all notifications for the current user
-    Placeholder - returns empty for now
+    Per-backend circuit state, throttle and latency stats for this worker's email chain.
     """
-    return []
+    return email_health()
 
 @router.post("/send-reminders")
-async def send_report_reminders(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
+def send_report_reminders(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
     """
     Send reminders to users who haven't submitted reports for current month.
     This should be called by a scheduled task (e.g., cron job)
@@ -35,7 +103,7 @@ async def send_report_reminders(db: Session = Depends(get_db), admin_user=Depend
         # Get all users
         users = db.query(User).all()
         
-        reminders_sent = 0
+        messages = []
         
         for user in users:
             if user.role == "admin":
@@ -64,11 +132,15 @@ async def send_report_reminders(db: Session = Depends(get_db), admin_user=Depend
                 Thank you!
                 """
                 
-                sent, error = send_email(user.email, subject, body)
-                if sent:
-                    reminders_sent += 1
-                else:
-                    print(f"Failed to send reminder to {user.email}: {error}")
+                messages.append((user.email, subject, body))
+        
+        # Batched so a large reminder run costs a handful of provider calls.
+        reminders_sent = 0
+        for (to_email, _, _), (sent, error) in zip(messages, send_many(messages)):
+            if sent:
+                reminders_sent += 1
+            else:
+                print(f"Failed to send reminder to {to_email}: {error}")
         
         return {
             "status": "success",
@@ -84,34 +156,54 @@ async def send_report_reminders(db: Session = Depends(get_db), admin_user=Depend
         )
 
 @router.post("/notify-challenges")
-async def notify_on_challenges(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
+def notify_on_challenges(email: bool = False, db: Session = Depends(get_db), admin_user=Depends(require_admin)):
     """
-    Send notifications to admins when challenges are reported.
-    This should be called when a report with significant challenges is submitted.
+    Weekly digest of reports with challenges, posted to every admin's notification feed.
+    Pass email=true to also email it to each admin (e.g. from a weekly cron job).
     """
     try:
-        # Get all admins
-        admins = db.query(User).filter(User.role == "admin").all()
-        
         # Get recent reports with challenges
         one_week_ago = datetime.utcnow() - timedelta(days=7)
         reports_with_challenges = db.query(MonthlyReport).filter(
             MonthlyReport.created_at >= one_week_ago,
             MonthlyReport.challenges.isnot(None)
         ).all()
+        if not reports_with_challenges:
+            return {"status": "success", "notifications_sent": 0, "emails_sent": 0, "message": "No reports with challenges this week"}
         
-        notifications_sent = 0
+        # Recurring themes among these reports (see utils/themes.py), most common first.
+        theme_counts = (
+            db.query(ChallengeTheme.label, func.count(ReportTheme.report_id))
+            .join(ReportTheme, ReportTheme.theme_id == ChallengeTheme.id)
+            .filter(ReportTheme.report_id.in_([r.id for r in reports_with_challenges]))
+            .group_by(ChallengeTheme.id, ChallengeTheme.label)
+            .order_by(func.count(ReportTheme.report_id).desc())
+            .limit(5)
+            .all()
+        )
         
-        for admin in admins:
-            if reports_with_challenges:
-                subject = f"Alert: {len(reports_with_challenges)} reports with challenges submitted"
-                
-                challenges_summary = "\n".join([
-                    f"- {r.programme_name}: {r.challenges[:100]}..."
-                    for r in reports_with_challenges[:5]
-                ])
-                
-                body = f"""
+        subject = f"Alert: {len(reports_with_challenges)} reports with challenges submitted"
+        challenges_summary = "\n".join([
+            f"- {r.programme_name}: {r.challenges[:100]}..."
+            for r in reports_with_challenges[:5]
+        ])
+        if theme_counts:
+            themes_summary = "\n".join(f"- {label} ({count} report(s))" for label, count in theme_counts)
+            challenges_summary = f"Recurring themes:\n{themes_summary}\n\nExamples:\n{challenges_summary}"
+        
+        notifications_sent = notify_admins(
+            db,
+            "challenges_digest",
+            subject,
+            challenges_summary,
+            "/analytics.html",
+            {"report_ids": [r.id for r in reports_with_challenges]},
+        )
+        db.commit()
+        
+        emails_sent = 0
+        if email:
+            body = f"""
                 Hello Admin,
 
                 {len(reports_with_challenges)} reports with challenges have been submitted this week:
@@ -124,17 +216,19 @@ async def notify_on_challenges(db: Session = Depends(get_db), admin_user=Depends
 
                 Thank you!
                 """
-                
-                sent, error = send_email(admin.email, subject, body)
+            admins = db.query(User).filter(User.role == "admin").all()
+            messages = [(admin.email, subject, body) for admin in admins]
+            for (to_email, _, _), (sent, error) in zip(messages, send_many(messages)):
                 if sent:
-                    notifications_sent += 1
+                    emails_sent += 1
                 else:
-                    print(f"Failed to send notification to {admin.email}: {error}")
+                    print(f"Failed to send notification to {to_email}: {error}")
         
         return {
             "status": "success",
             "notifications_sent": notifications_sent,
-            "message": f"Sent {notifications_sent} notification(s)"
+            "emails_sent": emails_sent,
+            "message": f"Notified {notifications_sent} admin(s)"
         }
     
     except Exception as e:
@@ -145,57 +239,29 @@ async def notify_on_challenges(db: Session = Depends(get_db), admin_user=Depends
         )
 
 @router.post("/notify-report-submitted")
-async def notify_report_submitted(report_id: int, db: Session = Depends(get_db), admin_user=Depends(require_admin)):
+def notify_report_submitted(report_id: int, db: Session = Depends(get_db), admin_user=Depends(require_admin)):
     """
-    Send notification to admins when a new report is submitted.
+    Re-post a report's notification to every admin's feed. Submissions notify admins on their own;
+    this is for reports that arrived another way (e.g. a direct database import).
     """
+    report = db.query(MonthlyReport).filter(MonthlyReport.id == report_id).first()
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report not found"
+        )
+    
     try:
-        report = db.query(MonthlyReport).filter(MonthlyReport.id == report_id).first()
-        
-        if not report:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Report not found"
-            )
-        
-        # Get all admins
-        admins = db.query(User).filter(User.role == "admin").all()
-        
-        notifications_sent = 0
-        
-        for admin in admins:
-            subject = f"New Report Submitted: {report.programme_name}"
-            body = f"""
-            Hello Admin,
-
-            A new monthly report has been submitted:
-
-            Programme: {report.programme_name}
-            Department: {report.focal_department}
-            Month: {report.reporting_month}
-            Youth Registered: {report.total_youth_registered}
-            Youth Trained: {report.youth_trained}
-
-            Please review this report and provide feedback if necessary.
-
-            Admin Dashboard: {os.getenv("APP_BASE_URL", "http://localhost:8000")}/admin.html
-
-            Thank you!
-            """
-            
-            sent, error = send_email(admin.email, subject, body)
-            if sent:
-                notifications_sent += 1
-            else:
-                print(f"Failed to send notification to {admin.email}: {error}")
-        
+        notifications_sent = notify_report_notice(db, report)
+        db.commit()
         return {
             "status": "success",
             "notifications_sent": notifications_sent,
-            "message": f"Notified {notifications_sent} admin(s)"
+            "message": f"Posted {notifications_sent} notification(s)"
         }
     
     except Exception as e:
+        db.rollback()
         print(f"Error sending report submitted notification: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,16 +1,20 @@
+from dataclasses import asdict
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from database import get_db
 from models import Programme
 from schemas import ProgrammeOut, ProgrammeUpdate
 from utils.auth_utils import require_admin
+from utils.change_log import record_changes
+from utils.data_version import bump_version, get_version
+from utils.events import publish
+from utils.programme_registry import PROGRAMMES_SCOPE, ProgrammeRecord, registry
 
 router = APIRouter(prefix="/programmes", tags=["programmes"])
 
 @router.get("/", response_model=list[ProgrammeOut])
 def list_programmes(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
-    programmes = db.query(Programme).all()
-    return programmes
+    return registry.all(db)
 
 
 @router.put("/{programme_id}", response_model=ProgrammeOut)
@@ -26,35 +30,16 @@ def update_programme(
 
     programme.description = payload.description
     programme.recipient_email = payload.recipient_email.lower()
+    for name, value in payload.dict(exclude_unset=True).items():
+        if name.startswith("target_"):
+            setattr(programme, name, value)
     db.add(programme)
+    record = ProgrammeRecord.from_model(programme)
+    bump_version(db, PROGRAMMES_SCOPE)
+    record_changes(db, "programme", [programme.id])
+    publish(db, "programme", {"programme": asdict(record)})
+    version = get_version(db, PROGRAMMES_SCOPE)
     db.commit()
     db.refresh(programme)
+    registry.put(record, version)
     return programme
-
-# predefined programmes (if requested i should make this updatable via admin interface....ka eleyi o)
-def preload_programmes(db: Session):
-    flagship_programmes = [
-        {"name": "NIYA", "department": ""},
-        {"name": "Green House Initiatives with State Government", "department": ""},
-        {"name": "Nig Help Desk", "department": ""},
-        {"name": "National Youth Confab", "department": ""},
-        {"name": "NYSC Reform Committee", "department": ""},
-        {"name": "Youth Data Protection", "department": ""},
-        {"name": "Waste to Wealth / Recycling Training", "department": ""},
-        {"name": "Bambo Initiative", "department": ""},
-        {"name": "SMEDAN Partnership/Youth Start Up", "department": ""},
-        {"name": "Security and Exchange Commission MOU", "department": ""},
-        {"name": "Financial Literacy and Wealth Creation Training (Forex and Gold Commodity Trading)", "department": ""},
-        {"name": "Yo Health", "department": ""},
-        {"name": "Bank of Industry Training for NIYA", "department": ""},
-        {"name": "Youth Credit Initiative", "department": ""},
-        {"name": "Nigerian Youth Investment Fund", "department": ""},
-        {"name": "Youth Skills Accelerator", "department": ""},
-        {"name": "Entrepreneurship Incubator", "department": ""},
-        {"name": "Digital Literacy", "department": ""},
-    ]
-    existing = db.query(Programme).count()
-    if existing == 0:
-        for s in flagship_programmes:
-            db.add(Programme(name=s["name"], department=s["department"]))
-        db.commit()
@@ -1,117 +1,382 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+import re
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Header, Request
+from fastapi.responses import FileResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import Float, cast, column, func, select, table
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from database import get_db
-from schemas import MonthlyReportCreate, MonthlyReportOut, DashboardResponse
-from models import MonthlyReport, User, FormSubmission
+from database import get_db, get_read_db
+from schemas import MonthlyReportCreate, MonthlyReportOut, DashboardResponse, BriefingRequest
+from models import MonthlyReport, User, FormSubmission, Programme
 from utils.auth_utils import get_current_user, require_admin
+from utils.analytics import AnalyticsError, run_in_duckdb
+from utils.attachments import (
+    AttachmentError,
+    StoredFile,
+    add_attachments,
+    attachment_to_dict,
+    discard_unreferenced_blobs,
+    parse_payload_field,
+    receive_upload,
+)
+from utils.archive import (
+    ArchivedYearError,
+    archive_summary,
+    iter_parquet_rows,
+    parquet_files,
+    parquet_rows,
+    report_source,
+    run_archive,
+)
+from utils.briefings import BRIEFING_FORMATS, job_status, output_path, request_briefing
+from utils.data_version import REPORTS_SCOPE, THEMES_SCOPE, VersionedCache, bump_version, get_version
+from utils.email import queue_emails
+from utils.events import publish, publish_report, report_totals
+from utils.notifications import notify_report_submitted
+from utils.partners import partner_summary
+from utils.programme_registry import PROGRAMMES_SCOPE, registry
+from utils.idempotency import IDEMPOTENCY_HEADER, get_stored_response, store_response
+from utils.responses import RawJSONResponse, encode_rows
+from utils.report_import import ImportInterrupted, iter_rows, import_reports
+from utils.upsert import upsert_report
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+KPI_METRICS = (
+    ("registered", "total_youth_registered"),
+    ("trained", "youth_trained"),
+    ("funded", "youth_funded"),
+    ("outcomes", "youth_with_outcomes"),
+)
+# (rate name, numerator, denominator) along the registration -> outcome funnel
+KPI_RATES = (
+    ("training_rate", "trained", "registered"),
+    ("funding_rate", "funded", "trained"),
+    ("outcome_rate", "outcomes", "funded"),
+)
+_kpi_cache = VersionedCache(maxsize=64)
+_partner_cache = VersionedCache(maxsize=64)
+_anomaly_cache = VersionedCache(maxsize=4)
+_forecast_cache = VersionedCache(maxsize=32)
+_theme_cache = VersionedCache(maxsize=32)
+
+def _report_to_dict(report: MonthlyReport) -> dict:
+    return {
+        "id": report.id,
+        "programme_name": report.programme_name,
+        "focal_department": report.focal_department,
+        "focal_aide_hm": report.focal_aide_hm,
+        "focal_ministry_official": report.focal_ministry_official,
+        "reporting_month": report.reporting_month.isoformat() if report.reporting_month else None,
+        "programme_launch_date": report.programme_launch_date.isoformat() if report.programme_launch_date else None,
+        "total_youth_registered": report.total_youth_registered,
+        "youth_trained": report.youth_trained,
+        "youth_funded": report.youth_funded,
+        "youth_with_outcomes": report.youth_with_outcomes,
+        "partnerships": report.partnerships,
+        "challenges": report.challenges,
+        "mitigation_strategies": report.mitigation_strategies,
+        "scale_up_plans": report.scale_up_plans,
+        "success_story": report.success_story,
+        "submitted_by": report.submitted_by,
+        "created_at": report.created_at.isoformat() if report.created_at else None,
+    }
+
 @router.post("/", response_model=MonthlyReportOut)
-def submit_report(payload: MonthlyReportCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def submit_report(
+    payload: MonthlyReportCreate,
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    return _save_report(payload, idempotency_key, current_user, db)
+
+
+@router.post("/with-attachments")
+async def submit_report_with_attachments(
+    request: Request,
+    idempotency_key: str | None = Header(None, alias=IDEMPOTENCY_HEADER),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Multipart variant of POST /reports/: a JSON `payload` field plus evidence files in `files`."""
+    if idempotency_key:
+        # Answer a retry before receiving its files again.
+        replay = await run_in_threadpool(
+            get_stored_response, db, f"reports.submit:{current_user.id}", idempotency_key
+        )
+        if replay is not None:
+            return replay
+    fields, stored = await receive_upload(request)
+    try:
+        payload = parse_payload_field(MonthlyReportCreate, fields)
+        return await run_in_threadpool(_save_report, payload, idempotency_key, current_user, db, stored)
+    finally:
+        # Drops blobs nothing references after this request: a failed save or a replay.
+        await run_in_threadpool(discard_unreferenced_blobs, stored)
+
+
+@router.post("/{report_id}/attachments")
+async def upload_report_attachments(
+    report_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    report = await run_in_threadpool(db.get, MonthlyReport, report_id)
+    if not report:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+    if current_user.role != "admin" and report.submitted_by != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to attach files to this report")
+    _, stored = await receive_upload(request)
+    try:
+        return await run_in_threadpool(_save_attachments, db, stored, report_id, current_user.id)
+    finally:
+        # Drops blobs nothing references after this request: a failed save or a replay.
+        await run_in_threadpool(discard_unreferenced_blobs, stored)
+
+
+def _save_attachments(db: Session, stored: list[StoredFile], report_id: int, user_id: int) -> list[dict]:
+    try:
+        rows = add_attachments(db, stored, report_id=report_id, uploaded_by=user_id)
+        db.commit()
+    except AttachmentError as exc:
+        db.rollback()
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
+    return [attachment_to_dict(row) for row in rows]
+
+
+def _save_report(
+    payload: MonthlyReportCreate,
+    idempotency_key: str | None,
+    current_user: User,
+    db: Session,
+    attachments: list[StoredFile] | None = None,
+):
+    scope = f"reports.submit:{current_user.id}"
+    if idempotency_key:
+        stored = get_stored_response(db, scope, idempotency_key)
+        if stored is not None:
+            return stored
+
+    # Resubmitting the same programme + month amends the existing report; only its
+    # submitter or an admin may do that.
+    owner = (
+        db.query(MonthlyReport.submitted_by)
+        .filter(
+            MonthlyReport.programme_name == payload.programme_name,
+            MonthlyReport.reporting_month == payload.reporting_month,
+        )
+        .first()
+    )
+    if owner is not None and current_user.role != "admin" and owner.submitted_by != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="A report for this programme and month was submitted by another user",
+        )
+
     try:
         # validate numeric fields are handled by Pydantic
         report_data = payload.dict()
         report_data["submitted_by"] = current_user.id
-        report = MonthlyReport(**report_data)
-        db.add(report)
-        db.commit()
-        db.refresh(report)
-        
-        # Trigger notification to admins (non-blocking, can be async in production)
-        # Wrap in separate try-catch so errors don't prevent report submission
+        before = report_totals(db, report_data["programme_name"], report_data["reporting_month"])
+        report, changed = upsert_report(db, report_data)
+        if changed:
+            bump_version(db, REPORTS_SCOPE)
+        response = _report_to_dict(report)
+        if attachments is not None:
+            rows = add_attachments(db, attachments, report_id=report.id, uploaded_by=current_user.id)
+            response["attachments"] = [attachment_to_dict(row) for row in rows]
+        if changed:
+            publish_report(db, before, report)
+            # Admins see it in their notification feed; committed with the report.
+            notify_report_submitted(db, report)
+        if idempotency_key:
+            store_response(db, scope, idempotency_key, response)
         try:
-            from utils.email import send_email
-            try:
-                admins = db.query(User).filter(User.role == "admin").all()
-                if admins:
-                    for admin in admins:
-                        subject = f"New Report Submitted: {report.programme_name}"
-                        body = f"""Hello Admin,
+            db.commit()
+        except IntegrityError:
+            # A concurrent retry with the same key won the race; replay its response.
+            db.rollback()
+            stored = get_stored_response(db, scope, idempotency_key) if idempotency_key else None
+            if stored is None:
+                raise
+            return stored
 
-A new monthly report has been submitted:
+        return response
+    except AttachmentError as exc:
+        db.rollback()
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
+    except ArchivedYearError as exc:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    except Exception as e:
+        print(f"Error submitting report: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to submit report: {str(e)}"
+        )
 
-Programme: {report.programme_name}
-Department: {report.focal_department}
-Month: {report.reporting_month}
-Youth Registered: {report.total_youth_registered}
-Youth Trained: {report.youth_trained}
+def _notify_import(db: Session, filename: str, result: dict, error: Exception | None = None):
+    """Publish and email one summary for the rows an import committed, even when it stopped early."""
+    # Live dashboards reload once rather than receiving one event per row.
+    publish(db, "reports_changed", {"reason": "import", "rows": result["imported"]})
+    db.commit()
 
-Please review this report and provide feedback if necessary.
+    # One summary notification per import instead of one per row, sent after the response.
+    try:
+        admins = db.query(User).filter(User.role == "admin").all()
+        stopped = f"\nThe import stopped early and the remaining rows were not imported: {error}\n" if error else ""
+        messages = []
+        for admin in admins:
+            subject = f"Bulk Report Import: {result['imported']} report(s) added"
+            body = f"""Hello Admin,
 
-Admin Dashboard: http://localhost:8000/admin.html
+A bulk import of monthly reports has completed:
 
+File: {filename}
+Rows processed: {result['total_rows']}
+Reports imported: {result['imported']}
+Rows rejected: {result['failed']}
+{stopped}
 Thank you!"""
-                        sent, error = send_email(admin.email, subject, body)
-                        if not sent:
-                            print(f"Failed to send notification to admin {admin.email}: {error}")
-            except Exception as e:
-                print(f"Error querying admins: {e}")
-        except Exception as e:
-            print(f"Error in notification process: {e}")
-        
-        return report
+            messages.append((admin.email, subject, body))
+        queue_emails(messages, "import summary")
     except Exception as e:
-        print(f"Error submitting report: {e}")
-        raise HTTPException(
+        print(f"Error in import notification process: {e}")
+
+
+@router.post("/import")
+def import_reports_file(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin),
+):
+    error = None
+    try:
+        rows = iter_rows(file.file, file.filename)
+        result = import_reports(db, rows, submitted_by=admin_user.id, dry_run=dry_run)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    except ImportInterrupted as exc:
+        # Chunks committed before the failure stay imported; report and announce them.
+        result, error = exc.result, exc.error
+
+    if result["imported"] and not dry_run:
+        _notify_import(db, file.filename, result, error)
+
+    if isinstance(error, ValueError):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(error), **result}
+        )
+    if error is not None:
+        print(f"Error importing reports: {error}")
+        return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to submit report: {str(e)}"
+            content={"detail": f"Failed to import reports: {str(error)}", **result},
         )
+    return result
 
-@router.get("/")
-def list_reports(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    if current_user.role == "admin":
-        reports = db.query(MonthlyReport).order_by(MonthlyReport.created_at.desc()).all()
-    else:
-        reports = db.query(MonthlyReport).filter(MonthlyReport.submitted_by == current_user.id).order_by(MonthlyReport.created_at.desc()).all()
+REPORT_COLUMNS = (
+    "id",
+    "programme_name",
+    "focal_department",
+    "focal_aide_hm",
+    "focal_ministry_official",
+    "reporting_month",
+    "programme_launch_date",
+    "total_youth_registered",
+    "youth_trained",
+    "youth_funded",
+    "youth_with_outcomes",
+    "partnerships",
+    "challenges",
+    "mitigation_strategies",
+    "scale_up_plans",
+    "success_story",
+    "submitted_by",
+    "created_at",
+)
+
+@router.get("/", response_class=RawJSONResponse)
+def list_reports(
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    # Plain column tuples skip ORM object construction; encoding happens once in orjson.
+    source = report_source(include_archive=include_archived)
+    query = select(*[source.c[name] for name in REPORT_COLUMNS])
+    if current_user.role != "admin":
+        query = query.where(source.c.submitted_by == current_user.id)
+    reports = db.execute(query.order_by(source.c.created_at.desc())).all()
+    if include_archived:
+        # Years archived to Parquet live outside the database.
+        for row in iter_parquet_rows("monthly_reports"):
+            if current_user.role == "admin" or row.get("submitted_by") == current_user.id:
+                reports.append(tuple(row.get(name) for name in REPORT_COLUMNS))
     if reports:
-        return reports
+        return RawJSONResponse(content=encode_rows(REPORT_COLUMNS, reports))
 
     submissions = (
-        db.query(FormSubmission)
+        db.query(FormSubmission.id, FormSubmission.form_data, FormSubmission.submitted_at)
         .order_by(FormSubmission.submitted_at.desc())
         .all()
     )
     fallback = []
-    for submission in submissions:
+    for submission_id, form_data, submitted_at in submissions:
         try:
-            data = json.loads(submission.form_data)
+            data = json.loads(form_data)
         except Exception:
             data = {}
         fallback.append(
-            {
-                "id": submission.id,
-                "programme_name": data.get("programme_name") or "",
-                "focal_department": data.get("focal_department"),
-                "focal_aide_hm": data.get("focal_aide_hm"),
-                "focal_ministry_official": data.get("focal_ministry_official"),
-                "reporting_month": data.get("reporting_month"),
-                "programme_launch_date": data.get("programme_launch_date"),
-                "total_youth_registered": data.get("total_youth_registered") or 0,
-                "youth_trained": data.get("youth_trained") or 0,
-                "youth_funded": data.get("youth_funded") or 0,
-                "youth_with_outcomes": data.get("youth_with_outcomes") or 0,
-                "partnerships": data.get("partnerships"),
-                "challenges": data.get("challenges"),
-                "mitigation_strategies": data.get("mitigation_strategies"),
-                "scale_up_plans": data.get("scale_up_plans"),
-                "success_story": data.get("success_story"),
-                "submitted_by": None,
-                "created_at": submission.submitted_at.isoformat() if submission.submitted_at else None,
-            }
+            (
+                submission_id,
+                data.get("programme_name") or "",
+                data.get("focal_department"),
+                data.get("focal_aide_hm"),
+                data.get("focal_ministry_official"),
+                data.get("reporting_month"),
+                data.get("programme_launch_date"),
+                data.get("total_youth_registered") or 0,
+                data.get("youth_trained") or 0,
+                data.get("youth_funded") or 0,
+                data.get("youth_with_outcomes") or 0,
+                data.get("partnerships"),
+                data.get("challenges"),
+                data.get("mitigation_strategies"),
+                data.get("scale_up_plans"),
+                data.get("success_story"),
+                None,
+                submitted_at,
+            )
         )
-    return fallback
+    return RawJSONResponse(content=encode_rows(REPORT_COLUMNS, fallback))
+
+DASHBOARD_COLUMNS = ("total_youth_registered", "youth_trained", "youth_funded", "youth_with_outcomes")
+
 
 @router.get("/dashboard", response_model=DashboardResponse)
-def dashboard(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
-    reports = db.query(MonthlyReport).all()
-    if reports:
-        total_registered = sum(r.total_youth_registered for r in reports)
-        total_trained = sum(r.youth_trained for r in reports)
-        total_funded = sum(r.youth_funded for r in reports)
-        total_outcomes = sum(r.youth_with_outcomes for r in reports)
-        total_reports = len(reports)
+def dashboard(db: Session = Depends(get_read_db), admin_user=Depends(require_admin)):
+    # Lifetime totals span hot and archived reports.
+    reports = report_source()
+    totals = db.execute(
+        select(
+            func.count(),
+            *[func.coalesce(func.sum(reports.c[column]), 0) for column in DASHBOARD_COLUMNS],
+        ).select_from(reports)
+    ).one()
+    totals = [int(value) for value in totals]
+    # Years archived to Parquet live outside the database.
+    for row in parquet_rows("monthly_reports"):
+        totals[0] += 1
+        for index, column in enumerate(DASHBOARD_COLUMNS, start=1):
+            totals[index] += int(row.get(column) or 0)
+    if totals[0]:
+        total_reports, total_registered, total_trained, total_funded, total_outcomes = totals
     else:
         submissions = db.query(FormSubmission).all()
         total_registered = 0
@@ -137,3 +402,313 @@ def dashboard(db: Session = Depends(get_db), admin_user=Depends(require_admin)):
         "total_youth_with_outcomes": total_outcomes,
         "total_reports": total_reports,
     }
+
+
+def _kpi_query(programme: str | None, start_month: date | None, end_month: date | None, reports=None, programmes=None):
+    # Archived years are included so cumulative totals start from the first report.
+    reports = report_source() if reports is None else reports
+    programmes = Programme.__table__ if programmes is None else programmes
+    department = func.coalesce(func.nullif(programmes.c.department, ""), reports.c.focal_department, "")
+    monthly = (
+        select(
+            reports.c.programme_name.label("programme_name"),
+            func.max(department).label("department"),
+            reports.c.reporting_month.label("month"),
+            *[func.sum(reports.c[column]).label(name) for name, column in KPI_METRICS],
+        )
+        .select_from(reports)
+        .outerjoin(programmes, programmes.c.name == reports.c.programme_name)
+        .group_by(reports.c.programme_name, reports.c.reporting_month)
+        .subquery("monthly")
+    )
+
+    by_programme = {"partition_by": monthly.c.programme_name, "order_by": monthly.c.month}
+    windows = []
+    for name, _ in KPI_METRICS:
+        metric = monthly.c[name]
+        windows.append((metric - func.lag(metric).over(**by_programme)).label(f"{name}_change"))
+        windows.append(func.sum(metric).over(rows=(None, 0), **by_programme).label(f"cumulative_{name}"))
+    windows.append(
+        func.rank()
+        .over(partition_by=(monthly.c.department, monthly.c.month), order_by=monthly.c.registered.desc())
+        .label("department_rank")
+    )
+    # Windows run over the full history so filters below do not reset deltas, totals or ranks.
+    windowed = select(monthly, *windows).subquery("windowed")
+
+    rates = [
+        (cast(windowed.c[numerator], Float(precision=53)) * 100 / func.nullif(windowed.c[denominator], 0)).label(name)
+        for name, numerator, denominator in KPI_RATES
+    ]
+    query = select(windowed, *rates).order_by(windowed.c.programme_name, windowed.c.month)
+    if programme:
+        query = query.where(windowed.c.programme_name == programme)
+    if start_month:
+        query = query.where(windowed.c.month >= start_month)
+    if end_month:
+        query = query.where(windowed.c.month <= end_month)
+    return query
+
+
+_KPI_REPORT_COLUMNS = [
+    ("programme_name", "string"),
+    ("focal_department", "string"),
+    ("reporting_month", "date32"),
+    *[(column, "int64") for _, column in KPI_METRICS],
+]
+_KPI_PROGRAMME_COLUMNS = [("name", "string"), ("department", "string")]
+
+
+def _kpi_rows_with_parquet(db: Session, programme: str | None, start_month: date | None, end_month: date | None):
+    """_kpi_query run in DuckDB, for when some years are archived to Parquet files the
+    database cannot join against: the same window SQL over the database's reports and
+    programmes plus those files."""
+    reports = report_source()
+    names = [name for name, _ in _KPI_REPORT_COLUMNS]
+    query = _kpi_query(
+        programme,
+        start_month,
+        end_month,
+        table("kpi_reports", *[column(name) for name in names]),
+        table("kpi_programmes", *[column(name) for name, _ in _KPI_PROGRAMME_COLUMNS]),
+    )
+    return run_in_duckdb(
+        query,
+        {
+            "kpi_reports": (db.execute(select(*[reports.c[name] for name in names])).all(), _KPI_REPORT_COLUMNS),
+            "kpi_programmes": (db.query(Programme.name, Programme.department).all(), _KPI_PROGRAMME_COLUMNS),
+        },
+        parquet={"kpi_reports": parquet_files("monthly_reports")},
+    )
+
+
+def _optional_int(value):
+    return int(value) if value is not None else None
+
+
+@router.get("/kpis")
+def kpis(
+    programme: str | None = None,
+    start_month: date | None = None,
+    end_month: date | None = None,
+    db: Session = Depends(get_read_db),
+    admin_user=Depends(require_admin),
+):
+    version = get_version(db, REPORTS_SCOPE)
+    cache_key = (programme, start_month, end_month)
+    cached = _kpi_cache.get(version, cache_key)
+    if cached is not None:
+        return cached
+
+    if parquet_files("monthly_reports"):
+        try:
+            rows = _kpi_rows_with_parquet(db, programme, start_month, end_month)
+        except AnalyticsError as exc:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc))
+    else:
+        rows = (row._mapping for row in db.execute(_kpi_query(programme, start_month, end_month)))
+    result = []
+    for row in rows:
+        item = {
+            "programme_name": row["programme_name"],
+            "department": row["department"] or None,
+            "reporting_month": row["month"].isoformat() if row["month"] else None,
+        }
+        for name, _ in KPI_METRICS:
+            item[name] = int(row[name] or 0)
+            item[f"{name}_change"] = _optional_int(row[f"{name}_change"])
+            item[f"cumulative_{name}"] = int(row[f"cumulative_{name}"] or 0)
+        for name, _, _ in KPI_RATES:
+            item[name] = round(float(row[name]), 2) if row[name] is not None else None
+        item["department_rank"] = int(row["department_rank"])
+        result.append(item)
+
+    _kpi_cache.set(version, cache_key, result)
+    return result
+
+
+@router.get("/partners")
+def partners(
+    programme: str | None = None,
+    start_month: date | None = None,
+    end_month: date | None = None,
+    include_archived: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    # Partner rows are parsed once per write (utils/partners.py); this only aggregates them.
+    submitted_by = None if current_user.role == "admin" else current_user.id
+    version = get_version(db, REPORTS_SCOPE)
+    cache_key = (programme, start_month, end_month, include_archived, submitted_by)
+    cached = _partner_cache.get(version, cache_key)
+    if cached is not None:
+        return cached
+    result = partner_summary(db, programme, start_month, end_month, include_archived, submitted_by)
+    _partner_cache.set(version, cache_key, result)
+    return result
+
+
+@router.get("/anomalies")
+def anomalies(
+    programme: str | None = None,
+    start_month: date | None = None,
+    end_month: date | None = None,
+    db: Session = Depends(get_read_db),
+    admin_user=Depends(require_admin),
+):
+    # The scan always covers the full history (each programme is judged against its own
+    # past figures); the filters only narrow which flagged reports are returned.
+    version = get_version(db, REPORTS_SCOPE)
+    flagged = _anomaly_cache.get(version, "all")
+    if flagged is None:
+        # The numpy-backed analysis modules load on first use, not at worker boot.
+        from utils.anomalies import scan_reports
+
+        flagged = scan_reports(db)
+        _anomaly_cache.set(version, "all", flagged)
+    if programme:
+        flagged = [item for item in flagged if item["programme_name"] == programme]
+    if start_month:
+        flagged = [item for item in flagged if item["reporting_month"] >= start_month.isoformat()]
+    if end_month:
+        flagged = [item for item in flagged if item["reporting_month"] <= end_month.isoformat()]
+    return flagged
+
+
+@router.get("/forecast")
+def forecast(
+    year: int | None = None,
+    horizon: int = 6,
+    programme: str | None = None,
+    db: Session = Depends(get_read_db),
+    admin_user=Depends(require_admin),
+):
+    from utils.forecast import FORECAST_MAX_HORIZON, build_forecast
+
+    if not 1 <= horizon <= FORECAST_MAX_HORIZON:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"horizon must be between 1 and {FORECAST_MAX_HORIZON} months",
+        )
+    year = year or date.today().year
+    # Targets live on programmes, so both data versions key the cache.
+    version = (get_version(db, REPORTS_SCOPE), get_version(db, PROGRAMMES_SCOPE))
+    cache_key = (year, horizon, programme)
+    cached = _forecast_cache.get(version, cache_key)
+    if cached is not None:
+        return cached
+    result = build_forecast(db, year, horizon, programme)
+    _forecast_cache.set(version, cache_key, result)
+    return result
+
+
+@router.get("/challenge-themes")
+def challenge_themes(
+    programme: str | None = None,
+    start_month: date | None = None,
+    end_month: date | None = None,
+    db: Session = Depends(get_read_db),
+    admin_user=Depends(require_admin),
+):
+    version = (get_version(db, REPORTS_SCOPE), get_version(db, THEMES_SCOPE))
+    cache_key = (programme, start_month, end_month)
+    cached = _theme_cache.get(version, cache_key)
+    if cached is not None:
+        return cached
+    from utils.themes import theme_summary
+
+    result = theme_summary(db, programme, start_month, end_month)
+    _theme_cache.set(version, cache_key, result)
+    return result
+
+
+@router.post("/challenge-themes/refresh", status_code=status.HTTP_202_ACCEPTED)
+def refresh_challenge_themes(
+    background_tasks: BackgroundTasks,
+    refit: bool = False,
+    db: Session = Depends(get_db),
+    admin_user=Depends(require_admin),
+):
+    from utils.themes import pending_count, run_theme_update
+
+    # New reports are folded into the existing themes; refit=true rebuilds them from scratch.
+    background_tasks.add_task(run_theme_update, refit)
+    return {"status": "scheduled", "refit": refit, "pending": pending_count(db)}
+
+
+@router.get("/archive")
+def archive_status(db: Session = Depends(get_read_db), admin_user=Depends(require_admin)):
+    return archive_summary(db)
+
+
+@router.post("/archive/run")
+def archive_closed_years(
+    keep_years: int | None = None,
+    backend: str | None = None,
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    admin_user=Depends(require_admin),
+):
+    kwargs = {"dry_run": dry_run}
+    if keep_years is not None:
+        kwargs["keep_years"] = keep_years
+    if backend:
+        kwargs["backend"] = backend.lower()
+    try:
+        result = run_archive(db, **kwargs)
+        if result["years"] and not dry_run:
+            publish(db, "reports_changed", {"reason": "archive", "years": sorted(result["years"])})
+            db.commit()
+        return result
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    except Exception as exc:
+        db.rollback()
+        print(f"Error archiving reports: {exc}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to archive reports: {str(exc)}"
+        )
+
+
+_BRIEFING_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _briefing_response(job: dict) -> JSONResponse:
+    if job["status"] == "done":
+        job = {**job, "links": {fmt: f"/reports/briefings/{job['job_id']}/{fmt}" for fmt in BRIEFING_FORMATS}}
+    return JSONResponse(status_code=status.HTTP_200_OK if job["status"] == "done" else status.HTTP_202_ACCEPTED, content=job)
+
+
+@router.post("/briefings")
+def create_briefing(payload: BriefingRequest, db: Session = Depends(get_read_db), admin_user=Depends(require_admin)):
+    """Render (or reuse) a monthly briefing. Poll GET /reports/briefings/{job_id} until it is done."""
+    if payload.programme and payload.programme not in {p.name for p in registry.all(db)}:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Programme not found")
+    try:
+        job = request_briefing(db, date.fromisoformat(payload.month), payload.programme)
+    except Exception as exc:
+        print(f"Error starting briefing: {exc}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start briefing: {str(exc)}"
+        )
+    return _briefing_response(job)
+
+
+@router.get("/briefings/{job_id}")
+def briefing_status(job_id: str, admin_user=Depends(require_admin)):
+    job = job_status(job_id) if _BRIEFING_JOB_ID.match(job_id) else None
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Briefing job not found")
+    return _briefing_response(job)
+
+
+@router.get("/briefings/{job_id}/{fmt}")
+def download_briefing(job_id: str, fmt: str, admin_user=Depends(require_admin)):
+    job = job_status(job_id) if _BRIEFING_JOB_ID.match(job_id) and fmt in BRIEFING_FORMATS else None
+    if job is None or job["status"] != "done":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Briefing not available")
+    name = f"briefing-{job['month']}" + (f"-{job['programme']}" if job.get("programme") else "")
+    media_type = "application/pdf" if fmt == "pdf" else "text/html"
+    return FileResponse(output_path(job_id, fmt), media_type=media_type, filename=f"{name}.{fmt}")
@@ -23,6 +23,9 @@ class ProgrammeOut(BaseModel):
     department: str
     description: Optional[str] = None
     recipient_email: Optional[EmailStr] = None
+    target_registered: Optional[int] = None
+    target_trained: Optional[int] = None
+    target_funded: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -30,6 +33,10 @@ class ProgrammeOut(BaseModel):
 class ProgrammeUpdate(BaseModel):
     description: Optional[str] = None
     recipient_email: EmailStr
+    # Annual targets; fields left out of the request keep their current value.
+    target_registered: Optional[int] = Field(None, ge=0)
+    target_trained: Optional[int] = Field(None, ge=0)
+    target_funded: Optional[int] = Field(None, ge=0)
 
 class FormLinkRequest(BaseModel):
     programme_id: int = Field(..., ge=1)
@@ -52,6 +59,11 @@ class PublicFormSubmission(BaseModel):
     scale_up_plans: Optional[str]
     success_story: Optional[str]
 
+    @validator("reporting_month")
+    def month_start(cls, v):
+        # One report per programme and month: any day in the month means that month.
+        return v.replace(day=1)
+
     @validator("youth_trained")
     def check_trained_not_more_than_registered(cls, v, values):
         if "total_youth_registered" in values and v > values["total_youth_registered"]:
@@ -85,6 +97,11 @@ class MonthlyReportCreate(BaseModel):
     scale_up_plans: Optional[str]
     success_story: Optional[str]
 
+    @validator("reporting_month")
+    def month_start(cls, v):
+        # One report per programme and month: any day in the month means that month.
+        return v.replace(day=1)
+
     @validator("youth_trained")
     def check_trained_not_more_than_registered(cls, v, values):
         if "total_youth_registered" in values and v > values["total_youth_registered"]:
@@ -93,7 +110,7 @@ class MonthlyReportCreate(BaseModel):
 
 class MonthlyReportOut(MonthlyReportCreate):
     id: int
-    submitted_by: Optional[str]
+    submitted_by: Optional[int]
     created_at: Optional[str]
 
     class Config:
@@ -106,3 +123,22 @@ class DashboardResponse(BaseModel):
     total_youth_funded: int
     total_youth_with_outcomes: int
     total_reports: int
+
+class BriefingRequest(BaseModel):
+    # "YYYY-MM" (or any date in the month)
+    month: str
+    # Omit for a ministry-wide briefing
+    programme: Optional[str] = None
+
+    @validator("month")
+    def parse_month(cls, v):
+        try:
+            parsed = date.fromisoformat(v if len(v) > 7 else f"{v}-01")
+        except ValueError:
+            raise ValueError("month must be formatted as YYYY-MM")
+        return parsed.replace(day=1).isoformat()
+
+class NotificationReadRequest(BaseModel):
+    # Mark these notifications (ids) read, or everything up to and including seq `up_to`.
+    ids: Optional[List[int]] = None
+    up_to: Optional[int] = None
@@ -0,0 +1,52 @@
+"""Archive closed reporting years out of the hot tables
+
+- Years older than ARCHIVE_KEEP_YEARS (counting the current year) are closed
+- Moves monthly_reports and form_submissions rows in batches of ARCHIVE_BATCH_SIZE,
+  one transaction per batch, into the *_archive tables or zstd-compressed Parquet files
+  under ARCHIVE_DIR
+- Dashboards, KPIs, form compliance and the submission summary keep reading archived data
+  from both backends; /reports/ and /forms/admin/submissions list it with include_archived=true
+- Archived years are read-only: report submissions and imports into them are rejected
+
+Run: python scripts/archive_reports.py [--keep-years 2] [--backend table|parquet] [--dry-run]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+from database import SessionLocal
+from utils.archive import ARCHIVE_BACKEND, ARCHIVE_KEEP_YEARS, run_archive
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed reporting years")
+    parser.add_argument("--keep-years", type=int, default=ARCHIVE_KEEP_YEARS)
+    parser.add_argument("--backend", choices=("table", "parquet"), default=ARCHIVE_BACKEND)
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = run_archive(db, keep_years=args.keep_years, backend=args.backend, dry_run=args.dry_run)
+        if not result["years"]:
+            print(f"Nothing to archive up to {result['cutoff_year']}.")
+        for year, counts in result["years"].items():
+            action = "Would archive" if args.dry_run else "Archived"
+            print(
+                f"{action} {year}: {counts['monthly_reports']} report(s), "
+                f"{counts['form_submissions']} submission(s) -> {result['backend']}"
+            )
+    except Exception as exc:
+        print("Error while archiving:", exc, file=sys.stderr)
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Backfill the report_partners index from existing reports
+
+- New and amended reports are indexed on write; run this once after upgrading, or after
+  changing the partner categories in utils/partners.py (scripts/migrate.py also
+  re-categorises already indexed partners when the schema version is bumped)
+- Re-parses hot and archived reports (archive table and Parquet files) in batches,
+  one transaction per batch; safe to run repeatedly
+
+Run: python scripts/backfill_partners.py [--batch-size 1000]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+from types import SimpleNamespace
+from sqlalchemy import select
+from database import SessionLocal
+from utils.archive import iter_parquet_rows, report_source
+from utils.data_version import REPORTS_SCOPE, bump_version
+from utils.partners import replace_partners
+
+
+def _parquet_reports():
+    for row in iter_parquet_rows("monthly_reports"):
+        yield SimpleNamespace(
+            id=row["id"],
+            programme_name=row["programme_name"],
+            reporting_month=row["reporting_month"],
+            partnerships=row.get("partnerships"),
+        )
+
+
+def _flush(db, batch) -> int:
+    count = replace_partners(db, batch)
+    # Cached /reports/partners results are keyed on the reports data version.
+    bump_version(db, REPORTS_SCOPE)
+    db.commit()
+    return count
+
+
+def backfill(db, batch_size: int) -> tuple[int, int]:
+    reports = report_source()
+    columns = (reports.c.id, reports.c.programme_name, reports.c.reporting_month, reports.c.partnerships)
+    total_reports = total_partners = 0
+    last_id = 0
+    while True:
+        batch = db.execute(
+            select(*columns).where(reports.c.id > last_id).order_by(reports.c.id).limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        total_partners += _flush(db, batch)
+        total_reports += len(batch)
+        last_id = batch[-1].id
+        print(f"Indexed {total_reports} report(s), {total_partners} partner(s)")
+
+    # Years archived to Parquet live outside the database.
+    batch = []
+    for report in _parquet_reports():
+        batch.append(report)
+        if len(batch) >= batch_size:
+            total_partners += _flush(db, batch)
+            total_reports += len(batch)
+            batch = []
+    if batch:
+        total_partners += _flush(db, batch)
+        total_reports += len(batch)
+    return total_reports, total_partners
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the report_partners index")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        reports, partners = backfill(db, args.batch_size)
+        print(f"Done: {reports} report(s), {partners} partner(s) indexed.")
+    except Exception as exc:
+        print("Error while backfilling partners:", exc, file=sys.stderr)
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
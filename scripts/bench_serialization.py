@@ -0,0 +1,145 @@
+"""Serialization benchmark for the large list endpoints
+
+- Builds an in-memory SQLite database with N monthly reports and form submissions
+- Times the previous path (ORM objects / dicts + json.loads + Pydantic + jsonable_encoder)
+  against the column-tuple + orjson path used by /reports/ and /forms/admin/submissions
+- Reports wall time and peak traced memory per run
+
+Run: python scripts/bench_serialization.py [--rows 10000]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import date, datetime
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database import Base
+from models import FormSubmission, MonthlyReport
+from schemas import FormSubmissionOut
+from reports import REPORT_COLUMNS
+from forms import SUBMISSION_COLUMNS
+from utils.responses import encode_rows
+
+
+def _report_values(i: int) -> dict:
+    return {
+        "programme_name": f"Programme {i % 40}",
+        "focal_department": "Youth Development",
+        "focal_aide_hm": "Aide HM Example",
+        "focal_ministry_official": "Ministry Official Name",
+        "reporting_month": date(2000 + i // 480, (i // 40) % 12 + 1, 1),
+        "programme_launch_date": date(2020, 1, 1),
+        "total_youth_registered": 120 + i % 50,
+        "youth_trained": 95,
+        "youth_funded": 40,
+        "youth_with_outcomes": 30,
+        "partnerships": "Local NGOs, Private sector partners",
+        "challenges": "Limited transport, occasional funding delays",
+        "mitigation_strategies": "Allocate travel stipends, diversify funding sources",
+        "scale_up_plans": "Pilot to 3 more states next quarter",
+        "success_story": "Several youths started micro-enterprises after training",
+        "created_at": datetime(2026, 1, 1, 12, 0, 0),
+    }
+
+
+def _seed(db, rows: int):
+    reports = [_report_values(i) for i in range(rows)]
+    db.execute(MonthlyReport.__table__.insert(), reports)
+    db.execute(
+        FormSubmission.__table__.insert(),
+        [
+            {
+                "programme_id": i % 40 + 1,
+                "recipient_email": f"focal{i % 40}@example.com",
+                "form_data": json.dumps(report, default=str),
+                "submitted_at": report["created_at"],
+            }
+            for i, report in enumerate(reports)
+        ],
+    )
+    db.commit()
+
+
+def _old_reports(db) -> bytes:
+    reports = db.query(MonthlyReport).order_by(MonthlyReport.created_at.desc()).all()
+    return json.dumps(jsonable_encoder(reports)).encode("utf-8")
+
+
+def _new_reports(db) -> bytes:
+    rows = db.query(*[getattr(MonthlyReport, name) for name in REPORT_COLUMNS]).order_by(
+        MonthlyReport.created_at.desc()
+    ).all()
+    return encode_rows(REPORT_COLUMNS, rows)
+
+
+def _old_submissions(db) -> bytes:
+    submissions = db.query(FormSubmission).order_by(FormSubmission.submitted_at.desc()).all()
+    response = [
+        {
+            "id": s.id,
+            "programme_id": s.programme_id,
+            "recipient_email": s.recipient_email,
+            "form_data": json.loads(s.form_data),
+            "submitted_at": s.submitted_at.isoformat() if s.submitted_at else None,
+        }
+        for s in submissions
+    ]
+    validated = [FormSubmissionOut(**item) for item in response]
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def _new_submissions(db) -> bytes:
+    rows = db.query(*[getattr(FormSubmission, name) for name in SUBMISSION_COLUMNS]).order_by(
+        FormSubmission.submitted_at.desc()
+    ).all()
+    return encode_rows(SUBMISSION_COLUMNS, rows, raw_json_columns=("form_data",))
+
+
+def _measure(label: str, fn, db, rows: int, repeat: int):
+    best = None
+    for _ in range(repeat):
+        db.expunge_all()
+        start = time.perf_counter()
+        fn(db)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    db.expunge_all()
+    tracemalloc.start()
+    body = fn(db)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_10k = 10000 / rows
+    print(
+        f"{label:<28} {best * 1000 * per_10k:9.1f} ms/10k  "
+        f"{peak / 1024 / 1024 * per_10k:8.1f} MiB peak/10k  {len(body) / 1024:9.0f} KiB body"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    _seed(db, args.rows)
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    _measure("reports: ORM + encoder", _old_reports, db, args.rows, args.repeat)
+    _measure("reports: tuples + orjson", _new_reports, db, args.rows, args.repeat)
+    _measure("submissions: dict + pydantic", _old_submissions, db, args.rows, args.repeat)
+    _measure("submissions: tuples + raw", _new_submissions, db, args.rows, args.repeat)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
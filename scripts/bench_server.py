@@ -0,0 +1,215 @@
+"""Throughput benchmark: server.py against the previous single-process Procfile command
+
+- Migrates a temporary SQLite database, seeds a year of reports, then starts each server
+  setup in turn on a free local port
+- "procfile" is the old `uvicorn main:app --host 0.0.0.0 --port $PORT`; "server" is
+  `python server.py` (WEB_CONCURRENCY workers, uvloop/httptools, sized thread/DB pools)
+- Load comes from separate client processes hitting a read-heavy admin mix (/health,
+  /programmes/, /reports/dashboard, /reports/kpis, /notifications/unread-count) with a
+  logged-in admin session
+- Reports requests/s, p50/p95/p99 latency and non-2xx responses per setup, alternating
+  the order each round; run the clients on a separate machine for multi-core numbers
+- Use --database-url to point both at a PostgreSQL database for production-like numbers
+
+Run: python scripts/bench_server.py [--seconds 15] [--concurrency 64] [--workers 4] [--rounds 2]
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+import httpx
+
+PATHS = (
+    "/health",
+    "/programmes/",
+    "/reports/dashboard",
+    "/reports/kpis",
+    "/notifications/unread-count",
+)
+BYPASS_KEY = "bench-key"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{base_url} did not become ready within {timeout:.0f}s")
+
+
+def _login(base_url: str) -> dict:
+    response = httpx.get(f"{base_url}/auth/admin-bypass", params={"key": BYPASS_KEY}, timeout=10)
+    response.raise_for_status()
+    return dict(response.cookies)
+
+
+def _seed(base_url: str, cookies: dict, programmes: int = 10, months: int = 12) -> None:
+    with httpx.Client(base_url=base_url, cookies=cookies, timeout=30) as client:
+        names = [programme["name"] for programme in client.get("/programmes/").json()[:programmes]]
+        for name in names:
+            for month in range(1, months + 1):
+                client.post(
+                    "/reports/",
+                    json={
+                        "programme_name": name,
+                        "focal_department": "Youth Development",
+                        "focal_aide_hm": None,
+                        "focal_ministry_official": None,
+                        "reporting_month": f"2025-{month:02d}-01",
+                        "programme_launch_date": None,
+                        "total_youth_registered": 100 + month,
+                        "youth_trained": 80,
+                        "youth_funded": 30,
+                        "youth_with_outcomes": 20,
+                        "partnerships": "Local NGOs",
+                        "challenges": "Transport costs and delayed funding",
+                        "mitigation_strategies": None,
+                        "scale_up_plans": None,
+                        "success_story": None,
+                    },
+                ).raise_for_status()
+
+
+async def _client_loop(base_url: str, cookies: dict, concurrency: int, seconds: float) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, cookies=cookies, limits=limits, timeout=30) as client:
+
+        async def user(offset: int):
+            nonlocal errors
+            index = offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(PATHS[index % len(PATHS)])
+                    if response.status_code >= 300:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+                index += 1
+
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def _client_process(args) -> tuple[list[float], int]:
+    return asyncio.run(_client_loop(*args))
+
+
+def run_load(base_url: str, cookies: dict, concurrency: int, seconds: float, clients: int) -> dict:
+    per_client = max(1, concurrency // clients)
+    with multiprocessing.get_context("spawn").Pool(clients) as pool:
+        results = pool.map(_client_process, [(base_url, cookies, per_client, seconds)] * clients)
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / seconds,
+        "p50": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "errors": errors,
+    }
+
+
+def _start(setup: str, port: int, env: dict) -> subprocess.Popen:
+    if setup == "procfile":
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--no-access-log"]
+    else:
+        command = [sys.executable, "server.py"]
+    return subprocess.Popen(
+        command, cwd=ROOT, env={**env, "PORT": str(port), "HOST": "127.0.0.1"},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare server.py throughput with the old Procfile command")
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent connections across all clients")
+    parser.add_argument("--clients", type=int, default=4, help="Load generator processes")
+    parser.add_argument("--rounds", type=int, default=2, help="Runs per setup, alternating which goes first")
+    parser.add_argument("--workers", type=int, default=None, help="WEB_CONCURRENCY for server.py (default: CPU cores)")
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "ADMIN_EMAIL": "bench-admin@example.com",
+            "ADMIN_BYPASS_KEY": BYPASS_KEY,
+            "EMAIL_BACKEND": "console",
+            "RATE_LIMIT_ENABLED": "false",
+            "SERVER_ACCESS_LOG": "false",
+            "MIGRATE_ON_STARTUP": "false",
+        }
+        if args.workers:
+            env["WEB_CONCURRENCY"] = str(args.workers)
+        subprocess.run([sys.executable, os.path.join("scripts", "migrate.py")], cwd=ROOT, env=env, check=True, capture_output=True)
+
+        seeded = False
+        results: dict[str, list[dict]] = {"procfile": [], "server": []}
+        for round_index in range(args.rounds):
+            # Alternate the order: whichever setup runs second meets a warmer, busier host.
+            order = ("procfile", "server") if round_index % 2 == 0 else ("server", "procfile")
+            for setup in order:
+                port = _free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                process = _start(setup, port, env)
+                try:
+                    _wait_ready(base_url)
+                    cookies = _login(base_url)
+                    if not seeded:
+                        _seed(base_url, cookies)
+                        seeded = True
+                    # Warm every worker's caches before measuring.
+                    run_load(base_url, cookies, args.concurrency, 2, args.clients)
+                    result = run_load(base_url, cookies, args.concurrency, args.seconds, args.clients)
+                finally:
+                    process.terminate()
+                    process.wait(timeout=60)
+                results[setup].append(result)
+                print(
+                    f"round {round_index + 1} {setup:>8}: {result['rps']:8.0f} req/s  p50 {result['p50']:6.1f} ms  "
+                    f"p95 {result['p95']:6.1f} ms  p99 {result['p99']:6.1f} ms  "
+                    f"({result['requests']} requests, {result['errors']} errors)"
+                )
+
+    rps = {setup: statistics.median(run["rps"] for run in runs) for setup, runs in results.items()}
+    for setup in ("procfile", "server"):
+        p95 = statistics.median(run["p95"] for run in results[setup])
+        print(f"{setup:>8}: median {rps[setup]:8.0f} req/s, p95 {p95:6.1f} ms over {args.rounds} round(s)")
+    if rps["procfile"]:
+        print(f"server.py throughput: {rps['server'] / rps['procfile']:.2f}x the Procfile setup")
+
+if __name__ == "__main__":
+    main()
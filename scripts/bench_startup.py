@@ -0,0 +1,115 @@
+"""Worker startup benchmark
+
+- Import time: starts fresh interpreters that `import main` and reports the median wall
+  time, plus the slowest modules from `python -X importtime`
+- Startup time: runs the app's startup hooks against a migrated temporary SQLite database
+  (the per-worker phase only) and times the first GET /ready, which warms the caches
+- Compare runs before and after a change; numpy/scipy/duckdb/pyarrow should not appear in
+  the import list
+
+Run: python scripts/bench_startup.py [--runs 5] [--top 15]
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+
+HEAVY_MODULES = ("numpy", "scipy", "duckdb", "pyarrow")
+
+
+def _env(database_url: str) -> dict:
+    return {**os.environ, "DATABASE_URL": database_url, "PYTHONDONTWRITEBYTECODE": "1"}
+
+
+def time_imports(runs: int, env: dict) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import main"], cwd=ROOT, env=env, check=True)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def slowest_imports(env: dict, top: int) -> tuple[list[tuple[int, str]], list[str]]:
+    """(cumulative microseconds, module) for the slowest top-level imports, and any heavy
+    optional modules that got imported."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stderr
+    rows, heavy = [], set()
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        module = name.strip()
+        if module.split(".")[0] in HEAVY_MODULES:
+            heavy.add(module.split(".")[0])
+        # Depth is the indentation; only direct imports of main and its siblings.
+        if len(name) - len(name.lstrip()) <= 3:
+            rows.append((int(cumulative), module))
+    return sorted(rows, reverse=True)[:top], sorted(heavy)
+
+
+STARTUP_PROBE = """
+import time
+from fastapi.testclient import TestClient
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+with TestClient(main.app) as client:
+    booted = time.perf_counter()
+    response = client.get("/ready")
+    ready = time.perf_counter()
+    assert response.status_code == 200, response.text
+print(f"{imported - started:.4f} {booted - imported:.4f} {ready - booted:.4f}")
+"""
+
+
+def time_startup(runs: int, env: dict) -> list[tuple[float, float, float]]:
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+        ).stdout
+        results.append(tuple(float(value) for value in output.split()[-3:]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark worker import and startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="How many of the slowest imports to list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        # Deploy phase once, as a release step would, so the runs below measure worker boot.
+        subprocess.run([sys.executable, os.path.join("scripts", "migrate.py")], cwd=ROOT, env=env, check=True, capture_output=True)
+
+        imports = time_imports(args.runs, env)
+        print(f"import main (fresh interpreter): median {statistics.median(imports) * 1000:.0f} ms over {args.runs} runs")
+
+        rows, heavy = slowest_imports(env, args.top)
+        print(f"Slowest imports (cumulative):")
+        for micros, module in rows:
+            print(f"  {micros / 1000:8.1f} ms  {module}")
+        print("Heavy optional modules imported at boot:", ", ".join(heavy) if heavy else "none")
+
+        startup = time_startup(args.runs, env)
+        for label, index in (("import", 0), ("startup hooks", 1), ("first /ready", 2)):
+            median = statistics.median(run[index] for run in startup)
+            print(f"{label:>14}: median {median * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Bulk import of offline-collected monthly reports
+
+- Reads a CSV or XLSX file whose header row uses the report field names
+  (e.g. programme_name, reporting_month, total_youth_registered, ...)
+- Validates every row with the same rules as the submit endpoint
+- Inserts valid rows in chunked bulk statements and prints per-row errors
+- If the file breaks part way, committed chunks stay imported: prints their counts and
+  exits 1
+
+Run: python scripts/import_reports.py reports.xlsx [--dry-run] [--chunk-size 500]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+from database import SessionLocal
+from utils.report_import import IMPORT_CHUNK_SIZE, ImportInterrupted, iter_rows, import_reports
+
+
+def print_result(result: dict, dry_run: bool):
+    for error in result["errors"]:
+        print(f"- Row {error['row']}: {'; '.join(error['errors'])}")
+    action = "Validated" if dry_run else "Imported"
+    print(f"{action} {result['imported']} of {result['total_rows']} row(s), {result['failed']} rejected.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import monthly reports from CSV/XLSX")
+    parser.add_argument("path", help="Path to a .csv or .xlsx file")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, do not insert")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as fh:
+            result = import_reports(
+                db,
+                iter_rows(fh, args.path),
+                chunk_size=args.chunk_size,
+                dry_run=args.dry_run,
+            )
+        print_result(result, args.dry_run)
+    except ImportInterrupted as exc:
+        # Chunks committed before the failure stay imported.
+        print_result(exc.result, args.dry_run)
+        print(f"Import stopped early, remaining rows were not imported: {exc.error}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as exc:
+        print("Error while importing:", exc, file=sys.stderr)
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
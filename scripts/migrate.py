@@ -0,0 +1,48 @@
+"""Deploy-time database setup: schema migrations and the programme catalogue sync
+
+- Creates missing tables, adds backward-compatible columns and the report unique index,
+  then records SCHEMA_VERSION in app_meta
+- Syncs data/programmes.json into the programmes table when the file changed
+- Holds a cross-process lock, so it is safe alongside workers that are booting
+- Run once per release (e.g. a Procfile "release" step), then set MIGRATE_ON_STARTUP=false
+  so workers skip even the pending-work check
+
+Run: python scripts/migrate.py [--force]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import time
+from database import SessionLocal, engine
+from utils.migrations import SCHEMA_VERSION, prepare_database, schema_version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations and sync the programme catalogue")
+    parser.add_argument("--force", action="store_true", help="Re-run every migration step even if the schema is current")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    before = schema_version(engine)
+    try:
+        result = prepare_database(engine, SessionLocal, force=args.force)
+    except Exception as exc:
+        # Non-zero exit fails the release step; the schema version is left unchanged.
+        print(f"Migration failed: {exc}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+    if not result["migrated"] and not result["catalogue"]:
+        print(f"Schema v{before} is current and the programme catalogue is unchanged ({elapsed:.2f}s).")
+        return
+    schema = f"v{before} -> v{SCHEMA_VERSION}" if result["migrated"] else f"v{before} (current)"
+    print(f"Schema {schema}; deploy steps finished in {elapsed:.2f}s.")
+
+
+if __name__ == "__main__":
+    main()
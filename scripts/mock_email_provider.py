@@ -0,0 +1,120 @@
+"""Local stand-in for the Resend and EmailJS HTTP APIs
+
+- POST /emails, /emails/batch (Resend) and /api/v1.0/email/send (EmailJS) accept and log messages
+- Speaks HTTP/1.1 keep-alive so connection reuse by utils.email can be observed
+- GET /_stats returns request, message and connection counts; POST /_reset clears them
+- --fail-rate makes a share of requests return 500, --latency adds a delay per request
+
+Run: python scripts/mock_email_provider.py --port 8025
+Then: RESEND_API_URL=http://127.0.0.1:8025 EMAILJS_API_URL=http://127.0.0.1:8025 uvicorn main:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATS = {"connections": 0, "requests": 0, "messages": 0, "batches": 0, "failures": 0}
+MESSAGES = []
+_lock = threading.Lock()
+
+
+class ProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fail_rate = 0.0
+    latency = 0.0
+    verbose = False
+
+    def setup(self):
+        super().setup()
+        with _lock:
+            STATS["connections"] += 1
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status: int, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/_stats":
+            with _lock:
+                return self._reply(200, dict(STATS))
+        if self.path == "/_messages":
+            with _lock:
+                return self._reply(200, list(MESSAGES))
+        self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.path == "/_reset":
+            with _lock:
+                for key in STATS:
+                    STATS[key] = 0
+                MESSAGES.clear()
+            return self._reply(200, {"ok": True})
+
+        if self.latency:
+            time.sleep(self.latency)
+        with _lock:
+            STATS["requests"] += 1
+        if self.fail_rate and random.random() < self.fail_rate:
+            with _lock:
+                STATS["failures"] += 1
+            return self._reply(500, {"error": "simulated failure"})
+
+        try:
+            payload = json.loads(raw or b"null")
+        except ValueError:
+            return self._reply(400, {"error": "invalid JSON"})
+
+        if self.path == "/emails/batch":
+            if not isinstance(payload, list) or len(payload) > 100:
+                return self._reply(422, {"error": "batch must be a list of at most 100 emails"})
+            messages = payload
+        elif self.path in ("/emails", "/api/v1.0/email/send"):
+            messages = [payload]
+        else:
+            return self._reply(404, {"error": "not found"})
+
+        with _lock:
+            STATS["messages"] += len(messages)
+            STATS["batches"] += 1 if self.path == "/emails/batch" else 0
+            MESSAGES.extend(messages)
+            first_id = STATS["messages"] - len(messages) + 1
+        ids = [{"id": f"mock-{first_id + i}"} for i in range(len(messages))]
+        self._reply(200, {"data": ids} if self.path == "/emails/batch" else ids[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Resend/EmailJS provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait per request")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    ProviderHandler.fail_rate = args.fail_rate
+    ProviderHandler.latency = args.latency
+    ProviderHandler.verbose = args.verbose
+    server = ThreadingHTTPServer((args.host, args.port), ProviderHandler)
+    print(f"Mock email provider listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
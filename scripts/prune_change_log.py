@@ -0,0 +1,40 @@
+"""Prune the change log behind GET /sync/changes
+
+- Deletes change_log entries older than CHANGE_LOG_RETENTION_DAYS (or --days)
+- Clients whose cursor predates the pruned range get 410 and resync from GET /sync/cursor,
+  so keep the window longer than the slowest downstream sync interval
+- Run daily from cron
+
+Run: python scripts/prune_change_log.py [--days 90]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+from database import SessionLocal
+from utils.change_log import CHANGE_LOG_RETENTION_DAYS, prune_change_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete change log entries past the retention window")
+    parser.add_argument("--days", type=int, default=CHANGE_LOG_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        deleted = prune_change_log(db, args.days)
+        print(f"Pruned {deleted} change log entr{'y' if deleted == 1 else 'ies'} older than {args.days} day(s).")
+    except Exception as exc:
+        print("Error while pruning the change log:", exc, file=sys.stderr)
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Scan monthly report figures for likely data-entry errors
+
+- Loads every programme x month figure (hot and archived) in one query
+- Flags robust z-score outliers, large month-over-month jumps and funnel breaks
+  (trained > registered, funded > trained, outcomes > registered)
+- Same checks as GET /reports/anomalies; thresholds come from the ANOMALY_* settings
+
+Run: python scripts/scan_anomalies.py [--since 2025-01] [--programme NAME] [--json]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import json
+import time
+from database import SessionLocal
+from utils.anomalies import scan_reports
+
+
+def _describe(check: dict) -> str:
+    if check["check"] == "outlier":
+        return f"{check['metric']}={check['value']} (z={check['z_score']})"
+    if check["check"] == "jump":
+        return f"{check['metric']} {check['previous']} -> {check['value']} (x{check['ratio']})"
+    return f"{check['metric']}={check['value']} > {check['limit_metric']}={check['limit']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag suspect monthly report figures")
+    parser.add_argument("--since", help="Only list reports from this month on (YYYY-MM)")
+    parser.add_argument("--programme")
+    parser.add_argument("--json", action="store_true", help="Print the flagged reports as JSON")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        flagged = scan_reports(db)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+    if args.since:
+        flagged = [item for item in flagged if item["reporting_month"][:7] >= args.since]
+    if args.programme:
+        flagged = [item for item in flagged if item["programme_name"] == args.programme]
+
+    if args.json:
+        print(json.dumps(flagged, indent=2))
+        return
+    for item in flagged:
+        checks = "; ".join(_describe(check) for check in item["checks"])
+        print(f"{item['reporting_month'][:7]}  {item['programme_name']} (report {item['report_id']}): {checks}")
+    print(f"{len(flagged)} suspect report(s), scanned in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
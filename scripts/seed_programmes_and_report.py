@@ -2,7 +2,7 @@
 
 - Loads env via dotenv
 - Connects to the existing DB via SessionLocal
-- Adds missing programmes (idempotent)
+- Syncs programmes from data/programmes.json (idempotent)
 - Adds a sample monthly report for one programme (idempotent)
 
 Run: python scripts/seed_programmes_and_report.py
@@ -11,28 +11,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from database import SessionLocal
-from models import Programme, MonthlyReport
+from models import MonthlyReport
+from utils.data_version import REPORTS_SCOPE, bump_version
+from utils.programme_catalogue import sync_catalogue
 from datetime import date
 import sys
 
-PROGRAMMES = [
-    ("NIYA", "Flagship"),
-    ("Green House Initiatives with State Government", "Flagship"),
-    ("Nig Help Desk", "Flagship"),
-    ("National Youth Confab", "Flagship"),
-    ("NYSC Reform Committee", "Flagship"),
-    ("Youth Data Protection", "Flagship"),
-    ("Waste to Wealth / Recycling Training", "Flagship"),
-    ("Bambo Initiative", "Flagship"),
-    ("SMEDAN Partnership / Youth Start Up", "Flagship"),
-    ("Security and Exchange Commission MOU", "Flagship"),
-    ("Financial Literacy and Wealth Creation Training", "Flagship"),
-    ("Yo Health", "Flagship"),
-    ("Bank of Industry Training for NIYA", "Flagship"),
-    ("Youth Credit Initiative", "Flagship"),
-    ("Nigerian Youth Investment Fund", "Flagship"),
-]
-
 SAMPLE_REPORT = {
     "programme_name": "NIYA",
     "focal_department": "Youth Affairs",
@@ -56,16 +40,11 @@ def seed():
     db = SessionLocal()
     try:
         print("Seeding programmes...")
-        for name, dept in PROGRAMMES:
-            existing = db.query(Programme).filter(Programme.name == name).first()
-            if existing:
-                print(f"- Programme already exists: {name}")
-            else:
-                p = Programme(name=name, department=dept)
-                db.add(p)
-                db.commit()
-                db.refresh(p)
-                print(f"+ Added programme: {p.name} ({dept})")
+        result = sync_catalogue(db)
+        for name in result["inserted"]:
+            print(f"+ Added programme: {name}")
+        for name in result["updated"]:
+            print(f"* Updated programme: {name}")
 
         # Submit sample report if not present
         pm_name = SAMPLE_REPORT["programme_name"]
@@ -80,6 +59,7 @@ def seed():
         else:
             report = MonthlyReport(**SAMPLE_REPORT)
             db.add(report)
+            bump_version(db, REPORTS_SCOPE)
             db.commit()
             db.refresh(report)
             print(f"+ Sample report submitted: id={report.id} for programme {report.programme_name} (reporting_month={report.reporting_month})")
@@ -0,0 +1,138 @@
+"""Concurrency stress test for one-time form tokens
+
+- Creates a programme and a single one-time form link in a scratch database
+- Fires N parallel POST /forms/{id}/submit requests carrying the same token
+- Asserts exactly one submission succeeds, the rest get "Token already used", and that
+  only one form_submissions row exists afterwards
+- Consumption is a conditional UPDATE checked by row count, so no table lock is taken
+
+Runs against a temporary SQLite file by default; pass --database-url to point it at a
+scratch Postgres database instead (tables are created, rows are left behind).
+
+Run: python scripts/stress_form_tokens.py [--requests 50] [--rounds 5]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+parser = argparse.ArgumentParser(description="Stress one-time form token consumption")
+parser.add_argument("--requests", type=int, default=50, help="parallel submits per token")
+parser.add_argument("--rounds", type=int, default=5, help="tokens to attack, one after another")
+parser.add_argument("--database-url", default=None)
+args = parser.parse_args()
+
+# The app reads its configuration at import time.
+os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/stress.db"
+os.environ["FORM_TOKEN_ONE_TIME"] = "true"
+os.environ["EMAIL_BACKEND"] = "console"
+# Every request comes from one client; the per-IP and per-token limits would reject most of them.
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ.setdefault("SECRET_KEY", "stress-test-secret")
+
+from fastapi.testclient import TestClient
+from database import SessionLocal
+from models import FormSubmission, FormToken, Programme
+from utils.data_version import bump_version, get_version
+from utils.form_tokens import generate_form_token, hash_token
+from utils.programme_registry import PROGRAMMES_SCOPE, ProgrammeRecord, registry
+from main import app
+
+
+def _create_token(db, round_no: int) -> tuple[int, str, str]:
+    name = f"Stress Programme {os.getpid()}-{round_no}"
+    programme = Programme(name=name, department="Youth Development", recipient_email="focal@example.com")
+    db.add(programme)
+    db.flush()
+    token, expires_at = generate_form_token(programme.id, programme.recipient_email)
+    db.add(
+        FormToken(
+            token_hash=hash_token(token),
+            programme_id=programme.id,
+            recipient_email=programme.recipient_email,
+            expires_at=expires_at,
+            used=False,
+        )
+    )
+    bump_version(db, PROGRAMMES_SCOPE)
+    version = get_version(db, PROGRAMMES_SCOPE)
+    db.commit()
+    registry.put(ProgrammeRecord.from_model(programme), version)
+    return programme.id, name, token
+
+
+def _payload(name: str, i: int) -> dict:
+    return {
+        "programme_name": name,
+        "focal_department": "Youth Development",
+        "focal_aide_hm": None,
+        "focal_ministry_official": None,
+        # Different months per request, so duplicates would show up as separate reports.
+        "reporting_month": f"2026-{i % 12 + 1:02d}-01",
+        "programme_launch_date": None,
+        "total_youth_registered": 100 + i,
+        "youth_trained": 50,
+        "youth_funded": 20,
+        "youth_with_outcomes": 10,
+        "partnerships": None,
+        "challenges": None,
+        "mitigation_strategies": None,
+        "scale_up_plans": None,
+        "success_story": None,
+    }
+
+
+def run_round(client: TestClient, round_no: int) -> bool:
+    db = SessionLocal()
+    try:
+        programme_id, name, token = _create_token(db, round_no)
+    finally:
+        db.close()
+
+    # All workers wait at the barrier so the submits overlap as much as possible.
+    barrier = Barrier(args.requests)
+
+    def submit(i: int):
+        barrier.wait()
+        return client.post(f"/forms/{programme_id}/submit", params={"token": token}, json=_payload(name, i))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.requests) as pool:
+        responses = list(pool.map(submit, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    statuses: dict[int, int] = {}
+    for response in responses:
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    rejected = [r for r in responses if r.status_code == 400 and r.json().get("detail") == "Token already used"]
+    db = SessionLocal()
+    try:
+        rows = db.query(FormSubmission).filter(FormSubmission.programme_id == programme_id).count()
+    finally:
+        db.close()
+
+    ok = statuses.get(200) == 1 and len(rejected) == args.requests - 1 and rows == 1
+    print(
+        f"Round {round_no}: {args.requests} submits in {elapsed * 1000:.0f} ms, statuses {statuses}, "
+        f"{rows} submission row(s) -> {'OK' if ok else 'FAIL'}"
+    )
+    return ok
+
+
+def main():
+    with TestClient(app) as client:
+        results = [run_round(client, round_no) for round_no in range(1, args.rounds + 1)]
+    if not all(results):
+        print("FAILED: a one-time token was accepted more or fewer than once.", file=sys.stderr)
+        sys.exit(1)
+    print(f"Passed: every token was consumed exactly once across {args.rounds} round(s).")
+
+
+if __name__ == "__main__":
+    main()
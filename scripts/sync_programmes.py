@@ -0,0 +1,58 @@
+"""Sync the programmes table with data/programmes.json
+
+- Diffs the catalogue file against the table (matching renamed entries via "aliases")
+- Applies inserts, department updates and renames in one bulk upsert transaction
+- A rename moves the programme's reports, partner and theme rows and archive-table rows to
+  the new name; a month reported under both names keeps the newer report
+- An alias that still has its own row next to the new name's row is merged into it the
+  same way (its form submissions move too) and deleted
+- Records the catalogue hash so app startup can skip the sync when nothing changed
+
+Run: python scripts/sync_programmes.py [--dry-run] [--path data/programmes.json]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+from database import SessionLocal
+from utils.programme_catalogue import CATALOGUE_PATH, sync_catalogue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync programmes with the catalogue file")
+    parser.add_argument("--path", default=CATALOGUE_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="Show the diff without applying it")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = sync_catalogue(db, args.path, dry_run=args.dry_run)
+        for rename in result["renamed"]:
+            print(f"~ Renamed programme: {rename['from']} -> {rename['to']}")
+            for merge in rename.get("merged", []):
+                print(f"  Merged report {merge['report']} into report {merge['into']} (same month under both names)")
+        for merge in result["merged"]:
+            print(f"- Merged programme: {merge['from']} into {merge['to']}")
+            for report in merge.get("merged", []):
+                print(f"  Merged report {report['report']} into report {report['into']} (same month under both names)")
+        for name in result["inserted"]:
+            print(f"+ Added programme: {name}")
+        for name in result["updated"]:
+            print(f"* Updated programme: {name}")
+        changed = len(result["inserted"]) + len(result["updated"]) + len(result["renamed"]) + len(result["merged"])
+        suffix = " (dry run, nothing applied)" if args.dry_run else ""
+        print(f"Catalogue v{result['version']}: {changed} change(s){suffix}.")
+    except Exception as exc:
+        print("Error while syncing programmes:", exc, file=sys.stderr)
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Update the challenge themes shown at /reports/challenge-themes
+
+- Reports without a theme (new or amended since the last run) are assigned to the
+  nearest existing theme, and the themes' centroids and labels are updated
+- A full refit (new vocabulary and themes from every report) runs when there is no
+  model yet, when the corpus has grown by THEME_REFIT_RATIO, or with --refit
+- Meant for cron, e.g. nightly; POST /reports/challenge-themes/refresh does the same
+
+Run: python scripts/update_challenge_themes.py [--refit]
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import time
+from database import SessionLocal
+from utils.themes import theme_summary, update_themes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update challenge themes")
+    parser.add_argument("--refit", action="store_true", help="Rebuild the vocabulary and themes from every report")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        result = update_themes(db, force_refit=args.refit)
+        elapsed = time.perf_counter() - start
+        print(f"{result['mode']}: {result['reports']} report(s) processed in {elapsed * 1000:.0f} ms")
+        for theme in theme_summary(db)["themes"]:
+            print(f"  {theme['reports']:6d}  {theme['label']}")
+    except Exception as exc:
+        print("Error while updating challenge themes:", exc, file=sys.stderr)
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
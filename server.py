@@ -0,0 +1,106 @@
+"""Production server entrypoint (Procfile: `web: python server.py`)
+
+- Runs WEB_CONCURRENCY uvicorn worker processes (default: one per available CPU core) on
+  one shared socket, with uvloop and httptools when installed
+- Each worker's sync thread pool and DB pool are sized together (database.THREADPOOL_SIZE);
+  with DB_MAX_CONNECTIONS set, the worker count is capped so the total fits the server
+- SIGTERM/SIGINT: workers stop accepting, finish in-flight requests for up to
+  SERVER_GRACEFUL_TIMEOUT seconds, then flush queued emails before exiting
+- SIGHUP: zero-downtime reload. Workers are replaced one at a time, and each replacement
+  serves before its predecessor is retired (e.g. `kill -HUP <pid>` after a deploy)
+- SIGTTIN/SIGTTOU add or remove a worker
+
+Run: python server.py
+"""
+import os
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import importlib.util
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+from database import DB_MAX_OVERFLOW, DB_POOL_SIZE, THREADPOOL_SIZE
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+# Total connections the database accepts for this app (e.g. Postgres max_connections minus
+# headroom for migrations and admin sessions); unset means no cap.
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "0"))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", "5"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+# Recycle a worker after this many requests (0 = never); the jitter keeps workers from
+# restarting together.
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0"))
+# How long a new worker may take to start serving during a reload before it is given up on.
+SERVER_WORKER_STARTUP_SECONDS = int(os.getenv("SERVER_WORKER_STARTUP_SECONDS", "30"))
+# Proxies whose X-Forwarded-For/Proto headers are trusted ("*" behind a platform router).
+# Required deploy config behind a router: otherwise every request comes from the router's
+# address and shares one per-IP rate-limit bucket. Render (which sets RENDER) only reaches
+# the app through its router, so "*" is the default there.
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "*" if os.getenv("RENDER") else "127.0.0.1")
+SERVER_ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "true").lower() in ("1", "true", "yes")
+
+
+def available_cpus() -> int:
+    try:
+        # Honours container CPU pinning, unlike os.cpu_count().
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    configured = os.getenv("WEB_CONCURRENCY")
+    workers = int(configured) if configured else available_cpus()
+    per_worker = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    if DB_MAX_CONNECTIONS and workers * per_worker > DB_MAX_CONNECTIONS:
+        capped = max(1, DB_MAX_CONNECTIONS // per_worker)
+        print(
+            f"Capping workers at {capped}: {workers} x {per_worker} connections would exceed "
+            f"DB_MAX_CONNECTIONS={DB_MAX_CONNECTIONS}"
+        )
+        workers = capped
+    return max(1, workers)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def build_config(workers: int | None = None) -> uvicorn.Config:
+    return uvicorn.Config(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        workers=workers or worker_count(),
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        timeout_worker_healthcheck=SERVER_WORKER_STARTUP_SECONDS,
+        limit_max_requests=SERVER_MAX_REQUESTS or None,
+        limit_max_requests_jitter=SERVER_MAX_REQUESTS_JITTER,
+        access_log=SERVER_ACCESS_LOG,
+    )
+
+
+def main():
+    config = build_config()
+    print(
+        f"Serving on {HOST}:{PORT} with {config.workers} worker(s), loop={config.loop}, http={config.http}, "
+        f"{THREADPOOL_SIZE} threads and {DB_POOL_SIZE}+{DB_MAX_OVERFLOW} DB connections per worker"
+    )
+    # Always supervised, even with one worker, so SIGHUP can swap in a fresh worker
+    # before the old one stops.
+    sock = config.bind_socket()
+    Multiprocess(config, sockets=[sock]).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import json
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from database import get_read_db
+from forms import SUBMISSION_COLUMNS
+from models import FormSubmission, FormSubmissionArchive, Programme
+from reports import REPORT_COLUMNS
+from schemas import ProgrammeOut
+from utils.archive import report_source
+from utils.auth_utils import require_admin
+from utils.change_log import (
+    CHANGE_FEED_MAX_PAGE_SIZE,
+    CHANGE_FEED_PAGE_SIZE,
+    latest_cursor,
+    pruned_through,
+    read_changes,
+)
+from utils.responses import RawJSONResponse
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+PROGRAMME_COLUMNS = tuple(ProgrammeOut.__fields__)
+
+
+def _rows_by_id(db: Session, columns: tuple[str, ...], source, ids) -> dict[int, dict]:
+    rows = db.execute(select(*[source.c[name] for name in columns]).where(source.c.id.in_(ids)))
+    return {row.id: dict(zip(columns, row)) for row in rows}
+
+
+def _load_reports(db: Session, ids) -> dict[int, dict]:
+    # Archived reports keep their ids, so changes logged before archiving still resolve.
+    return _rows_by_id(db, REPORT_COLUMNS, report_source(include_archive=True), ids)
+
+
+def _load_submissions(db: Session, ids) -> dict[int, dict]:
+    found = _rows_by_id(db, SUBMISSION_COLUMNS, FormSubmission.__table__, ids)
+    missing = [submission_id for submission_id in ids if submission_id not in found]
+    if missing:
+        found.update(_rows_by_id(db, SUBMISSION_COLUMNS, FormSubmissionArchive.__table__, missing))
+    for row in found.values():
+        row["form_data"] = json.loads(row["form_data"]) if row["form_data"] else None
+    return found
+
+
+def _load_programmes(db: Session, ids) -> dict[int, dict]:
+    return _rows_by_id(db, PROGRAMME_COLUMNS, Programme.__table__, ids)
+
+
+_LOADERS = {"report": _load_reports, "submission": _load_submissions, "programme": _load_programmes}
+
+
+@router.get("/cursor")
+def current_cursor(db: Session = Depends(get_read_db), admin_user=Depends(require_admin)):
+    """Cursor to start following /sync/changes from. Take it before a full pull of /reports/,
+    /forms/admin/submissions and /programmes/, then replay changes from it (they are idempotent)."""
+    return {"cursor": str(latest_cursor(db))}
+
+
+@router.get("/changes", response_class=RawJSONResponse)
+def list_changes(
+    since: int = 0,
+    limit: int = CHANGE_FEED_PAGE_SIZE,
+    db: Session = Depends(get_read_db),
+    admin_user=Depends(require_admin),
+):
+    """
+    Reports, form submissions and programmes changed after `since`, oldest first, one entry
+    per record with its current data (null for deletes). Pass the returned `cursor` as the
+    next `since`; keep paging while `has_more` is true.
+    """
+    if since < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must be a cursor from this API")
+    if since < pruned_through(db):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Cursor is older than the retained change log; resync from GET /sync/cursor",
+        )
+    limit = max(1, min(limit, CHANGE_FEED_MAX_PAGE_SIZE))
+    changes, cursor, has_more = read_changes(db, since, limit)
+
+    data: dict[str, dict[int, dict]] = {}
+    for entity, loader in _LOADERS.items():
+        ids = [change["id"] for change in changes if change["entity"] == entity and change["op"] != "delete"]
+        data[entity] = loader(db, ids) if ids else {}
+    items = []
+    for change in changes:
+        row = data.get(change["entity"], {}).get(change["id"])
+        if row is None and change["op"] != "delete":
+            # Gone since it was logged (archived to Parquet, or deleted later in the log).
+            continue
+        items.append({**change, "data": row})
+    return RawJSONResponse(content=orjson.dumps({"changes": items, "cursor": str(cursor), "has_more": has_more}))
@@ -0,0 +1,20 @@
+"""Shared setup for the test suite: a scratch SQLite database, console email and no rate
+limits. The app reads its configuration at import time, so this runs before any test
+module imports it.
+
+Run: python -m pytest
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ.pop("DATABASE_READ_URL", None)
+os.environ["EMAIL_BACKEND"] = "console"
+os.environ.pop("EMAIL_BACKENDS", None)
+os.environ["FORM_TOKEN_ONE_TIME"] = "true"
+# Tests fire many requests from one client; the per-IP limits would reject most of them.
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ.setdefault("SECRET_KEY", "test-secret")
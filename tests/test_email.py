@@ -0,0 +1,171 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from utils import email
+from utils.throttle import CircuitBreaker
+
+RESET_SECONDS = 0.05
+
+
+class FakeProvider:
+    """Records every provider call; `fail` makes each one fail as a provider outage would."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls: list[list[tuple[str, str, str]]] = []
+
+    def _result(self):
+        return (False, "provider down") if self.fail else (True, None)
+
+    def send_one(self, to_email, subject, body):
+        self.calls.append([(to_email, subject, body)])
+        return self._result()
+
+
+@pytest.fixture
+def make_backend(monkeypatch):
+    monkeypatch.setattr(email, "EMAIL_BREAKER_THRESHOLD", 2)
+    monkeypatch.setattr(email, "EMAIL_BREAKER_RESET_SECONDS", RESET_SECONDS)
+
+    def make(name: str, provider: FakeProvider) -> email._Backend:
+        monkeypatch.setitem(email._SENDERS, name, (provider.send_one, None, 1))
+        return email._Backend(name)
+
+    return make
+
+
+def _messages(count: int, to_email: str = "focal@example.com") -> list[tuple[str, str, str]]:
+    return [(to_email, f"Subject {i}", f"Body {i}") for i in range(count)]
+
+
+def test_send_fails_over_to_the_next_backend(monkeypatch, make_backend):
+    down, up = FakeProvider(fail=True), FakeProvider()
+    chain = [make_backend("fake-down", down), make_backend("fake-up", up)]
+    monkeypatch.setattr(email, "_chain", chain)
+
+    assert email.send_many(_messages(2)) == [(True, None), (True, None)]
+    assert len(down.calls) == 2
+    assert len(up.calls) == 2
+    assert chain[0].health()["failures"] == 2
+    assert chain[1].health()["messages_sent"] == 2
+
+
+def test_send_reports_the_last_error_when_every_backend_fails(monkeypatch, make_backend):
+    monkeypatch.setattr(email, "_chain", [make_backend("fake-down", FakeProvider(fail=True))])
+
+    assert email.send_email("focal@example.com", "Subject", "Body") == (False, "provider down")
+
+
+def test_breaker_opens_then_lets_one_trial_through(monkeypatch, make_backend):
+    provider, fallback = FakeProvider(fail=True), FakeProvider()
+    backend = make_backend("fake-flaky", provider)
+    monkeypatch.setattr(email, "_chain", [backend, make_backend("fake-up", fallback)])
+
+    # Two consecutive failures (EMAIL_BREAKER_THRESHOLD) open the breaker...
+    email.send_many(_messages(2))
+    assert backend.breaker.state == CircuitBreaker.OPEN
+    # ...after which the provider is skipped, not called.
+    assert email.send_many(_messages(1)) == [(True, None)]
+    assert len(provider.calls) == 2
+    assert backend.health()["skipped_open"] == 1
+
+    # Once the reset time has passed a single trial goes through; failing it reopens.
+    time.sleep(RESET_SECONDS * 2)
+    email.send_many(_messages(2))
+    assert len(provider.calls) == 3
+    assert backend.breaker.state == CircuitBreaker.OPEN
+
+    # A successful trial closes the breaker again.
+    time.sleep(RESET_SECONDS * 2)
+    provider.fail = False
+    email.send_many(_messages(2))
+    assert len(provider.calls) == 5
+    assert backend.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_throttled_backend_hands_back_its_half_open_trial(monkeypatch, make_backend):
+    provider = FakeProvider(fail=True)
+    backend = make_backend("fake-throttled", provider)
+    monkeypatch.setattr(email, "_chain", [backend])
+    email.send_many(_messages(2))
+    time.sleep(RESET_SECONDS * 2)
+
+    # No token is available, so nothing is sent and the trial is not spent.
+    monkeypatch.setattr(email, "EMAIL_THROTTLE_WAIT_SECONDS", 0)
+    backend.bucket = email.TokenBucket(rate=0.001, capacity=1)
+    backend.bucket.try_acquire()
+    email.send_many(_messages(1))
+    assert len(provider.calls) == 2
+    assert backend.breaker.state == CircuitBreaker.OPEN
+    assert backend.breaker.allow()
+
+
+def test_resend_sends_batches_of_100(monkeypatch):
+    posts = []
+
+    def fake_post(pool, path, payload, provider, headers=None):
+        posts.append((path, payload, headers))
+        return True, None
+
+    monkeypatch.setattr(email, "RESEND_API_KEY", "re_test")
+    monkeypatch.setattr(email, "RESEND_FROM", "dmt@example.com")
+    monkeypatch.setattr(email, "_post_json", fake_post)
+    # No throttle, so the three calls go out without waiting for tokens.
+    monkeypatch.setitem(email.EMAIL_RATE_LIMITS, "resend", 0)
+    monkeypatch.setattr(email, "_chain", [email._Backend("resend")])
+
+    messages = _messages(250)
+    messages[10] = ("", "No recipient", "Body")
+    results = email.send_many(messages)
+
+    assert [len(payload) for _, payload, _ in posts] == [99, 100, 50]
+    assert all(path == "/emails/batch" for path, _, _ in posts)
+    assert all(headers["Authorization"] == "Bearer re_test" for _, _, headers in posts)
+    # A fresh idempotency key per call, so the pool may resend it after a stale connection.
+    assert len({headers["Idempotency-Key"] for _, _, headers in posts}) == 3
+    assert posts[0][1][0] == {"from": "dmt@example.com", "to": ["focal@example.com"], "subject": "Subject 0", "text": "Body 0"}
+    assert results[10] == (False, email.MISSING_RECIPIENT)
+    assert results[:10] + results[11:] == [(True, None)] * 249
+
+
+def test_shutdown_drains_the_outbox(monkeypatch):
+    sent = []
+
+    def slow_send_many(messages):
+        time.sleep(0.05)
+        sent.append(messages)
+        return [(True, None)] * len(messages)
+
+    monkeypatch.setattr(email, "send_many", slow_send_many)
+    with TestClient(app):
+        for i in range(3):
+            email.queue_emails(_messages(2, f"admin{i}@example.com"), "import summary")
+    # Leaving the client runs the app's shutdown handler, which calls drain_outbox().
+    assert [messages[0][0] for messages in sent] == ["admin0@example.com", "admin1@example.com", "admin2@example.com"]
+    assert email._outbox.qsize() == 0
+
+
+def test_drain_outbox_gives_up_after_the_timeout(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def blocked_send_many(messages):
+        started.set()
+        release.wait(5)
+        return [(True, None)] * len(messages)
+
+    monkeypatch.setattr(email, "send_many", blocked_send_many)
+    email.queue_emails(_messages(1), "import summary")
+    email.queue_emails(_messages(1), "import summary")
+    thread = email._outbox_thread
+    try:
+        # The first batch is stuck in send_many, so the second one is still queued.
+        assert started.wait(5)
+        assert email.drain_outbox(timeout=0.1) == 1
+    finally:
+        release.set()
+        thread.join(5)
+    assert not thread.is_alive()
@@ -0,0 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+import pytest
+from fastapi.testclient import TestClient
+
+from database import SessionLocal
+from forms import _consume_token
+from main import app
+from models import FormSubmission, FormToken, Programme
+from utils.data_version import bump_version, get_version
+from utils.form_tokens import generate_form_token, hash_token
+from utils.programme_registry import PROGRAMMES_SCOPE, ProgrammeRecord, registry
+
+CONCURRENT_SUBMITS = 20
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def _create_token(name: str) -> tuple[int, str]:
+    db = SessionLocal()
+    try:
+        programme = Programme(name=name, department="Youth Development", recipient_email="focal@example.com")
+        db.add(programme)
+        db.flush()
+        token, expires_at = generate_form_token(programme.id, programme.recipient_email)
+        db.add(
+            FormToken(
+                token_hash=hash_token(token),
+                programme_id=programme.id,
+                recipient_email=programme.recipient_email,
+                expires_at=expires_at,
+                used=False,
+            )
+        )
+        bump_version(db, PROGRAMMES_SCOPE)
+        version = get_version(db, PROGRAMMES_SCOPE)
+        db.commit()
+        registry.put(ProgrammeRecord.from_model(programme), version)
+        return programme.id, token
+    finally:
+        db.close()
+
+
+def _payload(name: str, i: int) -> dict:
+    return {
+        "programme_name": name,
+        "focal_department": "Youth Development",
+        "focal_aide_hm": None,
+        "focal_ministry_official": None,
+        # Different months per request, so duplicates would show up as separate reports.
+        "reporting_month": f"2026-{i % 12 + 1:02d}-01",
+        "total_youth_registered": 100 + i,
+        "youth_trained": 50,
+        "youth_funded": 20,
+        "youth_with_outcomes": 10,
+        "programme_launch_date": None,
+        "partnerships": None,
+        "challenges": None,
+        "mitigation_strategies": None,
+        "scale_up_plans": None,
+        "success_story": None,
+    }
+
+
+def test_concurrent_submits_consume_token_once(client):
+    name = "Token Race Programme"
+    programme_id, token = _create_token(name)
+    # All workers wait at the barrier so the submits overlap as much as possible.
+    barrier = Barrier(CONCURRENT_SUBMITS)
+
+    def submit(i: int):
+        barrier.wait()
+        return client.post(f"/forms/{programme_id}/submit", params={"token": token}, json=_payload(name, i))
+
+    with ThreadPoolExecutor(max_workers=CONCURRENT_SUBMITS) as pool:
+        responses = list(pool.map(submit, range(CONCURRENT_SUBMITS)))
+
+    accepted = [r for r in responses if r.status_code == 200]
+    rejected = [r for r in responses if r.status_code == 400]
+    assert len(accepted) == 1
+    assert len(rejected) == CONCURRENT_SUBMITS - 1
+    assert all(r.json()["detail"] == "Token already used" for r in rejected)
+    db = SessionLocal()
+    try:
+        assert db.query(FormSubmission).filter(FormSubmission.programme_id == programme_id).count() == 1
+    finally:
+        db.close()
+
+
+def test_token_is_only_spent_when_the_submission_commits(client):
+    _, token = _create_token("Token Rollback Programme")
+    db = SessionLocal()
+    try:
+        assert _consume_token(token, db)
+        db.rollback()
+        assert _consume_token(token, db)
+        db.commit()
+        assert not _consume_token(token, db)
+    finally:
+        db.close()
@@ -0,0 +1,75 @@
+import http.client
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.http_pool import HTTPConnectionPool
+
+
+class ProviderHandler(BaseHTTPRequestHandler):
+    """Keep-alive endpoint. /drop reads a request that is not the first on its connection
+    and closes without answering (the server may have acted on it); /close answers, then
+    closes the idle connection as a server's keep-alive timeout would."""
+
+    protocol_version = "HTTP/1.1"
+    received: list[str] = []
+
+    def setup(self):
+        super().setup()
+        self.requests_on_connection = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.requests_on_connection += 1
+        self.received.append(self.path)
+        if self.path == "/drop" and self.requests_on_connection > 1:
+            self.close_connection = True
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+        if self.path == "/close":
+            self.close_connection = True
+
+
+@pytest.fixture
+def pool():
+    ProviderHandler.received = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProviderHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    pool = HTTPConnectionPool(f"http://127.0.0.1:{server.server_address[1]}", maxsize=1, timeout=5)
+    yield pool
+    pool.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_post_is_not_resent_when_its_response_is_lost(pool):
+    assert pool.request("POST", "/drop", body=b"{}") == (200, b"ok")
+    with pytest.raises(http.client.RemoteDisconnected):
+        pool.request("POST", "/drop", body=b"{}")
+    assert ProviderHandler.received == ["/drop", "/drop"]
+
+
+def test_post_with_an_idempotency_key_is_resent(pool):
+    assert pool.request("POST", "/drop", body=b"{}") == (200, b"ok")
+    headers = {"Idempotency-Key": "abc"}
+    assert pool.request("POST", "/drop", body=b"{}", headers=headers) == (200, b"ok")
+    assert ProviderHandler.received == ["/drop", "/drop", "/drop"]
+    assert pool.connections_opened == 2
+
+
+def test_connection_closed_while_idle_is_replaced_before_sending(pool):
+    assert pool.request("POST", "/close", body=b"{}") == (200, b"ok")
+    # Give the server's FIN time to arrive.
+    time.sleep(0.1)
+    assert pool.request("POST", "/close", body=b"{}") == (200, b"ok")
+    assert ProviderHandler.received == ["/close", "/close"]
+    assert pool.connections_opened == 2
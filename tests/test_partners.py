@@ -0,0 +1,30 @@
+import pytest
+
+from utils.partners import classify_partner, parse_partnerships
+
+
+@pytest.mark.parametrize(
+    "name, category",
+    [
+        ("World Bank", "development"),
+        ("Federal Polytechnic", "academic"),
+        ("Federal Ministry of Youth Development", "government"),
+        ("Congo Youth Trust", "other"),
+        ("Mongo Labs", "other"),
+        ("Local NGO", "ngo"),
+        ("Civil Society Coalition", "ngo"),
+        ("Access Bank Plc", "private"),
+        ("Bankole Farms", "other"),
+        ("UNDP", "development"),
+    ],
+)
+def test_classify_partner(name, category):
+    assert classify_partner(name) == category
+
+
+def test_parse_partnerships_splits_and_dedupes():
+    assert parse_partnerships("World Bank, world  bank; Local NGO\nMongo Labs") == [
+        ("World Bank", "development"),
+        ("Local NGO", "ngo"),
+        ("Mongo Labs", "other"),
+    ]
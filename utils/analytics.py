@@ -0,0 +1,432 @@
+import json
+import os
+import shutil
+import threading
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from sqlalchemy import select
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import FormSubmission, FormSubmissionArchive, Programme
+from utils.archive import iter_parquet_rows, report_source
+from utils.data_version import REPORTS_SCOPE, get_version
+
+# Parquet snapshots for the DuckDB query layer; each export is a new directory under here and
+# CURRENT names the one queries read.
+ANALYTICS_SNAPSHOT_DIR = os.getenv(
+    "ANALYTICS_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "snapshots"),
+)
+ANALYTICS_KEEP_SNAPSHOTS = int(os.getenv("ANALYTICS_KEEP_SNAPSHOTS", "3"))
+ANALYTICS_EXPORT_BATCH_SIZE = int(os.getenv("ANALYTICS_EXPORT_BATCH_SIZE", "5000"))
+ANALYTICS_MAX_ROWS = int(os.getenv("ANALYTICS_MAX_ROWS", "10000"))
+# DuckDB runs inside the API process; keep it from taking every core or the whole box.
+ANALYTICS_THREADS = int(os.getenv("ANALYTICS_THREADS", "2"))
+ANALYTICS_MEMORY_LIMIT = os.getenv("ANALYTICS_MEMORY_LIMIT", "512MB")
+
+_CURRENT_FILE = "CURRENT"
+_MANIFEST_FILE = "manifest.json"
+
+# Snapshot table columns, partitioned by year. Types are pinned so empty exports and
+# NULL-only batches still produce the same schema.
+_REPORT_SCHEMA = (
+    ("id", "int64"),
+    ("programme_name", "string"),
+    ("department", "string"),
+    ("focal_department", "string"),
+    ("reporting_month", "date32"),
+    ("total_youth_registered", "int64"),
+    ("youth_trained", "int64"),
+    ("youth_funded", "int64"),
+    ("youth_with_outcomes", "int64"),
+    ("submitted_by", "int64"),
+    ("created_at", "timestamp"),
+    ("year", "int32"),
+)
+_SUBMISSION_SCHEMA = (
+    ("id", "int64"),
+    ("programme_id", "int64"),
+    ("programme_name", "string"),
+    ("department", "string"),
+    ("recipient_email", "string"),
+    ("submitted_at", "timestamp"),
+    ("submitted_month", "date32"),
+    ("form_data", "string"),
+    ("year", "int32"),
+)
+
+# Whitelisted query vocabulary: API name -> SQL over the snapshot table. Nothing from the
+# request is ever spliced into SQL except through these maps and bound parameters.
+ANALYTICS_DATASETS = {
+    "reports": {
+        "table": "monthly_reports",
+        "month": "reporting_month",
+        "dimensions": {
+            "programme": "programme_name",
+            "department": "department",
+            "month": "strftime(reporting_month, '%Y-%m')",
+            "quarter": "concat(year, '-Q', quarter(reporting_month))",
+            "year": "year",
+        },
+        "metrics": {
+            "registered": "total_youth_registered",
+            "trained": "youth_trained",
+            "funded": "youth_funded",
+            "outcomes": "youth_with_outcomes",
+            "reports": None,
+        },
+    },
+    "submissions": {
+        "table": "form_submissions",
+        "month": "submitted_month",
+        "dimensions": {
+            "programme": "programme_name",
+            "department": "department",
+            "month": "strftime(submitted_month, '%Y-%m')",
+            "quarter": "concat(year, '-Q', quarter(submitted_month))",
+            "year": "year",
+        },
+        "metrics": {"submissions": None},
+    },
+}
+ANALYTICS_AGGREGATES = ("sum", "avg", "min", "max")
+
+
+class AnalyticsError(ValueError):
+    """Bad query parameters or no snapshot to query; the message is safe to show the caller."""
+
+
+def _require_engines():
+    try:
+        import duckdb
+        import pyarrow
+    except ImportError:
+        raise AnalyticsError("The analytics query layer requires the 'duckdb' and 'pyarrow' packages")
+    return duckdb, pyarrow
+
+
+def _arrow_schema(pa, columns):
+    types = {
+        "int64": pa.int64(),
+        "int32": pa.int32(),
+        "string": pa.string(),
+        "date32": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _naive_utc(value):
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _report_rows(db: Session, departments: dict[str, str]):
+    reports = report_source(include_archive=True)
+    columns = [name for name, _ in _REPORT_SCHEMA if name not in ("department", "year")]
+    result = db.execute(select(*[reports.c[name] for name in columns]).execution_options(stream_results=True))
+    # Years archived to Parquet live outside the database.
+    archived = (tuple(row.get(name) for name in columns) for row in iter_parquet_rows("monthly_reports"))
+    for source in (result, archived):
+        for row in source:
+            values = dict(zip(columns, row))
+            month = values["reporting_month"]
+            values["department"] = departments.get(values["programme_name"]) or values["focal_department"]
+            values["created_at"] = _naive_utc(values["created_at"])
+            values["year"] = month.year
+            yield values
+
+
+def _submission_rows(db: Session, names: dict[int, str], departments: dict[str, str]):
+    columns = ("id", "programme_id", "recipient_email", "form_data", "submitted_at")
+    sources = [
+        db.execute(select(*[table.c[name] for name in columns]).execution_options(stream_results=True))
+        for table in (FormSubmission.__table__, FormSubmissionArchive.__table__)
+    ]
+    sources.append(tuple(row.get(name) for name in columns) for row in iter_parquet_rows("form_submissions"))
+    for source in sources:
+        for row in source:
+            values = dict(zip(columns, row))
+            submitted_at = _naive_utc(values["submitted_at"])
+            name = names.get(values["programme_id"])
+            values.update(
+                programme_name=name,
+                department=departments.get(name),
+                submitted_at=submitted_at,
+                submitted_month=submitted_at.date().replace(day=1) if submitted_at else None,
+                year=submitted_at.year if submitted_at else None,
+            )
+            yield values
+
+
+def _write_table(duckdb, pa, rows, columns, directory: str) -> int:
+    """Stream rows into a DuckDB table batch by batch, then COPY it out as Parquet
+    partitioned by year."""
+    schema = _arrow_schema(pa, columns)
+    con = duckdb.connect()
+    try:
+        con.execute(f"SET threads = {ANALYTICS_THREADS}")
+        con.execute(f"SET memory_limit = '{ANALYTICS_MEMORY_LIMIT}'")
+        empty = pa.Table.from_pylist([], schema=schema)
+        con.register("incoming", empty)
+        con.execute("CREATE TABLE export AS SELECT * FROM incoming")
+        con.unregister("incoming")
+        count = 0
+        batch = []
+
+        def flush():
+            con.register("incoming", pa.Table.from_pylist(batch, schema=schema))
+            con.execute("INSERT INTO export SELECT * FROM incoming")
+            con.unregister("incoming")
+
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= ANALYTICS_EXPORT_BATCH_SIZE:
+                flush()
+                count += len(batch)
+                batch = []
+        if batch:
+            flush()
+            count += len(batch)
+        os.makedirs(directory, exist_ok=True)
+        if count:
+            path = directory.replace("'", "''")
+            con.execute(f"COPY export TO '{path}' (FORMAT PARQUET, PARTITION_BY (year), COMPRESSION ZSTD, OVERWRITE_OR_IGNORE)")
+        return count
+    finally:
+        con.close()
+
+
+def run_in_duckdb(query, tables: dict, parquet: dict[str, list[str]] | None = None) -> list[dict]:
+    """Run a SQLAlchemy Core query in a scratch DuckDB database, so SQL written for the main
+    database also covers Parquet-archived years it cannot read.
+
+    `tables` maps each table the query reads to (rows, [(column, kind)]); `parquet` appends
+    the rows of the given Parquet files to a table. Returns the rows as dicts.
+    """
+    duckdb, pa = _require_engines()
+    con = duckdb.connect()
+    try:
+        con.execute(f"SET threads = {ANALYTICS_THREADS}")
+        con.execute(f"SET memory_limit = '{ANALYTICS_MEMORY_LIMIT}'")
+        for name, (rows, columns) in tables.items():
+            names = [column for column, _ in columns]
+            con.register(f"{name}_rows", pa.Table.from_pylist([dict(zip(names, row)) for row in rows], schema=_arrow_schema(pa, columns)))
+            select_list = ", ".join(names)
+            sql = f"CREATE VIEW {name} AS SELECT {select_list} FROM {name}_rows"
+            files = (parquet or {}).get(name)
+            if files:
+                paths = ", ".join("'" + path.replace("'", "''") + "'" for path in files)
+                sql += f" UNION ALL SELECT {select_list} FROM read_parquet([{paths}], union_by_name = true)"
+            con.execute(sql)
+        # DuckDB takes the SQLite dialect's SQL and positional parameters as they are.
+        compiled = query.compile(dialect=sqlite.dialect())
+        result = con.execute(str(compiled), [compiled.params[name] for name in compiled.positiontup])
+        keys = [description[0] for description in result.description]
+        return [dict(zip(keys, row)) for row in result.fetchall()]
+    finally:
+        con.close()
+
+
+def current_snapshot() -> dict | None:
+    """Manifest of the snapshot queries read, or None before the first export."""
+    try:
+        with open(os.path.join(ANALYTICS_SNAPSHOT_DIR, _CURRENT_FILE), encoding="utf-8") as handle:
+            name = handle.read().strip()
+        with open(os.path.join(ANALYTICS_SNAPSHOT_DIR, name, _MANIFEST_FILE), encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return None
+    manifest["path"] = os.path.join(ANALYTICS_SNAPSHOT_DIR, name)
+    return manifest
+
+
+def export_snapshot(db: Session) -> dict:
+    """Export monthly reports and form submissions (hot, archive table and Parquet archive) to
+    a new snapshot directory and switch queries over to it once it is complete."""
+    duckdb, pa = _require_engines()
+    # Read before the export: a snapshot is never labelled newer than its data.
+    version = get_version(db, REPORTS_SCOPE)
+    programmes = db.query(Programme.id, Programme.name, Programme.department).all()
+    names = {programme.id: programme.name for programme in programmes}
+    departments = {programme.name: programme.department for programme in programmes}
+
+    name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    target = os.path.join(ANALYTICS_SNAPSHOT_DIR, name)
+    staging = target + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    try:
+        counts = {
+            "monthly_reports": _write_table(
+                duckdb, pa, _report_rows(db, departments), _REPORT_SCHEMA, os.path.join(staging, "monthly_reports")
+            ),
+            "form_submissions": _write_table(
+                duckdb,
+                pa,
+                _submission_rows(db, names, departments),
+                _SUBMISSION_SCHEMA,
+                os.path.join(staging, "form_submissions"),
+            ),
+        }
+        manifest = {
+            "snapshot": name,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "reports_version": version,
+            "rows": counts,
+        }
+        with open(os.path.join(staging, _MANIFEST_FILE), "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle)
+        os.replace(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Atomic switch: readers see either the old snapshot or the new one, never a partial one.
+    pointer = os.path.join(ANALYTICS_SNAPSHOT_DIR, _CURRENT_FILE)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as handle:
+        handle.write(name)
+    os.replace(pointer + ".tmp", pointer)
+    _prune_snapshots(keep=name)
+    return {**manifest, "path": target}
+
+
+_export_lock = threading.Lock()
+
+
+def run_snapshot_export():
+    """Background task entry point: uses its own session, skips if an export is already
+    running in this process, and logs instead of raising."""
+    if not _export_lock.acquire(blocking=False):
+        print("Analytics snapshot export already running; skipped")
+        return
+    db = SessionLocal()
+    try:
+        manifest = export_snapshot(db)
+        print(f"Analytics snapshot {manifest['snapshot']} exported: {manifest['rows']}")
+    except Exception as exc:
+        print(f"Error exporting analytics snapshot: {exc}")
+    finally:
+        db.close()
+        _export_lock.release()
+
+
+def _prune_snapshots(keep: str):
+    names = sorted(
+        entry
+        for entry in os.listdir(ANALYTICS_SNAPSHOT_DIR)
+        if os.path.isdir(os.path.join(ANALYTICS_SNAPSHOT_DIR, entry)) and not entry.endswith(".tmp")
+    )
+    # Snapshot names sort by time; queries already running on an old one finish from open files.
+    for old in names[: max(0, len(names) - ANALYTICS_KEEP_SNAPSHOTS)]:
+        if old != keep:
+            shutil.rmtree(os.path.join(ANALYTICS_SNAPSHOT_DIR, old), ignore_errors=True)
+
+
+_local = threading.local()
+_connection = None
+_connection_lock = threading.Lock()
+
+
+def _cursor(duckdb):
+    """Per-thread cursor on one shared in-memory DuckDB database."""
+    global _connection
+    cursor = getattr(_local, "cursor", None)
+    if cursor is None:
+        with _connection_lock:
+            if _connection is None:
+                _connection = duckdb.connect()
+                _connection.execute(f"SET threads = {ANALYTICS_THREADS}")
+                _connection.execute(f"SET memory_limit = '{ANALYTICS_MEMORY_LIMIT}'")
+            cursor = _local.cursor = _connection.cursor()
+    return cursor
+
+
+def _month_start(value: str, field: str) -> date:
+    try:
+        parsed = date.fromisoformat(value if len(value) > 7 else f"{value}-01")
+    except ValueError:
+        raise AnalyticsError(f"{field} must be formatted as YYYY-MM")
+    return parsed.replace(day=1)
+
+
+def run_query(
+    dataset: str = "reports",
+    group_by: list[str] | None = None,
+    metrics: list[str] | None = None,
+    aggregate: str = "sum",
+    start_month: str | None = None,
+    end_month: str | None = None,
+    programme: str | None = None,
+    department: str | None = None,
+) -> dict:
+    """Group a snapshot table by whitelisted dimensions and aggregate whitelisted metrics."""
+    spec = ANALYTICS_DATASETS.get(dataset)
+    if spec is None:
+        raise AnalyticsError(f"dataset must be one of: {', '.join(ANALYTICS_DATASETS)}")
+    group_by = list(dict.fromkeys(group_by or []))
+    metrics = list(dict.fromkeys(metrics or spec["metrics"]))
+    unknown = [name for name in group_by if name not in spec["dimensions"]]
+    if unknown:
+        raise AnalyticsError(f"Unknown dimension(s) {', '.join(unknown)}; use {', '.join(spec['dimensions'])}")
+    unknown = [name for name in metrics if name not in spec["metrics"]]
+    if unknown:
+        raise AnalyticsError(f"Unknown metric(s) {', '.join(unknown)}; use {', '.join(spec['metrics'])}")
+    if aggregate not in ANALYTICS_AGGREGATES:
+        raise AnalyticsError(f"aggregate must be one of: {', '.join(ANALYTICS_AGGREGATES)}")
+
+    duckdb, _ = _require_engines()
+    snapshot = current_snapshot()
+    if snapshot is None:
+        raise AnalyticsError("No analytics snapshot yet; run POST /analytics/snapshot or scripts/export_analytics_snapshot.py")
+
+    select_parts = [f"{spec['dimensions'][name]} AS {name}" for name in group_by]
+    for name in metrics:
+        column = spec["metrics"][name]
+        select_parts.append(f"count(*) AS {name}" if column is None else f"{aggregate}({column}) AS {name}")
+    where, params = [], []
+    if start_month:
+        where.append(f"{spec['month']} >= ?")
+        params.append(_month_start(start_month, "start_month"))
+    if end_month:
+        where.append(f"{spec['month']} <= ?")
+        params.append(_month_start(end_month, "end_month"))
+    if programme:
+        where.append("programme_name = ?")
+        params.append(programme)
+    if department:
+        where.append("department = ?")
+        params.append(department)
+
+    files = os.path.join(snapshot["path"], spec["table"], "*", "*.parquet").replace("'", "''")
+    if not snapshot["rows"].get(spec["table"]):
+        rows = []
+    else:
+        sql = f"SELECT {', '.join(select_parts)} FROM read_parquet('{files}', hive_partitioning = true)"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if group_by:
+            positions = ", ".join(str(i + 1) for i in range(len(group_by)))
+            sql += f" GROUP BY {positions} ORDER BY {positions}"
+        sql += f" LIMIT {ANALYTICS_MAX_ROWS + 1}"
+        rows = _cursor(duckdb).execute(sql, params).fetchall()
+
+    columns = group_by + metrics
+    truncated = len(rows) > ANALYTICS_MAX_ROWS
+    return {
+        "snapshot": {key: snapshot[key] for key in ("snapshot", "created_at", "reports_version")},
+        "dataset": dataset,
+        "aggregate": aggregate,
+        "columns": columns,
+        "rows": [dict(zip(columns, _plain(row))) for row in rows[:ANALYTICS_MAX_ROWS]],
+        "truncated": truncated,
+    }
+
+
+def _plain(row) -> tuple:
+    # Averages come back as floats or Decimals; keep whole numbers as ints in the JSON.
+    return tuple(
+        (int(value) if value == int(value) else round(float(value), 4)) if isinstance(value, (Decimal, float)) else value
+        for value in row
+    )
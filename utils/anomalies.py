@@ -0,0 +1,215 @@
+import os
+import warnings
+from datetime import date
+import numpy as np
+from sqlalchemy import extract, select
+from sqlalchemy.orm import Session
+from utils.archive import iter_parquet_rows, report_source
+
+# Modified z-score (0.6745 * (x - median) / MAD) above which a figure is an outlier for its programme.
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.5"))
+# A figure this many times larger or smaller than the programme's previous report is a jump.
+ANOMALY_JUMP_RATIO = float(os.getenv("ANOMALY_JUMP_RATIO", "5"))
+# Programmes need this many reports before their z-scores are trusted.
+ANOMALY_MIN_HISTORY = int(os.getenv("ANOMALY_MIN_HISTORY", "4"))
+# Differences smaller than this are never flagged: 2 -> 12 is not a jump, and 11 against a
+# median of 10 is not an outlier however steady the history.
+ANOMALY_MIN_VALUE = int(os.getenv("ANOMALY_MIN_VALUE", "10"))
+
+# Column order of the metric axis in the matrix.
+ANOMALY_METRICS = ("total_youth_registered", "youth_trained", "youth_funded", "youth_with_outcomes")
+# (smaller, larger): the first figure should never exceed the second.
+FUNNEL_CHECKS = (
+    ("youth_trained", "total_youth_registered"),
+    ("youth_funded", "youth_trained"),
+    ("youth_with_outcomes", "total_youth_registered"),
+)
+_MAD_SCALE = 0.6745
+# Mean absolute deviation fallback when more than half the figures equal the median (MAD = 0).
+_MEAN_AD_SCALE = 1.253314
+
+
+def _month_index(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def build_matrix(rows) -> dict:
+    """Arrange (id, programme_name, month_index, *ANOMALY_METRICS) rows as a
+    programme x month x metric float array; months without a report are NaN."""
+    rows = list(rows)
+    if not rows:
+        return {
+            "programmes": [],
+            "start": 0,
+            "values": np.empty((0, 0, len(ANOMALY_METRICS))),
+            "ids": np.empty((0, 0), dtype=np.int64),
+        }
+    # Column-wise conversion; only the programme lookup runs per row in Python.
+    ids, names, months, *metrics = zip(*rows)
+    lookup: dict[str, int] = {}
+    programme_index = np.fromiter(
+        (lookup.setdefault(name, len(lookup)) for name in names), dtype=np.int64, count=len(rows)
+    )
+    month_index = np.array(months, dtype=np.int64)
+    start = int(month_index.min())
+    month_index -= start
+    shape = (len(lookup), int(month_index.max()) + 1)
+
+    values = np.full(shape + (len(ANOMALY_METRICS),), np.nan)
+    values[programme_index, month_index] = np.array(metrics, dtype=float).T
+    report_ids = np.full(shape, -1, dtype=np.int64)
+    report_ids[programme_index, month_index] = np.array(ids, dtype=np.int64)
+    return {"programmes": list(lookup), "start": start, "values": values, "ids": report_ids}
+
+
+def robust_z(values: np.ndarray) -> np.ndarray:
+    """Modified z-score of every figure against its own programme's history (axis 1).
+    Figures within ANOMALY_MIN_VALUE of the median score 0."""
+    present = ~np.isnan(values)
+    history = present.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # All-NaN slices (a metric with no history yet) are expected here.
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        median = np.nanmedian(values, axis=1, keepdims=True)
+        deviation = np.abs(values - median)
+        mad = np.nanmedian(deviation, axis=1, keepdims=True) / _MAD_SCALE
+        mean_ad = np.nanmean(deviation, axis=1, keepdims=True) * _MEAN_AD_SCALE
+        scale = np.where(mad > 0, mad, mean_ad)
+        z = np.where((scale > 0) & (deviation >= ANOMALY_MIN_VALUE), (values - median) / scale, 0.0)
+    return np.where(present & (history >= ANOMALY_MIN_HISTORY), z, np.nan)
+
+
+def previous_index(values: np.ndarray) -> np.ndarray:
+    """Month index of each programme's previous report (skipping gaps); -1 where there is none."""
+    programmes, months = values.shape[:2]
+    present = ~np.isnan(values[..., 0])
+    # Forward-fill the month index of the latest report, then shift by one month.
+    last = np.where(present, np.arange(months), -1)
+    np.maximum.accumulate(last, axis=1, out=last)
+    previous = np.full((programmes, months), -1, dtype=np.int64)
+    previous[:, 1:] = last[:, :-1]
+    return previous
+
+
+def take_previous(array: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    gathered = np.take_along_axis(array, np.maximum(previous, 0)[..., None], axis=1)
+    return np.where((previous >= 0)[..., None], gathered, np.nan)
+
+
+def jump_ratios(values: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """max/min of each figure and the previous one; NaN where either side is too small to judge."""
+    low = np.fmin(values, previous)
+    high = np.fmax(values, previous)
+    judged = (high >= ANOMALY_MIN_VALUE) & ~np.isnan(values) & ~np.isnan(previous)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = high / np.maximum(low, 1)
+    return np.where(judged, ratio, np.nan)
+
+
+def funnel_violations(values: np.ndarray) -> np.ndarray:
+    """Boolean programme x month x check array, True where FUNNEL_CHECKS is broken."""
+    column = {name: index for index, name in enumerate(ANOMALY_METRICS)}
+    smaller = values[..., [column[small] for small, _ in FUNNEL_CHECKS]]
+    larger = values[..., [column[large] for _, large in FUNNEL_CHECKS]]
+    with np.errstate(invalid="ignore"):
+        return smaller > larger
+
+
+def scan_matrix(values: np.ndarray) -> dict:
+    """Run every check across all programmes at once; returns arrays shaped like `values`."""
+    z = robust_z(values)
+    index = previous_index(values)
+    previous = take_previous(values, index)
+    ratio = jump_ratios(values, previous)
+    funnel = funnel_violations(values)
+    with np.errstate(invalid="ignore"):
+        outlier = np.abs(z) > ANOMALY_Z_THRESHOLD
+        # A jump back towards the programme's usual level is the recovery after a bad
+        # figure, not a new error; without enough history every jump is reported.
+        recovering = np.abs(z) < np.abs(take_previous(z, index))
+        jump = (ratio >= ANOMALY_JUMP_RATIO) & ~recovering
+    return {
+        "z": z,
+        "previous": previous,
+        "ratio": ratio,
+        "outlier": outlier,
+        "jump": jump,
+        "funnel": funnel,
+        "flagged": outlier.any(axis=2) | jump.any(axis=2) | funnel.any(axis=2),
+    }
+
+
+def load_report_rows(db: Session, include_archived: bool = True) -> list:
+    reports = report_source(include_archive=include_archived)
+    # Months as integers computed by the database, so no date objects are built per row.
+    month = extract("year", reports.c.reporting_month) * 12 + extract("month", reports.c.reporting_month) - 1
+    rows = db.execute(
+        select(reports.c.id, reports.c.programme_name, month, *[reports.c[name] for name in ANOMALY_METRICS])
+    ).all()
+    if include_archived:
+        for row in iter_parquet_rows("monthly_reports"):
+            rows.append(
+                (row["id"], row["programme_name"], _month_index(row["reporting_month"]))
+                + tuple(row.get(name) for name in ANOMALY_METRICS)
+            )
+    return rows
+
+
+def _as_number(value: float):
+    return int(value) if float(value).is_integer() else round(float(value), 2)
+
+
+def scan_reports(db: Session, include_archived: bool = True) -> list[dict]:
+    """Suspect reports, most recent month first, each with the checks it failed."""
+    matrix = build_matrix(load_report_rows(db, include_archived))
+    values = matrix["values"]
+    if not values.size:
+        return []
+    result = scan_matrix(values)
+    previous = result["previous"]
+
+    flagged = []
+    for p, m in zip(*np.nonzero(result["flagged"])):
+        checks = []
+        for k, metric in enumerate(ANOMALY_METRICS):
+            if result["outlier"][p, m, k]:
+                checks.append(
+                    {
+                        "check": "outlier",
+                        "metric": metric,
+                        "value": _as_number(values[p, m, k]),
+                        "z_score": round(float(result["z"][p, m, k]), 2),
+                    }
+                )
+            if result["jump"][p, m, k]:
+                checks.append(
+                    {
+                        "check": "jump",
+                        "metric": metric,
+                        "value": _as_number(values[p, m, k]),
+                        "previous": _as_number(previous[p, m, k]),
+                        "ratio": round(float(result["ratio"][p, m, k]), 2),
+                    }
+                )
+        for c, (small, large) in enumerate(FUNNEL_CHECKS):
+            if result["funnel"][p, m, c]:
+                checks.append(
+                    {
+                        "check": "funnel",
+                        "metric": small,
+                        "value": _as_number(values[p, m, ANOMALY_METRICS.index(small)]),
+                        "limit_metric": large,
+                        "limit": _as_number(values[p, m, ANOMALY_METRICS.index(large)]),
+                    }
+                )
+        month = matrix["start"] + int(m)
+        flagged.append(
+            {
+                "report_id": int(matrix["ids"][p, m]),
+                "programme_name": matrix["programmes"][p],
+                "reporting_month": date(month // 12, month % 12 + 1, 1).isoformat(),
+                "checks": checks,
+            }
+        )
+    flagged.sort(key=lambda item: (item["reporting_month"], item["programme_name"]), reverse=True)
+    return flagged
@@ -0,0 +1,237 @@
+import glob
+import os
+from datetime import date, datetime
+from typing import Iterator
+from sqlalchemy import extract, func, select, union_all
+from sqlalchemy.orm import Session
+from models import FormSubmission, FormSubmissionArchive, MonthlyReport, MonthlyReportArchive
+from utils.data_version import REPORTS_SCOPE, bump_version
+
+# Reporting years older than this many years (counting the current one) are closed and archived.
+ARCHIVE_KEEP_YEARS = int(os.getenv("ARCHIVE_KEEP_YEARS", "2"))
+# "table" moves rows into *_archive tables; "parquet" moves them into compressed files.
+ARCHIVE_BACKEND = os.getenv("ARCHIVE_BACKEND", "table").lower()
+ARCHIVE_DIR = os.getenv(
+    "ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "archive"),
+)
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+
+class ArchivedYearError(ValueError):
+    """A report write targets a reporting year that has already been archived."""
+
+REPORT_ARCHIVE_COLUMNS = [column.name for column in MonthlyReport.__table__.columns]
+SUBMISSION_ARCHIVE_COLUMNS = [column.name for column in FormSubmission.__table__.columns]
+
+# kind -> (hot model, archive model, columns, year column)
+_KINDS = {
+    "monthly_reports": (MonthlyReport, MonthlyReportArchive, REPORT_ARCHIVE_COLUMNS, "reporting_month"),
+    "form_submissions": (FormSubmission, FormSubmissionArchive, SUBMISSION_ARCHIVE_COLUMNS, "submitted_at"),
+}
+
+
+def _year_bounds(kind: str, year: int):
+    if kind == "form_submissions":
+        return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def _parquet_dir(kind: str, year: int) -> str:
+    return os.path.join(ARCHIVE_DIR, kind, f"year={year}")
+
+
+def _write_parquet(kind: str, year: int, rows: list[dict]) -> str:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("ARCHIVE_BACKEND=parquet requires the 'pyarrow' package")
+
+    directory = _parquet_dir(kind, year)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"part-{rows[0]['id']:012d}-{rows[-1]['id']:012d}.parquet")
+    pq.write_table(pa.Table.from_pylist(rows), path + ".tmp", compression="zstd")
+    return path
+
+
+def closed_years(db: Session, keep_years: int = ARCHIVE_KEEP_YEARS, today: date | None = None) -> list[int]:
+    cutoff = (today or date.today()).year - keep_years
+    oldest = []
+    for model, _, _, year_column in _KINDS.values():
+        value = db.query(func.min(getattr(model, year_column))).scalar()
+        if value is not None:
+            oldest.append(value.year)
+    if not oldest:
+        return []
+    return list(range(min(oldest), cutoff + 1))
+
+
+def _move_batch(db: Session, kind: str, year: int, backend: str) -> int:
+    model, archive_model, columns, year_column = _KINDS[kind]
+    hot = model.__table__
+    start, end = _year_bounds(kind, year)
+    ids = [
+        row[0]
+        for row in db.execute(
+            select(hot.c.id)
+            .where(hot.c[year_column] >= start, hot.c[year_column] < end)
+            .order_by(hot.c.id)
+            .limit(ARCHIVE_BATCH_SIZE)
+        )
+    ]
+    if not ids:
+        return 0
+
+    rows_select = select(*[hot.c[name] for name in columns]).where(hot.c.id.in_(ids)).order_by(hot.c.id)
+    parquet_path = None
+    if backend == "parquet":
+        rows = [dict(row._mapping) for row in db.execute(rows_select)]
+        parquet_path = _write_parquet(kind, year, rows)
+    else:
+        db.execute(archive_model.__table__.insert().from_select(columns, rows_select))
+    db.execute(hot.delete().where(hot.c.id.in_(ids)))
+    bump_version(db, REPORTS_SCOPE)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        if parquet_path:
+            os.remove(parquet_path + ".tmp")
+        raise
+    if parquet_path:
+        # Only publish the file once the rows are gone from the hot table.
+        os.replace(parquet_path + ".tmp", parquet_path)
+    return len(ids)
+
+
+def run_archive(
+    db: Session,
+    keep_years: int = ARCHIVE_KEEP_YEARS,
+    backend: str = ARCHIVE_BACKEND,
+    dry_run: bool = False,
+    today: date | None = None,
+) -> dict:
+    """Move every closed reporting year out of the hot tables, one batch per transaction."""
+    if backend not in ("table", "parquet"):
+        raise ValueError(f"Unsupported archive backend '{backend}'")
+    if keep_years < 1:
+        raise ValueError("keep_years must be at least 1 so the current year stays hot")
+
+    years = {}
+    for year in closed_years(db, keep_years, today):
+        counts = {}
+        for kind, (model, _, _, year_column) in _KINDS.items():
+            start, end = _year_bounds(kind, year)
+            if dry_run:
+                column = getattr(model, year_column)
+                counts[kind] = db.query(func.count(model.id)).filter(column >= start, column < end).scalar()
+                continue
+            moved = 0
+            while True:
+                batch = _move_batch(db, kind, year, backend)
+                if not batch:
+                    break
+                moved += batch
+            counts[kind] = moved
+        if any(counts.values()):
+            years[year] = counts
+
+    return {
+        "cutoff_year": (today or date.today()).year - keep_years,
+        "backend": backend,
+        "dry_run": dry_run,
+        "years": years,
+    }
+
+
+def _source(kind: str, include_archive: bool, name: str):
+    model, archive_model, columns, _ = _KINDS[kind]
+    hot = model.__table__
+    hot_select = select(*[hot.c[column] for column in columns])
+    if not include_archive:
+        return hot_select.subquery(name)
+    archive = archive_model.__table__
+    archive_select = select(*[archive.c[column] for column in columns])
+    return union_all(hot_select, archive_select).subquery(name)
+
+
+def report_source(include_archive: bool = True):
+    """Hot monthly reports, optionally unioned with the archive table, as one subquery."""
+    return _source("monthly_reports", include_archive, "reports")
+
+
+def submission_source(include_archive: bool = True):
+    """Hot form submissions, optionally unioned with the archive table, as one subquery."""
+    return _source("form_submissions", include_archive, "submissions")
+
+
+def parquet_files(kind: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(ARCHIVE_DIR, kind, "year=*", "*.parquet")))
+
+
+def _file_year(path: str) -> int:
+    return int(os.path.basename(os.path.dirname(path)).split("=", 1)[1])
+
+
+def archived_report_years(db: Session, years) -> set[int]:
+    """Which of `years` already have monthly reports in the archive table or Parquet files."""
+    archived = {_file_year(path) for path in parquet_files("monthly_reports")} & set(years)
+    column = MonthlyReportArchive.reporting_month
+    for year in set(years) - archived:
+        start, end = _year_bounds("monthly_reports", year)
+        if db.query(MonthlyReportArchive.id).filter(column >= start, column < end).first() is not None:
+            archived.add(year)
+    return archived
+
+
+def ensure_years_open(db: Session, months) -> None:
+    """Raise ArchivedYearError for writes into an archived year: the archived row cannot be
+    amended in place, and a new hot row for the same month would be counted twice."""
+    archived = archived_report_years(db, {month.year for month in months if month is not None})
+    if archived:
+        years = ", ".join(str(year) for year in sorted(archived))
+        raise ArchivedYearError(f"Reporting year {years} is archived; its reports can no longer be changed")
+
+
+def iter_parquet_rows(kind: str) -> Iterator[dict]:
+    files = parquet_files(kind)
+    if not files:
+        return
+    import pyarrow.parquet as pq
+
+    for path in files:
+        yield from pq.read_table(path).to_pylist()
+
+
+# kind -> (files, rows). Published files are never rewritten, so the file list is the key.
+_parquet_rows_cache: dict[str, tuple[list[str], list[dict]]] = {}
+
+
+def parquet_rows(kind: str) -> list[dict]:
+    """Every Parquet-archived row of `kind`, read once per worker until the files change."""
+    files = parquet_files(kind)
+    cached = _parquet_rows_cache.get(kind)
+    if cached is None or cached[0] != files:
+        cached = _parquet_rows_cache[kind] = (files, list(iter_parquet_rows(kind)))
+    return cached[1]
+
+
+def archive_summary(db: Session) -> dict:
+    summary = {}
+    for kind, (_, archive_model, _, year_column) in _KINDS.items():
+        column = getattr(archive_model, year_column)
+        year = extract("year", column)
+        counts = {
+            int(row_year): {"table": count, "parquet": 0}
+            for row_year, count in db.query(year, func.count(archive_model.id)).group_by(year)
+        }
+        files = parquet_files(kind)
+        if files:
+            import pyarrow.parquet as pq
+
+            for path in files:
+                entry = counts.setdefault(_file_year(path), {"table": 0, "parquet": 0})
+                entry["parquet"] += pq.ParquetFile(path).metadata.num_rows
+        summary[kind] = dict(sorted(counts.items()))
+    return summary
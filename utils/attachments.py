@@ -0,0 +1,309 @@
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from database import SessionLocal
+from models import Attachment
+
+ATTACHMENTS_DIR = os.getenv(
+    "ATTACHMENTS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads"),
+)
+ATTACHMENT_MAX_BYTES = int(os.getenv("ATTACHMENT_MAX_BYTES", str(25 * 1024 * 1024)))
+ATTACHMENT_MAX_FILES = int(os.getenv("ATTACHMENT_MAX_FILES", "10"))
+# Total size of all evidence attached to one report.
+ATTACHMENT_REPORT_QUOTA_BYTES = int(os.getenv("ATTACHMENT_REPORT_QUOTA_BYTES", str(100 * 1024 * 1024)))
+ATTACHMENT_CONTENT_TYPES = tuple(
+    value.strip()
+    for value in os.getenv(
+        "ATTACHMENT_CONTENT_TYPES",
+        "image/,application/pdf,text/csv,application/msword,application/vnd.ms-excel,"
+        "application/vnd.openxmlformats-officedocument.",
+    ).split(",")
+    if value.strip()
+)
+# When set (e.g. "/protected-uploads/"), downloads are handed to nginx via X-Accel-Redirect
+# so the proxy serves the file with sendfile instead of the app.
+ATTACHMENTS_ACCEL_REDIRECT = os.getenv("ATTACHMENTS_ACCEL_REDIRECT", "")
+# Non-file form fields (the JSON payload) are buffered, so they get a small limit.
+MULTIPART_FIELD_MAX_BYTES = 1024 * 1024
+
+
+class AttachmentError(ValueError):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class StoredFile:
+    sha256: str
+    size: int
+    content_type: str
+    filename: str
+    # Blob mtime when this upload finished; a later upload of the same content touches it.
+    mtime_ns: int = 0
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(ATTACHMENTS_DIR, sha256[:2], sha256)
+
+
+def _allowed_content_type(content_type: str) -> bool:
+    return any(
+        content_type == allowed or (allowed.endswith(("/", ".")) and content_type.startswith(allowed))
+        for allowed in ATTACHMENT_CONTENT_TYPES
+    )
+
+
+class _BlobWriter:
+    """Writes one uploaded file to a temp file while hashing it, then moves it into place."""
+
+    def __init__(self, filename: str, content_type: str):
+        self.filename = filename
+        self.content_type = content_type
+        self.size = 0
+        self._hash = hashlib.sha256()
+        tmp_dir = os.path.join(ATTACHMENTS_DIR, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > ATTACHMENT_MAX_BYTES:
+            raise AttachmentError(
+                f"'{self.filename}' is larger than the {ATTACHMENT_MAX_BYTES // (1024 * 1024)} MB limit", 413
+            )
+        self._hash.update(data)
+        self._file.write(data)
+
+    def finish(self) -> StoredFile:
+        self._file.close()
+        sha256 = self._hash.hexdigest()
+        path = blob_path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Blobs are content-addressed, so replacing an existing copy is harmless and there is
+        # no exists-then-write window. The new mtime marks the blob as wanted again.
+        os.replace(self.tmp_path, path)
+        return StoredFile(sha256, self.size, self.content_type, self.filename, os.stat(path).st_mtime_ns)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class _MultipartSink:
+    """python-multipart callbacks: file parts go straight to disk, other fields are buffered."""
+
+    def __init__(self, file_field: str, max_files: int):
+        self.file_field = file_field
+        self.max_files = max_files
+        self.fields: dict[str, str] = {}
+        self.writers: list[_BlobWriter] = []
+        self._headers: dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._field_name = None
+        self._field_value = bytearray()
+        self._writer = None
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._field_name = None
+        self._field_value = bytearray()
+        self._writer = None
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+        if filename is None:
+            self._field_name = name
+            return
+        if name != self.file_field:
+            raise AttachmentError(f"Unexpected file field '{name}'")
+        if len(self.writers) >= self.max_files:
+            raise AttachmentError(f"At most {self.max_files} files can be attached at once", 413)
+        content_type = self._headers.get(b"content-type", b"application/octet-stream").decode("latin-1").lower()
+        display_name = os.path.basename(filename.decode("utf-8", "replace").replace("\\", "/")) or "attachment"
+        if not _allowed_content_type(content_type):
+            raise AttachmentError(f"'{display_name}' has an unsupported file type ({content_type})", 415)
+        self._writer = _BlobWriter(display_name, content_type)
+        self.writers.append(self._writer)
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._writer is not None:
+            self._writer.write(data[start:end])
+            return
+        self._field_value += data[start:end]
+        if len(self._field_value) > MULTIPART_FIELD_MAX_BYTES:
+            raise AttachmentError(f"Form field '{self._field_name}' is too large", 413)
+
+    def on_part_end(self):
+        if self._writer is None and self._field_name is not None:
+            self.fields[self._field_name] = self._field_value.decode("utf-8")
+        self._writer = None
+
+
+async def receive_multipart(
+    request: Request, file_field: str = "files", max_files: int = ATTACHMENT_MAX_FILES
+) -> tuple[dict[str, str], list[StoredFile]]:
+    """Stream a multipart body: files are hashed and written to disk chunk by chunk, never held in memory.
+
+    Returns the plain form fields and the stored files (deduplicated by sha256).
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise AttachmentError("Expected a multipart/form-data body", 415)
+    declared = request.headers.get("content-length")
+    limit = max_files * ATTACHMENT_MAX_BYTES + MULTIPART_FIELD_MAX_BYTES
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise AttachmentError("Upload is larger than the allowed total size", 413)
+
+    sink = _MultipartSink(file_field, max_files)
+    parser = MultipartParser(options[b"boundary"], sink.callbacks())
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                # Disk writes happen off the event loop.
+                await run_in_threadpool(parser.write, chunk)
+        parser.finalize()
+        stored = [writer.finish() for writer in sink.writers]
+    except Exception:
+        for writer in sink.writers:
+            writer.abort()
+        raise
+    return sink.fields, stored
+
+
+async def receive_upload(request: Request) -> tuple[dict[str, str], list[StoredFile]]:
+    """receive_multipart for endpoints: upload problems become HTTP errors."""
+    try:
+        return await receive_multipart(request)
+    except AttachmentError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
+
+
+def parse_payload_field(schema, fields: dict):
+    """Validate the JSON `payload` field of a multipart submission against `schema`."""
+    try:
+        return schema(**json.loads(fields.get("payload") or "{}"))
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors())
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=422, detail="The 'payload' field must be a JSON object"
+        )
+
+
+def discard_unreferenced_blobs(stored: list[StoredFile]):
+    """Remove this request's blobs that no committed attachment points at, e.g. after a
+    failed save or an idempotent replay. Called after every outcome of an upload.
+
+    A blob is kept if any Attachment row references its sha256, or if another upload of the
+    same content has touched it since this one finished (that upload may not have committed
+    yet). Uses its own session: the request's may be mid-rollback.
+    """
+    if not stored:
+        return
+    db = SessionLocal()
+    try:
+        referenced = {
+            row[0]
+            for row in db.query(Attachment.sha256)
+            .filter(Attachment.sha256.in_({item.sha256 for item in stored}))
+            .distinct()
+        }
+    finally:
+        db.close()
+    for item in stored:
+        if item.sha256 in referenced:
+            continue
+        path = blob_path(item.sha256)
+        try:
+            if os.stat(path).st_mtime_ns == item.mtime_ns:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def check_report_quota(db: Session, report_id: int, stored: list[StoredFile]):
+    used = db.query(func.coalesce(func.sum(Attachment.size), 0)).filter(Attachment.report_id == report_id).scalar()
+    incoming = sum(item.size for item in stored)
+    if used + incoming > ATTACHMENT_REPORT_QUOTA_BYTES:
+        raise AttachmentError(
+            f"Attachments for this report would exceed the "
+            f"{ATTACHMENT_REPORT_QUOTA_BYTES // (1024 * 1024)} MB quota",
+            413,
+        )
+
+
+def add_attachments(
+    db: Session,
+    stored: list[StoredFile],
+    report_id: int | None = None,
+    submission_id: int | None = None,
+    uploaded_by: int | None = None,
+) -> list[Attachment]:
+    """Record stored files against a report/submission. Does not commit."""
+    if report_id is not None and stored:
+        check_report_quota(db, report_id, stored)
+    rows = [
+        Attachment(
+            report_id=report_id,
+            submission_id=submission_id,
+            sha256=item.sha256,
+            size=item.size,
+            content_type=item.content_type,
+            filename=item.filename,
+            uploaded_by=uploaded_by,
+        )
+        for item in stored
+    ]
+    db.add_all(rows)
+    db.flush()
+    return rows
+
+
+def attachment_to_dict(attachment: Attachment) -> dict:
+    return {
+        "id": attachment.id,
+        "report_id": attachment.report_id,
+        "submission_id": attachment.submission_id,
+        "filename": attachment.filename,
+        "content_type": attachment.content_type,
+        "size": attachment.size,
+        "sha256": attachment.sha256,
+        "created_at": attachment.created_at.isoformat() if attachment.created_at else None,
+    }
@@ -0,0 +1,169 @@
+"""Briefing rendering, run inside the briefing process pool.
+
+Kept free of database/app imports so spawned workers start quickly; everything needed is
+passed in as plain data collected by utils/briefings.py.
+"""
+import html
+import os
+from utils.pdf import PDFDocument
+
+METRICS = (
+    ("registered", "Youth registered"),
+    ("trained", "Youth trained"),
+    ("funded", "Youth funded"),
+    ("outcomes", "Youth with outcomes"),
+)
+
+
+def _change(current: int, previous: int) -> str:
+    if not previous:
+        return "n/a"
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+
+def _rate(numerator: int, denominator: int) -> str:
+    return f"{numerator / denominator * 100:.1f}%" if denominator else "n/a"
+
+
+def render_html(data: dict) -> str:
+    e = html.escape
+    totals, previous = data["totals"], data["previous"]
+    cards = "".join(
+        f"<div class='card'><div class='label'>{e(label)}</div><div class='value'>{totals[key]:,}</div>"
+        f"<div class='change'>{_change(totals[key], previous[key])} vs previous month</div></div>"
+        for key, label in METRICS
+    )
+    largest = max([row["registered"] for row in data["trend"]] + [1])
+    trend_rows = "".join(
+        f"<tr><td>{e(row['month'])}</td>"
+        f"<td><div class='bar' style='width:{row['registered'] / largest * 100:.1f}%'></div></td>"
+        f"<td>{row['registered']:,}</td><td>{row['trained']:,}</td><td>{row['funded']:,}</td>"
+        f"<td>{row['outcomes']:,}</td></tr>"
+        for row in data["trend"]
+    )
+    programme_rows = "".join(
+        f"<tr><td>{e(row['programme_name'])}</td><td>{e(row['department'] or '')}</td>"
+        f"<td>{row['registered']:,}</td><td>{row['trained']:,}</td><td>{row['funded']:,}</td>"
+        f"<td>{row['outcomes']:,}</td></tr>"
+        for row in data["programmes"]
+    )
+    missing = (
+        "<p class='muted'>Every programme has reported for this month.</p>"
+        if not data["missing"]
+        else "<ul>" + "".join(f"<li>{e(name)}</li>" for name in data["missing"]) + "</ul>"
+    )
+
+    def quotes(items):
+        if not items:
+            return "<p class='muted'>None reported.</p>"
+        return "".join(
+            f"<blockquote><strong>{e(item['programme_name'])}:</strong> {e(item['text'])}</blockquote>" for item in items
+        )
+
+    missing_section = (
+        f"<h2>Programmes yet to report ({len(data['missing'])})</h2>{missing}" if data["programme"] is None else ""
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{e(data['title'])} - {e(data['month'])}</title>
+<style>
+  body {{ font-family: Arial, Helvetica, sans-serif; color: #222; margin: 32px; }}
+  h1 {{ color: #006400; margin-bottom: 4px; }}
+  h2 {{ color: #006400; border-bottom: 2px solid #e0e0e0; padding-bottom: 4px; margin-top: 28px; }}
+  .muted {{ color: #777; }}
+  .cards {{ display: flex; gap: 12px; flex-wrap: wrap; }}
+  .card {{ border: 1px solid #ddd; border-radius: 8px; padding: 12px 16px; min-width: 160px; }}
+  .card .label {{ color: #555; font-size: 13px; }}
+  .card .value {{ font-size: 24px; font-weight: bold; color: #006400; }}
+  .card .change {{ font-size: 12px; color: #777; }}
+  table {{ border-collapse: collapse; width: 100%; font-size: 13px; }}
+  th, td {{ text-align: left; padding: 6px 8px; border-bottom: 1px solid #eee; }}
+  th {{ background: #f4f8f4; }}
+  .bar {{ background: #006400; height: 10px; border-radius: 2px; }}
+  blockquote {{ margin: 8px 0; padding: 8px 12px; background: #f7f7f7; border-left: 4px solid #006400; }}
+</style>
+</head>
+<body>
+<h1>{e(data['title'])}</h1>
+<p class="muted">Reporting month {e(data['month'])} &middot; {data['totals']['reports']} report(s) &middot;
+generated {e(data['generated_at'])}</p>
+<div class="cards">{cards}</div>
+<p>Training rate {_rate(totals['trained'], totals['registered'])} &middot;
+funding rate {_rate(totals['funded'], totals['trained'])} &middot;
+outcome rate {_rate(totals['outcomes'], totals['funded'])}</p>
+<h2>Trend</h2>
+<table><tr><th>Month</th><th style="width:35%">Registered</th><th></th><th>Trained</th><th>Funded</th><th>Outcomes</th></tr>
+{trend_rows}</table>
+<h2>Programmes</h2>
+<table><tr><th>Programme</th><th>Department</th><th>Registered</th><th>Trained</th><th>Funded</th><th>Outcomes</th></tr>
+{programme_rows}</table>
+{missing_section}
+<h2>Challenges</h2>
+{quotes(data['challenges'])}
+<h2>Success stories</h2>
+{quotes(data['success_stories'])}
+</body>
+</html>
+"""
+
+
+def render_pdf(data: dict) -> bytes:
+    totals, previous = data["totals"], data["previous"]
+    doc = PDFDocument()
+    doc.heading(data["title"], size=18)
+    doc.paragraph(
+        f"Reporting month {data['month']} - {totals['reports']} report(s) - generated {data['generated_at']}", size=9
+    )
+
+    doc.heading("Headline figures", size=13)
+    doc.table(
+        ["Metric", "This month", "Previous month", "Change"],
+        [[label, f"{totals[key]:,}", f"{previous[key]:,}", _change(totals[key], previous[key])] for key, label in METRICS],
+        [200, 100, 100, 95],
+    )
+    doc.paragraph(
+        f"Training rate {_rate(totals['trained'], totals['registered'])}, "
+        f"funding rate {_rate(totals['funded'], totals['trained'])}, "
+        f"outcome rate {_rate(totals['outcomes'], totals['funded'])}.",
+        size=10,
+    )
+
+    doc.heading("Youth registered by month", size=13)
+    doc.bars([(row["month"], row["registered"]) for row in data["trend"]])
+
+    doc.heading("Programmes", size=13)
+    doc.table(
+        ["Programme", "Registered", "Trained", "Funded", "Outcomes"],
+        [
+            [row["programme_name"], f"{row['registered']:,}", f"{row['trained']:,}", f"{row['funded']:,}", f"{row['outcomes']:,}"]
+            for row in data["programmes"]
+        ],
+        [215, 70, 70, 70, 70],
+    )
+    if data["programme"] is None:
+        doc.heading(f"Programmes yet to report ({len(data['missing'])})", size=13)
+        doc.paragraph(", ".join(data["missing"]) or "Every programme has reported for this month.")
+
+    for title, items in (("Challenges", data["challenges"]), ("Success stories", data["success_stories"])):
+        doc.heading(title, size=13)
+        if not items:
+            doc.paragraph("None reported.")
+        for item in items:
+            doc.paragraph(item["programme_name"], bold=True)
+            doc.paragraph(item["text"], indent=12)
+    return doc.to_bytes()
+
+
+def render_briefing(data: dict, base_path: str, formats: tuple[str, ...] = ("html", "pdf")) -> list[str]:
+    """Write <base_path>.html/.pdf atomically and return the written paths."""
+    written = []
+    for fmt in formats:
+        content = render_html(data).encode("utf-8") if fmt == "html" else render_pdf(data)
+        path = f"{base_path}.{fmt}"
+        with open(path + ".tmp", "wb") as handle:
+            handle.write(content)
+        os.replace(path + ".tmp", path)
+        written.append(path)
+    return written
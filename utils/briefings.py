@@ -0,0 +1,254 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timezone
+from functools import partial
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from utils.archive import report_source
+from utils.briefing_render import render_briefing
+from utils.data_version import REPORTS_SCOPE, get_version
+from utils.programme_registry import PROGRAMMES_SCOPE, registry
+
+BRIEFINGS_DIR = os.getenv(
+    "BRIEFINGS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "briefings"),
+)
+BRIEFING_WORKERS = int(os.getenv("BRIEFING_WORKERS", "2"))
+# A job with no output after this long is treated as abandoned (e.g. its worker restarted).
+BRIEFING_JOB_TIMEOUT_SECONDS = int(os.getenv("BRIEFING_JOB_TIMEOUT_SECONDS", "300"))
+BRIEFING_CACHE_DAYS = int(os.getenv("BRIEFING_CACHE_DAYS", "30"))
+BRIEFING_FORMATS = ("html", "pdf")
+# Bump when the briefing layout changes so cached files are rendered again.
+BRIEFING_LAYOUT_VERSION = 1
+BRIEFING_TREND_MONTHS = 6
+BRIEFING_MAX_QUOTES = 12
+BRIEFING_QUOTE_CHARS = 600
+
+_pool: ProcessPoolExecutor | None = None
+_jobs: dict[str, Future] = {}
+_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a server process that already runs threads is unsafe.
+        _pool = ProcessPoolExecutor(max_workers=BRIEFING_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def briefing_key(db: Session, month: date, programme: str | None) -> str:
+    """Job id and cache key: changes whenever report or programme data changes."""
+    raw = json.dumps(
+        {
+            "layout": BRIEFING_LAYOUT_VERSION,
+            "reports": get_version(db, REPORTS_SCOPE),
+            "programmes": get_version(db, PROGRAMMES_SCOPE),
+            "month": month.isoformat(),
+            "programme": programme,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _base_path(key: str) -> str:
+    return os.path.join(BRIEFINGS_DIR, key)
+
+
+def _metric_columns(reports):
+    return (
+        func.coalesce(func.sum(reports.c.total_youth_registered), 0),
+        func.coalesce(func.sum(reports.c.youth_trained), 0),
+        func.coalesce(func.sum(reports.c.youth_funded), 0),
+        func.coalesce(func.sum(reports.c.youth_with_outcomes), 0),
+    )
+
+
+def _metrics(row) -> dict:
+    registered, trained, funded, outcomes = (int(value or 0) for value in row)
+    return {"registered": registered, "trained": trained, "funded": funded, "outcomes": outcomes}
+
+
+def collect_briefing_data(db: Session, month: date, programme: str | None) -> dict:
+    reports = report_source()
+    scope = [] if programme is None else [reports.c.programme_name == programme]
+
+    def in_month(start: date):
+        return [reports.c.reporting_month >= start, reports.c.reporting_month < _add_months(start, 1), *scope]
+
+    def totals_for(start: date) -> dict:
+        row = db.execute(select(func.count(), *_metric_columns(reports)).where(*in_month(start))).one()
+        return {**_metrics(row[1:]), "reports": int(row[0])}
+
+    first = _add_months(month, -(BRIEFING_TREND_MONTHS - 1))
+    by_month: dict[tuple[int, int], dict] = {}
+    for row in db.execute(
+        select(reports.c.reporting_month, *_metric_columns(reports))
+        .where(reports.c.reporting_month >= first, reports.c.reporting_month < _add_months(month, 1), *scope)
+        .group_by(reports.c.reporting_month)
+    ):
+        bucket = by_month.setdefault((row[0].year, row[0].month), _metrics((0, 0, 0, 0)))
+        for name, value in _metrics(row[1:]).items():
+            bucket[name] += value
+    trend = []
+    for offset in range(BRIEFING_TREND_MONTHS):
+        current = _add_months(first, offset)
+        figures = by_month.get((current.year, current.month)) or _metrics((0, 0, 0, 0))
+        trend.append({"month": current.strftime("%Y-%m"), **figures})
+
+    programme_rows = db.execute(
+        select(reports.c.programme_name, func.max(reports.c.focal_department), *_metric_columns(reports))
+        .where(*in_month(month))
+        .group_by(reports.c.programme_name)
+        .order_by(reports.c.programme_name)
+    ).all()
+    departments = {p.name: p.department for p in registry.all(db)}
+    programmes = [
+        {
+            "programme_name": row[0],
+            "department": departments.get(row[0]) or row[1],
+            **_metrics(row[2:]),
+        }
+        for row in programme_rows
+    ]
+    reported = {row["programme_name"] for row in programmes}
+    missing = [] if programme is not None else sorted(name for name in departments if name not in reported)
+
+    def quotes(column) -> list[dict]:
+        rows = db.execute(
+            select(reports.c.programme_name, column)
+            .where(*in_month(month), func.length(func.trim(column)) > 0)
+            .order_by(reports.c.programme_name)
+            .limit(BRIEFING_MAX_QUOTES)
+        ).all()
+        return [
+            {"programme_name": name, "text": text if len(text) <= BRIEFING_QUOTE_CHARS else text[:BRIEFING_QUOTE_CHARS] + "..."}
+            for name, text in rows
+        ]
+
+    return {
+        "title": f"Monthly briefing: {programme}" if programme else "Ministry-wide monthly briefing",
+        "month": month.strftime("%Y-%m"),
+        "programme": programme,
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "totals": totals_for(month),
+        "previous": totals_for(_add_months(month, -1)),
+        "trend": trend,
+        "programmes": programmes,
+        "missing": missing,
+        "challenges": quotes(reports.c.challenges),
+        "success_stories": quotes(reports.c.success_story),
+    }
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, payload: dict):
+    with open(path + ".tmp", "w", encoding="utf-8") as handle:
+        json.dump(payload, handle)
+    os.replace(path + ".tmp", path)
+
+
+def output_path(key: str, fmt: str) -> str:
+    return f"{_base_path(key)}.{fmt}"
+
+
+def job_status(key: str) -> dict | None:
+    """Status from the files on disk, so any worker can answer a poll for any job."""
+    base = _base_path(key)
+    meta = _read_json(base + ".json")
+    if meta is None:
+        return None
+    result = {"job_id": key, **meta}
+    if all(os.path.exists(output_path(key, fmt)) for fmt in BRIEFING_FORMATS):
+        return {**result, "status": "done", "formats": list(BRIEFING_FORMATS)}
+    error = _read_json(base + ".error")
+    if error is not None:
+        return {**result, "status": "failed", "error": error.get("error")}
+    running = key in _jobs or time.time() - os.path.getmtime(base + ".json") < BRIEFING_JOB_TIMEOUT_SECONDS
+    if running:
+        return {**result, "status": "running"}
+    return {**result, "status": "failed", "error": "Briefing job was abandoned"}
+
+
+def _finish(key: str, future: Future):
+    with _lock:
+        _jobs.pop(key, None)
+    if future.cancelled():
+        return
+    exc = future.exception()
+    if exc is not None:
+        print(f"Briefing {key} failed: {exc}")
+        _write_json(_base_path(key) + ".error", {"error": str(exc)})
+
+
+def prune_cache(now: float | None = None):
+    cutoff = (now or time.time()) - BRIEFING_CACHE_DAYS * 86400
+    for name in os.listdir(BRIEFINGS_DIR):
+        path = os.path.join(BRIEFINGS_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def request_briefing(db: Session, month: date, programme: str | None = None) -> dict:
+    """Return the cached briefing if one exists for the current data, else start rendering it."""
+    key = briefing_key(db, month, programme)
+    status = job_status(key)
+    if status is not None and status["status"] != "failed":
+        return status
+
+    os.makedirs(BRIEFINGS_DIR, exist_ok=True)
+    prune_cache()
+    data = collect_briefing_data(db, month, programme)
+    base = _base_path(key)
+    if os.path.exists(base + ".error"):
+        os.remove(base + ".error")
+    _write_json(
+        base + ".json",
+        {
+            "month": data["month"],
+            "programme": programme,
+            "requested_at": datetime.now(timezone.utc).isoformat(),
+        },
+    )
+    global _pool
+    with _lock:
+        if key not in _jobs:
+            try:
+                future = _get_pool().submit(render_briefing, data, base, BRIEFING_FORMATS)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a fresh pool.
+                _pool = None
+                future = _get_pool().submit(render_briefing, data, base, BRIEFING_FORMATS)
+            _jobs[key] = future
+            future.add_done_callback(partial(_finish, key))
+    return job_status(key)
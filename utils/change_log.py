@@ -0,0 +1,128 @@
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import bindparam, event, func, select, text
+from sqlalchemy.orm import Session
+from models import AppMeta, ChangeLog
+
+CHANGE_ENTITIES = ("report", "submission", "programme")
+CHANGE_OPS = ("insert", "update", "delete")
+CHANGE_FEED_PAGE_SIZE = int(os.getenv("CHANGE_FEED_PAGE_SIZE", "1000"))
+CHANGE_FEED_MAX_PAGE_SIZE = 10000
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "90"))
+# Highest change seq removed by prune_change_log; older cursors can no longer resume.
+PRUNED_THROUGH_KEY = "change_log_pruned_through"
+# Session.info key: names of tables this transaction wrote rows to that need a seq once
+# it commits (the change log, notifications).
+_PENDING_KEY = "commit_order_pending"
+# One advisory lock per stamped table. Any fixed numbers work; every process just has to
+# use the same ones.
+_STAMP_LOCK_IDS = {"change_log": 7_305_112, "notifications": 7_305_113}
+
+
+def record_changes(db: Session, entity: str, ids, op: str = "update"):
+    """Append one change per id. Does not commit: the entry is written in the same
+    transaction as the change, so the feed never shows a write that rolled back."""
+    ids = sorted(set(ids))
+    if not ids:
+        return
+    changed_at = datetime.now(timezone.utc)
+    db.execute(
+        ChangeLog.__table__.insert(),
+        [{"entity": entity, "entity_id": entity_id, "op": op, "changed_at": changed_at} for entity_id in ids],
+    )
+    mark_unstamped(db, ChangeLog.__table__)
+
+
+def mark_unstamped(db: Session, table) -> None:
+    """Have `table` stamped (stamp_commit_order) once the session's transaction commits."""
+    db.info.setdefault(_PENDING_KEY, set()).add(table.name)
+
+
+def stamp_commit_order(conn, table) -> None:
+    """Number committed rows of `table` that have no seq yet, in id order after the highest
+    seq so far.
+
+    Cursors page by seq, not id: on PostgreSQL ids come from a sequence at INSERT time and
+    a lower id can commit after a higher one, so a cursor over ids could pass a row before
+    it is visible. Stamping happens after commit, one transaction at a time (the advisory
+    lock is held until it commits), so seqs become visible in increasing order.
+    """
+    pending = table.c.seq.is_(None)
+    if conn.dialect.name != "postgresql":
+        # SQLite has one writer at a time, so ids already commit in order.
+        conn.execute(table.update().where(pending).values(seq=table.c.id))
+        return
+    conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _STAMP_LOCK_IDS[table.name]})
+    ids = [row[0] for row in conn.execute(select(table.c.id).where(pending).order_by(table.c.id))]
+    if not ids:
+        return
+    start = conn.execute(select(func.coalesce(func.max(table.c.seq), 0))).scalar()
+    conn.execute(
+        table.update().where(table.c.id == bindparam("row_id")).values(seq=bindparam("row_seq")),
+        [{"row_id": row_id, "row_seq": start + offset} for offset, row_id in enumerate(ids, start=1)],
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _stamp_after_commit(session: Session):
+    for name in sorted(session.info.pop(_PENDING_KEY, ())):
+        try:
+            with session.get_bind().begin() as conn:
+                stamp_commit_order(conn, ChangeLog.metadata.tables[name])
+        except Exception as exc:
+            # Unstamped rows stay out of their feed; the next commit to the table stamps them too.
+            print(f"Error stamping {name}: {exc}")
+
+
+def pruned_through(db: Session) -> int:
+    value = db.query(AppMeta.value).filter(AppMeta.key == PRUNED_THROUGH_KEY).scalar()
+    return int(value) if value else 0
+
+
+def latest_cursor(db: Session) -> int:
+    return db.query(func.max(ChangeLog.seq)).scalar() or 0
+
+
+def read_changes(db: Session, since: int, limit: int = CHANGE_FEED_PAGE_SIZE) -> tuple[list[dict], int, bool]:
+    """Up to `limit` stamped log entries after `since`, folded to one change per record.
+
+    Returns (changes in cursor order, next cursor, has_more). An insert followed by updates
+    in the same page is reported as an insert; anything followed by a delete as a delete.
+    """
+    table = ChangeLog.__table__
+    rows = db.execute(
+        select(table.c.seq, table.c.entity, table.c.entity_id, table.c.op, table.c.changed_at)
+        .where(table.c.seq > since)
+        .order_by(table.c.seq)
+        .limit(limit)
+    ).all()
+    folded: dict[tuple[str, int], dict] = {}
+    for row in rows:
+        key = (row.entity, row.entity_id)
+        change = folded.pop(key, None)
+        if change is None or row.op == "delete":
+            op = row.op
+        else:
+            op = "insert" if change["op"] == "insert" else row.op
+        # Re-inserting moves the record to its latest position in the page.
+        folded[key] = {"seq": row.seq, "entity": row.entity, "id": row.entity_id, "op": op, "changed_at": row.changed_at}
+    cursor = rows[-1].seq if rows else since
+    return list(folded.values()), cursor, len(rows) == limit
+
+
+def prune_change_log(db: Session, retention_days: int = CHANGE_LOG_RETENTION_DAYS) -> int:
+    """Delete log entries older than the retention window and remember the highest id
+    removed, so a client resuming from before it is told to resync. Commits."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    table = ChangeLog.__table__
+    through = db.query(func.max(ChangeLog.seq)).filter(ChangeLog.changed_at < cutoff).scalar()
+    if not through:
+        return 0
+    deleted = db.execute(table.delete().where(table.c.seq <= through)).rowcount
+    meta = db.query(AppMeta).filter(AppMeta.key == PRUNED_THROUGH_KEY).first()
+    if meta:
+        meta.value = str(max(through, int(meta.value or 0)))
+    else:
+        db.add(AppMeta(key=PRUNED_THROUGH_KEY, value=str(through)))
+    db.commit()
+    return deleted
@@ -0,0 +1,50 @@
+import threading
+from collections import OrderedDict
+from sqlalchemy.orm import Session
+from models import DataVersion
+from utils.upsert import dialect_insert
+
+REPORTS_SCOPE = "reports"
+# Bumped by utils/themes.py; lives here so callers can key caches without importing numpy.
+THEMES_SCOPE = "challenge_themes"
+
+
+def bump_version(db: Session, scope: str):
+    """Increment the version counter for a data scope. Does not commit, so the bump
+    lands atomically with the write it describes."""
+    table = DataVersion.__table__
+    stmt = dialect_insert(db, table).values(scope=scope, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope"],
+        set_={"version": table.c.version + 1},
+    )
+    db.execute(stmt)
+
+
+def get_version(db: Session, scope: str) -> int:
+    version = db.query(DataVersion.version).filter(DataVersion.scope == scope).scalar()
+    return version or 0
+
+
+class VersionedCache:
+    """Small LRU of computed results that are only valid for one data version."""
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: int, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, version: int, key, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
@@ -1,12 +1,13 @@
 import json
 import os
+import queue
 import smtplib
-import urllib.request
-import urllib.error
+import threading
+import time
+import uuid
 from email.message import EmailMessage
-from dotenv import load_dotenv
-
-load_dotenv()
+from utils.http_pool import IDEMPOTENCY_HEADER, HTTPConnectionPool
+from utils.throttle import CircuitBreaker, TokenBucket
 
 SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
@@ -21,49 +22,101 @@ EMAILJS_SERVICE_ID = os.getenv("EMAILJS_SERVICE_ID")
 EMAILJS_TEMPLATE_ID = os.getenv("EMAILJS_TEMPLATE_ID")
 EMAILJS_PUBLIC_KEY = os.getenv("EMAILJS_PUBLIC_KEY")
 EMAILJS_PRIVATE_KEY = os.getenv("EMAILJS_PRIVATE_KEY")
+# Base URLs are overridable so scripts/mock_email_provider.py can stand in for the real APIs.
+RESEND_API_URL = os.getenv("RESEND_API_URL", "https://api.resend.com")
+EMAILJS_API_URL = os.getenv("EMAILJS_API_URL", "https://api.emailjs.com")
+RESEND_BATCH_SIZE = 100  # Resend's per-request limit for /emails/batch
+EMAIL_POOL_SIZE = int(os.getenv("EMAIL_POOL_SIZE", "4"))
+EMAIL_TIMEOUT_SECONDS = float(os.getenv("EMAIL_TIMEOUT_SECONDS", "15"))
+# On shutdown, how long queued notices may keep the worker alive while they are sent.
+EMAIL_DRAIN_SECONDS = float(os.getenv("EMAIL_DRAIN_SECONDS", "20"))
 
+# Ordered failover chain, e.g. "resend,smtp,console". Defaults to the single EMAIL_BACKEND.
+EMAIL_BACKENDS = [
+    name.strip().lower() for name in os.getenv("EMAIL_BACKENDS", EMAIL_BACKEND).split(",") if name.strip()
+]
+EMAIL_BREAKER_THRESHOLD = int(os.getenv("EMAIL_BREAKER_THRESHOLD", "3"))
+EMAIL_BREAKER_RESET_SECONDS = float(os.getenv("EMAIL_BREAKER_RESET_SECONDS", "30"))
+# How long a send may wait for a throttled backend before trying the next one.
+EMAIL_THROTTLE_WAIT_SECONDS = float(os.getenv("EMAIL_THROTTLE_WAIT_SECONDS", "1"))
+# Provider API calls per second (Resend allows 2/s by default, EmailJS 1/s).
+EMAIL_RATE_LIMITS = {"resend": 2.0, "emailjs": 1.0, "http": 1.0, "smtp": 5.0}
+for _item in os.getenv("EMAIL_RATE_LIMITS", "").split(","):
+    if "=" in _item:
+        _name, _rate = _item.split("=", 1)
+        EMAIL_RATE_LIMITS[_name.strip().lower()] = float(_rate)
 
-def _send_resend(to_email: str, subject: str, body: str) -> tuple[bool, str | None]:
+MISSING_RECIPIENT = "Recipient email is missing"
+
+_resend_pool = HTTPConnectionPool(RESEND_API_URL, maxsize=EMAIL_POOL_SIZE, timeout=EMAIL_TIMEOUT_SECONDS)
+_emailjs_pool = HTTPConnectionPool(EMAILJS_API_URL, maxsize=EMAIL_POOL_SIZE, timeout=EMAIL_TIMEOUT_SECONDS)
+
+
+def _post_json(pool: HTTPConnectionPool, path: str, payload, provider: str, headers: dict | None = None) -> tuple[bool, str | None]:
+    data = json.dumps(payload).encode("utf-8")
+    try:
+        status, body = pool.request(
+            "POST",
+            path,
+            body=data,
+            headers={"Content-Type": "application/json", **(headers or {})},
+        )
+    except Exception as exc:
+        return False, str(exc)
+    if 200 <= status < 300:
+        return True, None
+    detail = body.decode("utf-8", errors="ignore")
+    return False, f"{provider} API error {status}{': ' + detail if detail else ''}"
+
+
+def _check_resend(to_email: str) -> str | None:
     if not RESEND_API_KEY:
-        return False, "RESEND_API_KEY is not configured"
+        return "RESEND_API_KEY is not configured"
     if not RESEND_FROM:
-        return False, "RESEND_FROM is not configured"
+        return "RESEND_FROM is not configured"
     if not to_email:
-        return False, "Recipient email is missing"
+        return MISSING_RECIPIENT
+    return None
 
-    payload = {
+
+def _resend_message(to_email: str, subject: str, body: str) -> dict:
+    return {
         "from": RESEND_FROM,
         "to": [to_email],
         "subject": subject,
         "text": body,
     }
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        "https://api.resend.com/emails",
-        data=data,
-        method="POST",
-        headers={
-            "Authorization": f"Bearer {RESEND_API_KEY}",
-            "Content-Type": "application/json",
-        },
+
+
+def _resend_headers() -> dict:
+    # Resend drops a repeat of the same key for 24 hours, so the pool may resend the call
+    # after a stale keep-alive connection without the recipient getting the email twice.
+    return {"Authorization": f"Bearer {RESEND_API_KEY}", IDEMPOTENCY_HEADER: uuid.uuid4().hex}
+
+
+def _send_resend(to_email: str, subject: str, body: str) -> tuple[bool, str | None]:
+    error = _check_resend(to_email)
+    if error:
+        return False, error
+    return _post_json(_resend_pool, "/emails", _resend_message(to_email, subject, body), "Resend", headers=_resend_headers())
+
+
+def _send_resend_batch(messages: list[tuple[str, str, str]]) -> list[tuple[bool, str | None]]:
+    """Send up to RESEND_BATCH_SIZE messages in one call to Resend's batch endpoint."""
+    results = [(False, _check_resend(to_email)) for to_email, _, _ in messages]
+    valid = [i for i, (_, error) in enumerate(results) if error is None]
+    if not valid:
+        return results
+    sent, error = _post_json(
+        _resend_pool,
+        "/emails/batch",
+        [_resend_message(*messages[i]) for i in valid],
+        "Resend",
+        headers=_resend_headers(),
     )
-    try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            if 200 <= resp.status < 300:
-                return True, None
-            try:
-                detail = resp.read().decode("utf-8", errors="ignore")
-            except Exception:
-                detail = ""
-            return False, f"Resend API responded with status {resp.status}{': ' + detail if detail else ''}"
-    except urllib.error.HTTPError as exc:
-        try:
-            detail = exc.read().decode("utf-8", errors="ignore")
-        except Exception:
-            detail = ""
-        return False, f"Resend API error {exc.code}{': ' + detail if detail else ''}"
-    except Exception as exc:
-        return False, str(exc)
+    for i in valid:
+        results[i] = (sent, error)
+    return results
 
 
 def _send_emailjs(to_email: str, subject: str, body: str) -> tuple[bool, str | None]:
@@ -74,7 +127,7 @@ def _send_emailjs(to_email: str, subject: str, body: str) -> tuple[bool, str | N
     if not EMAILJS_PUBLIC_KEY:
         return False, "EMAILJS_PUBLIC_KEY is not configured"
     if not to_email:
-        return False, "Recipient email is missing"
+        return False, MISSING_RECIPIENT
 
     payload = {
         "service_id": EMAILJS_SERVICE_ID,
@@ -89,66 +142,252 @@ def _send_emailjs(to_email: str, subject: str, body: str) -> tuple[bool, str | N
     if EMAILJS_PRIVATE_KEY:
         payload["accessToken"] = EMAILJS_PRIVATE_KEY
 
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        "https://api.emailjs.com/api/v1.0/email/send",
-        data=data,
-        method="POST",
-        headers={"Content-Type": "application/json"},
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            if 200 <= resp.status < 300:
-                return True, None
-            try:
-                detail = resp.read().decode("utf-8", errors="ignore")
-            except Exception:
-                detail = ""
-            return False, f"EmailJS API responded with status {resp.status}{': ' + detail if detail else ''}"
-    except urllib.error.HTTPError as exc:
-        try:
-            detail = exc.read().decode("utf-8", errors="ignore")
-        except Exception:
-            detail = ""
-        return False, f"EmailJS API error {exc.code}{': ' + detail if detail else ''}"
-    except Exception as exc:
-        return False, str(exc)
+    return _post_json(_emailjs_pool, "/api/v1.0/email/send", payload, "EmailJS")
 
 
-def send_email(to_email: str, subject: str, body: str) -> tuple[bool, str | None]:
-    """Send an email using the configured backend."""
-    if EMAIL_BACKEND == "console":
-        print(f"--- EMAIL to: {to_email} ---\nSubject: {subject}\n\n{body}\n--- END EMAIL ---")
-        return True, None
-
-    if EMAIL_BACKEND == "resend":
-        return _send_resend(to_email, subject, body)
-
-    if EMAIL_BACKEND in ("emailjs", "http"):
-        return _send_emailjs(to_email, subject, body)
-
-    if EMAIL_BACKEND != "smtp":
-        return False, f"Unsupported EMAIL_BACKEND '{EMAIL_BACKEND}'"
-
-    if not SMTP_HOST:
-        return False, "SMTP_HOST is not configured"
-    if not to_email:
-        return False, "Recipient email is missing"
-
+def _smtp_message(to_email: str, subject: str, body: str) -> EmailMessage:
     msg = EmailMessage()
     msg["Subject"] = subject
     msg["From"] = FROM_EMAIL
     msg["To"] = to_email
     msg.set_content(body)
+    return msg
+
 
+def _send_smtp_many(messages: list[tuple[str, str, str]]) -> list[tuple[bool, str | None]]:
+    """Send several messages over a single SMTP session."""
+    if not SMTP_HOST:
+        return [(False, "SMTP_HOST is not configured")] * len(messages)
+
+    results = []
     try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=15) as smtp:
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=EMAIL_TIMEOUT_SECONDS) as smtp:
             if SMTP_USE_TLS:
                 smtp.starttls()
             if SMTP_USERNAME and SMTP_PASSWORD:
                 smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
-            smtp.send_message(msg)
-        return True, None
+            for to_email, subject, body in messages:
+                if not to_email:
+                    results.append((False, MISSING_RECIPIENT))
+                    continue
+                try:
+                    smtp.send_message(_smtp_message(to_email, subject, body))
+                    results.append((True, None))
+                except smtplib.SMTPRecipientsRefused as exc:
+                    results.append((False, str(exc)))
     except Exception as exc:
         print("Failed to send email:", exc)
-        return False, str(exc)
+        results.extend([(False, str(exc))] * (len(messages) - len(results)))
+    return results
+
+
+def _send_console(to_email: str, subject: str, body: str) -> tuple[bool, str | None]:
+    print(f"--- EMAIL to: {to_email} ---\nSubject: {subject}\n\n{body}\n--- END EMAIL ---")
+    return True, None
+
+
+def _send_smtp(to_email: str, subject: str, body: str) -> tuple[bool, str | None]:
+    if not to_email:
+        return False, MISSING_RECIPIENT
+    return _send_smtp_many([(to_email, subject, body)])[0]
+
+
+# name -> (single sender, batch sender or None, max messages per batch call)
+_SENDERS = {
+    "console": (_send_console, None, 1),
+    "resend": (_send_resend, _send_resend_batch, RESEND_BATCH_SIZE),
+    "emailjs": (_send_emailjs, None, 1),
+    "http": (_send_emailjs, None, 1),
+    "smtp": (_send_smtp, _send_smtp_many, 100),
+}
+
+
+class _Backend:
+    """One provider in the failover chain with its own breaker, throttle and stats."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.send_one, self.send_batch, self.batch_size = _SENDERS[name]
+        rate = EMAIL_RATE_LIMITS.get(name)
+        self.bucket = TokenBucket(rate) if rate else None
+        self.breaker = CircuitBreaker(EMAIL_BREAKER_THRESHOLD, EMAIL_BREAKER_RESET_SECONDS)
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "skipped_open": 0,
+            "skipped_throttled": 0,
+            "messages_sent": 0,
+            "total_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+            "last_error": None,
+        }
+
+    def _count(self, key: str, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def send(self, messages: list[tuple[str, str, str]]) -> list[tuple[bool, str | None]] | None:
+        """Send one batch; returns None when the backend is skipped or fails as a whole."""
+        if not self.breaker.allow():
+            self._count("skipped_open")
+            return None
+        if self.bucket and not self.bucket.acquire(timeout=EMAIL_THROTTLE_WAIT_SECONDS):
+            # Nothing was sent, so a half-open trial must not be used up here.
+            self.breaker.release()
+            self._count("skipped_throttled")
+            return None
+
+        started = time.perf_counter()
+        try:
+            if self.send_batch and len(messages) > 1:
+                results = self.send_batch(messages)
+            else:
+                results = [self.send_one(*message) for message in messages]
+        except Exception as exc:
+            results = [(False, str(exc))] * len(messages)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        # A missing recipient is the caller's problem, not the provider's: never fail over on it.
+        provider_failed = all(not sent for sent, _ in results) and any(
+            error != MISSING_RECIPIENT for _, error in results
+        )
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["total_latency_ms"] += latency_ms
+            self.stats["max_latency_ms"] = max(self.stats["max_latency_ms"], latency_ms)
+            if provider_failed:
+                self.stats["failures"] += 1
+                self.stats["last_error"] = next(error for sent, error in results if error != MISSING_RECIPIENT)
+            else:
+                self.stats["successes"] += 1
+                self.stats["messages_sent"] += sum(1 for sent, _ in results if sent)
+        if provider_failed:
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+        return results
+
+    def health(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        total_latency_ms = stats.pop("total_latency_ms")
+        stats["avg_latency_ms"] = round(total_latency_ms / stats["calls"], 1) if stats["calls"] else None
+        stats["max_latency_ms"] = round(stats["max_latency_ms"], 1)
+        return {
+            "backend": self.name,
+            "state": self.breaker.state,
+            "rate_limit_per_second": self.bucket.rate if self.bucket else None,
+            **stats,
+        }
+
+
+def _build_chain() -> list[_Backend]:
+    chain = []
+    for name in EMAIL_BACKENDS:
+        if name in _SENDERS:
+            chain.append(_Backend(name))
+        else:
+            print(f"Ignoring unsupported email backend '{name}'")
+    return chain
+
+
+_chain = _build_chain()
+
+
+def send_many(messages: list[tuple[str, str, str]]) -> list[tuple[bool, str | None]]:
+    """Send (to_email, subject, body) messages with as few provider calls as possible.
+
+    Backends in EMAIL_BACKENDS are tried in order. Resend messages go through the batch
+    endpoint in chunks of RESEND_BATCH_SIZE and SMTP messages share a session; a chunk a
+    backend cannot deliver (open breaker, throttled, or failed) moves on to the next
+    backend. Results are returned in the same order as messages.
+    """
+    if not messages:
+        return []
+    if not _chain:
+        return [(False, f"Unsupported EMAIL_BACKEND '{EMAIL_BACKEND}'")] * len(messages)
+
+    results: list[tuple[bool, str | None] | None] = [None] * len(messages)
+    pending = list(range(len(messages)))
+    for backend in _chain:
+        if not pending:
+            break
+        undelivered = []
+        for start in range(0, len(pending), backend.batch_size):
+            chunk = pending[start:start + backend.batch_size]
+            outcome = backend.send([messages[i] for i in chunk])
+            if outcome is None:
+                undelivered.extend(chunk)
+                continue
+            for i, result in zip(chunk, outcome):
+                results[i] = result
+        pending = undelivered
+
+    if pending:
+        errors = [b.stats["last_error"] for b in _chain if b.stats["last_error"]]
+        error = errors[-1] if errors else "All email backends are unavailable"
+        for i in pending:
+            results[i] = (False, error)
+    return results
+
+
+def send_email(to_email: str, subject: str, body: str) -> tuple[bool, str | None]:
+    """Send an email using the configured backend chain."""
+    return send_many([(to_email, subject, body)])[0]
+
+
+# Notices nobody waits on (e.g. import summaries) are sent by one background thread per
+# worker, so the request returns first. drain_outbox() flushes it on shutdown.
+_outbox: queue.Queue = queue.Queue()
+_outbox_thread: threading.Thread | None = None
+_outbox_lock = threading.Lock()
+
+
+def _outbox_worker():
+    while True:
+        item = _outbox.get()
+        try:
+            if item is None:
+                return
+            messages, label = item
+            for (to_email, _, _), (sent, error) in zip(messages, send_many(messages)):
+                if not sent:
+                    print(f"Failed to send {label} to {to_email}: {error}")
+        except Exception as exc:
+            print(f"Error sending queued email: {exc}")
+        finally:
+            _outbox.task_done()
+
+
+def queue_emails(messages: list[tuple[str, str, str]], label: str = "email"):
+    """Send (to_email, subject, body) messages in the background; failures are only logged."""
+    global _outbox_thread
+    if not messages:
+        return
+    with _outbox_lock:
+        if _outbox_thread is None or not _outbox_thread.is_alive():
+            _outbox_thread = threading.Thread(target=_outbox_worker, name="email-outbox", daemon=True)
+            _outbox_thread.start()
+        _outbox.put((messages, label))
+
+
+def drain_outbox(timeout: float = EMAIL_DRAIN_SECONDS) -> int:
+    """Send everything queued so far, waiting at most `timeout` seconds. Returns the number
+    of batches still unsent (lost when the process exits)."""
+    with _outbox_lock:
+        thread = _outbox_thread
+        if thread is None or not thread.is_alive():
+            return _outbox.qsize()
+        _outbox.put(None)
+    thread.join(timeout)
+    # The stop marker is not a batch.
+    left = _outbox.qsize() - (1 if thread.is_alive() else 0)
+    if left:
+        print(f"Shutting down with {left} queued email batch(es) unsent")
+    return left
+
+
+def email_health() -> list[dict]:
+    return [backend.health() for backend in _chain]
@@ -0,0 +1,262 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+import orjson
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import LiveEvent, MonthlyReport
+
+# "local" fans events out inside this process only (single worker);
+# "db" writes them to the live_events table so every worker's poller picks them up.
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "local").lower()
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", "1"))
+EVENTS_RETENTION_SECONDS = int(os.getenv("EVENTS_RETENTION_SECONDS", "3600"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+# Streams are closed after this long and the browser reconnects with Last-Event-ID, so a
+# worker can drain on shutdown/redeploy and connections rebalance across workers.
+EVENTS_STREAM_MAX_SECONDS = float(os.getenv("EVENTS_STREAM_MAX_SECONDS", "300"))
+# Events a reconnecting client can catch up on before it is told to resync.
+EVENTS_REPLAY_LIMIT = 500
+# Ids below the newest one seen that are re-read on each poll, so a transaction that
+# committed after a later id (PostgreSQL sequences) is not skipped.
+_REORDER_WINDOW = 100
+
+# Dashboard stat -> report column, matching GET /reports/dashboard.
+DASHBOARD_TOTALS = (
+    ("total_youth_registered", "total_youth_registered"),
+    ("total_trained", "youth_trained"),
+    ("total_youth_funded", "youth_funded"),
+    ("total_youth_with_outcomes", "youth_with_outcomes"),
+)
+
+
+def format_sse(event_id, kind: str, data: dict) -> bytes:
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {kind}")
+    lines.append("data: " + orjson.dumps(data).decode("utf-8"))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class Subscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, user_id: int, is_admin: bool):
+        self.loop = loop
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, events: list[tuple]):
+        # Runs on the subscriber's event loop.
+        for item in events:
+            try:
+                self.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # A stalled client gets one resync instead of an unbounded backlog.
+                self.overflowed = True
+                return
+
+    def wants(self, kind: str, data: dict) -> bool:
+        if self.is_admin:
+            return True
+        if kind == "report":
+            return data["report"].get("submitted_by") == self.user_id
+        return kind in ("reports_changed", "resync")
+
+
+class EventBus:
+    """Fans committed events out to every SSE connection in this worker."""
+
+    def __init__(self):
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        # Local ids start from the boot time so a reconnect after a restart is detected as a gap.
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._recent: deque = deque(maxlen=EVENTS_REPLAY_LIMIT)
+        self._poller: asyncio.Task | None = None
+        self._cursor = None
+        self._seen: OrderedDict = OrderedDict()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, user_id: int, is_admin: bool) -> Subscription:
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(loop, user_id, is_admin)
+        with self._lock:
+            self._subscribers.add(subscription)
+        if EVENTS_BACKEND == "db" and (self._poller is None or self._poller.done()):
+            self._poller = loop.create_task(self._poll())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def broadcast(self, events: list[tuple]):
+        """Deliver (id, kind, data) tuples to all subscribers; safe to call from any thread."""
+        if not events:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, events)
+            except RuntimeError:
+                # The subscriber's loop has shut down.
+                self.unsubscribe(subscription)
+
+    def publish_local(self, items: list[tuple[str, dict]]):
+        events = [(next(self._ids), kind, data) for kind, data in items]
+        with self._lock:
+            self._recent.extend(events)
+        self.broadcast(events)
+
+    def replay(self, last_event_id: str) -> list[tuple] | None:
+        """Events after `last_event_id`, or None if some were lost and the client must resync."""
+        try:
+            after = int(last_event_id)
+        except (TypeError, ValueError):
+            return None
+        if EVENTS_BACKEND == "db":
+            return _replay_from_db(after)
+        with self._lock:
+            recent = list(self._recent)
+        if not recent:
+            return None
+        if after < recent[0][0] - 1 or after > recent[-1][0]:
+            return None
+        return [item for item in recent if item[0] > after]
+
+    async def _poll(self):
+        # One query per interval per worker, however many dashboards are connected.
+        from starlette.concurrency import run_in_threadpool
+
+        last_prune = 0.0
+        while self._subscribers:
+            try:
+                events = await run_in_threadpool(self._fetch_new)
+                self.broadcast(events)
+                if time.monotonic() - last_prune > 60:
+                    last_prune = time.monotonic()
+                    await run_in_threadpool(prune_events)
+            except Exception as exc:
+                print(f"Live event poll failed: {exc}")
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+
+    def _fetch_new(self) -> list[tuple]:
+        db = SessionLocal()
+        try:
+            if self._cursor is None:
+                # Start from the newest event; anything already in the table predates us.
+                self._cursor = db.query(func.coalesce(func.max(LiveEvent.id), 0)).scalar()
+                for (event_id,) in db.query(LiveEvent.id).filter(LiveEvent.id > self._cursor - _REORDER_WINDOW):
+                    self._seen[event_id] = None
+                return []
+            rows = (
+                db.query(LiveEvent.id, LiveEvent.kind, LiveEvent.payload)
+                .filter(LiveEvent.id > self._cursor - _REORDER_WINDOW)
+                .order_by(LiveEvent.id)
+                .all()
+            )
+        finally:
+            db.close()
+        events = []
+        for event_id, kind, payload in rows:
+            if event_id in self._seen:
+                continue
+            self._seen[event_id] = None
+            events.append((event_id, kind, orjson.loads(payload)))
+        if events:
+            self._cursor = max(self._cursor, events[-1][0])
+        while len(self._seen) > _REORDER_WINDOW * 2:
+            self._seen.popitem(last=False)
+        return events
+
+
+bus = EventBus()
+
+
+def _replay_from_db(after: int) -> list[tuple] | None:
+    db = SessionLocal()
+    try:
+        oldest = db.query(func.min(LiveEvent.id)).scalar()
+        if oldest is None or after < oldest - 1:
+            return None
+        rows = (
+            db.query(LiveEvent.id, LiveEvent.kind, LiveEvent.payload)
+            .filter(LiveEvent.id > after)
+            .order_by(LiveEvent.id)
+            .limit(EVENTS_REPLAY_LIMIT + 1)
+            .all()
+        )
+    finally:
+        db.close()
+    if len(rows) > EVENTS_REPLAY_LIMIT:
+        return None
+    return [(event_id, kind, orjson.loads(payload)) for event_id, kind, payload in rows]
+
+
+def prune_events(now: datetime | None = None):
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(seconds=EVENTS_RETENTION_SECONDS)
+    db = SessionLocal()
+    try:
+        db.query(LiveEvent).filter(LiveEvent.created_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def publish(db: Session, kind: str, data: dict):
+    """Queue a live event on the session; it is only delivered if the transaction commits."""
+    if EVENTS_BACKEND == "db":
+        db.add(LiveEvent(kind=kind, payload=orjson.dumps(data).decode("utf-8")))
+    else:
+        db.info.setdefault("live_events", []).append((kind, data))
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_after_commit(session: Session):
+    pending = session.info.pop("live_events", None)
+    if pending:
+        bus.publish_local(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session):
+    session.info.pop("live_events", None)
+
+
+def report_totals(db: Session, programme_name: str, reporting_month) -> dict | None:
+    """Current dashboard figures of one report, read before it is amended."""
+    row = (
+        db.query(*[getattr(MonthlyReport, column) for _, column in DASHBOARD_TOTALS])
+        .filter(MonthlyReport.programme_name == programme_name, MonthlyReport.reporting_month == reporting_month)
+        .first()
+    )
+    if row is None:
+        return None
+    return {stat: value or 0 for (stat, _), value in zip(DASHBOARD_TOTALS, row)}
+
+
+def _report_payload(report: MonthlyReport) -> dict:
+    payload = {}
+    for column in MonthlyReport.__table__.columns:
+        value = getattr(report, column.name)
+        payload[column.name] = value.isoformat() if hasattr(value, "isoformat") else value
+    return payload
+
+
+def publish_report(db: Session, before: dict | None, report: MonthlyReport):
+    """Push a new or amended report with the change it makes to the dashboard totals."""
+    payload = _report_payload(report)
+    totals = {"total_reports": 0 if before else 1}
+    for stat, column in DASHBOARD_TOTALS:
+        totals[stat] = (payload[column] or 0) - ((before or {}).get(stat) or 0)
+    publish(db, "report", {"report": payload, "totals": totals, "created": before is None})
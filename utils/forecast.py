@@ -0,0 +1,137 @@
+import os
+from datetime import date
+import numpy as np
+from sqlalchemy.orm import Session
+from utils.anomalies import ANOMALY_METRICS, build_matrix, load_report_rows
+from utils.programme_registry import registry
+
+# Months of history (ending at the latest report) each linear trend is fitted on.
+FORECAST_HISTORY_MONTHS = int(os.getenv("FORECAST_HISTORY_MONTHS", "24"))
+FORECAST_MAX_HORIZON = 24
+
+# (output name, report column, Programme target column)
+FORECAST_METRICS = (
+    ("registered", "total_youth_registered", "target_registered"),
+    ("trained", "youth_trained", "target_trained"),
+    ("funded", "youth_funded", "target_funded"),
+)
+
+
+def _month_label(index: int) -> str:
+    return date(index // 12, index % 12 + 1, 1).strftime("%Y-%m")
+
+
+def fit_linear(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Least-squares line y = intercept + slope * t along axis 1 of a programme x month x metric
+    array, ignoring NaN months. Every series is solved at once from its normal equations;
+    series with a single point get a flat line through it."""
+    months = values.shape[1]
+    present = ~np.isnan(values)
+    weight = present.astype(float)
+    y = np.where(present, values, 0.0)
+    t = np.arange(months, dtype=float)[None, :, None]
+
+    n = weight.sum(axis=1)
+    st = (weight * t).sum(axis=1)
+    stt = (weight * t * t).sum(axis=1)
+    sy = y.sum(axis=1)
+    sty = (y * t).sum(axis=1)
+    # Batched 2x2 systems [[n, st], [st, stt]] @ [intercept, slope] = [sy, sty].
+    normal = np.stack([np.stack([n, st], axis=-1), np.stack([st, stt], axis=-1)], axis=-2)
+    rhs = np.stack([sy, sty], axis=-1)
+    solvable = np.abs(np.linalg.det(normal)) > 1e-9
+    normal[~solvable] = np.eye(2)
+    rhs[~solvable] = 0.0
+    solution = np.linalg.solve(normal, rhs[..., None])[..., 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(n > 0, sy / n, np.nan)
+    intercept = np.where(solvable, solution[..., 0], mean)
+    slope = np.where(solvable, solution[..., 1], 0.0)
+    return intercept, slope
+
+
+def project(values: np.ndarray, start: int, months: np.ndarray) -> dict:
+    """Linear and seasonal-naive (same month last year) projections for the absolute month
+    indexes in `months`, shaped programme x len(months) x metric and clipped at zero."""
+    history = values[:, -FORECAST_HISTORY_MONTHS:]
+    offset = values.shape[1] - history.shape[1]
+    intercept, slope = fit_linear(history)
+    t = (months - start - offset).astype(float)[None, :, None]
+    linear = np.maximum(intercept[:, None, :] + slope[:, None, :] * t, 0.0)
+
+    # Seasonal-naive: last year's figure for the same month, linear where there is none.
+    previous_year = months - start - 12
+    seasonal = np.full(linear.shape, np.nan)
+    known = (previous_year >= 0) & (previous_year < values.shape[1])
+    seasonal[:, known] = values[:, previous_year[known]]
+    seasonal = np.where(np.isnan(seasonal), linear, seasonal)
+    return {"linear": linear, "seasonal": seasonal, "slope": slope}
+
+
+def _round(value) -> int | None:
+    return None if value is None or np.isnan(value) else int(round(float(value)))
+
+
+def build_forecast(db: Session, year: int, horizon: int = 6, programme: str | None = None) -> list[dict]:
+    """Per-programme trend projections for `year` compared with each programme's annual targets,
+    plus the next `horizon` months after the latest report."""
+    metric_columns = [ANOMALY_METRICS.index(column) for _, column, _ in FORECAST_METRICS]
+    matrix = build_matrix(load_report_rows(db))
+    values = matrix["values"][..., metric_columns]
+    if not values.size:
+        return []
+    start = matrix["start"]
+    last = start + values.shape[1] - 1
+    year_months = np.arange(year * 12, year * 12 + 12)
+    ahead = np.arange(last + 1, last + 1 + horizon)
+    fitted = project(values, start, np.concatenate([year_months, ahead]))
+
+    # Reported months of `year` count as actuals; the rest of the year comes from the projections.
+    in_range = (year_months >= start) & (year_months <= last)
+    actual = np.full((values.shape[0], 12, values.shape[2]), np.nan)
+    actual[:, in_range] = values[:, year_months[in_range] - start]
+    reported = ~np.isnan(actual)
+    actual_total = np.where(reported, actual, 0.0).sum(axis=1)
+    year_totals = {
+        method: np.where(reported, actual, fitted[method][:, :12]).sum(axis=1) for method in ("linear", "seasonal")
+    }
+
+    records = {record.name: record for record in registry.all(db)}
+    result = []
+    for p, name in enumerate(matrix["programmes"]):
+        if programme and name != programme:
+            continue
+        record = records.get(name)
+        metrics = {}
+        for k, (metric, _, target_column) in enumerate(FORECAST_METRICS):
+            target = getattr(record, target_column) if record else None
+            projected = _round(year_totals["linear"][p, k])
+            metrics[metric] = {
+                "actual_to_date": _round(actual_total[p, k]),
+                "projected_linear": projected,
+                "projected_seasonal": _round(year_totals["seasonal"][p, k]),
+                "trend_per_month": round(float(fitted["slope"][p, k]), 2),
+                "target": target,
+                "projected_pct_of_target": round(projected / target * 100, 1) if target and projected is not None else None,
+                "on_track": projected >= target if target and projected is not None else None,
+                "next_months": [
+                    {
+                        "month": _month_label(int(month)),
+                        "linear": _round(fitted["linear"][p, 12 + i, k]),
+                        "seasonal": _round(fitted["seasonal"][p, 12 + i, k]),
+                    }
+                    for i, month in enumerate(ahead)
+                ],
+            }
+        result.append(
+            {
+                "programme_name": name,
+                "department": record.department if record else None,
+                "year": year,
+                "months_reported": int(reported[p, :, 0].sum()),
+                "latest_report": _month_label(last - int(np.argmax(~np.isnan(values[p, ::-1, 0])))),
+                "metrics": metrics,
+            }
+        )
+    result.sort(key=lambda item: item["programme_name"])
+    return result
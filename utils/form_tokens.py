@@ -4,9 +4,6 @@ import hmac
 import json
 import os
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-
-load_dotenv()
 
 TOKEN_TTL_HOURS = int(os.getenv("FORM_TOKEN_TTL_HOURS", "72"))
 FORM_TOKEN_ONE_TIME = os.getenv("FORM_TOKEN_ONE_TIME", "true").lower() in ("1", "true", "yes")
@@ -0,0 +1,117 @@
+import http.client
+import queue
+import select
+import threading
+from urllib.parse import urlsplit
+
+# Errors that mean a kept-alive connection was closed by the server between requests.
+_STALE_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError, http.client.CannotSendRequest)
+# Requests the server may receive twice without a second effect.
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def _is_dropped(conn: http.client.HTTPConnection) -> bool:
+    # An idle keep-alive socket only turns readable when the server has closed it (or sent
+    # something unasked); either way it cannot carry the next request.
+    if conn.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class HTTPConnectionPool:
+    """Keep-alive connections to a single origin, shared across threads.
+
+    Each provider gets one pool so consecutive messages reuse the TCP/TLS session
+    instead of paying a new handshake per request.
+    """
+
+    def __init__(self, base_url: str, maxsize: int = 4, timeout: float = 15):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.connections_opened += 1
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _checkout(self) -> tuple[http.client.HTTPConnection, bool]:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._new_connection(), False
+            if not _is_dropped(conn):
+                return conn, True
+            conn.close()
+
+    def _checkin(self, conn: http.client.HTTPConnection):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, method: str, path: str, body: bytes | None = None, headers: dict | None = None) -> tuple[int, bytes]:
+        """Send a request and return (status, body).
+
+        A reused connection the server had already closed is retried once on a new one, but
+        only when a resend cannot repeat the request: it failed while being sent (so the
+        server never got all of it), or the method is idempotent, or it carries an
+        Idempotency-Key the server dedupes on. A POST that was sent and then lost its
+        response may have been processed, so it is not resent.
+        """
+        conn, reused = self._checkout()
+        sent = False
+        try:
+            try:
+                self._send(conn, method, path, body, headers)
+                sent = True
+                return self._receive(conn)
+            except _STALE_ERRORS:
+                conn.close()
+                if not reused or (sent and not self._safe_to_resend(method, headers)):
+                    raise
+                conn = self._new_connection()
+                self._send(conn, method, path, body, headers)
+                return self._receive(conn)
+        except Exception:
+            conn.close()
+            raise
+
+    @staticmethod
+    def _safe_to_resend(method: str, headers: dict | None) -> bool:
+        return method.upper() in _IDEMPOTENT_METHODS or any(
+            name.lower() == IDEMPOTENCY_HEADER.lower() for name in headers or {}
+        )
+
+    def _send(self, conn, method, path, body, headers):
+        conn.request(method, self.base_path + path, body=body, headers=headers or {})
+
+    def _receive(self, conn) -> tuple[int, bytes]:
+        resp = conn.getresponse()
+        data = resp.read()
+        if resp.will_close:
+            conn.close()
+        else:
+            self._checkin(conn)
+        return resp.status, data
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
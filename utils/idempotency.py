@@ -0,0 +1,21 @@
+import json
+from sqlalchemy.orm import Session
+from models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def get_stored_response(db: Session, scope: str, key: str) -> dict | None:
+    entry = (
+        db.query(IdempotencyKey)
+        .filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        .first()
+    )
+    if not entry:
+        return None
+    return json.loads(entry.response)
+
+
+def store_response(db: Session, scope: str, key: str, response: dict):
+    # Added to the caller's transaction so the response is only recorded if the write commits.
+    db.add(IdempotencyKey(scope=scope, key=key, response=json.dumps(response, default=str)))
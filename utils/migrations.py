@@ -1,5 +1,19 @@
-from sqlalchemy import text
+import os
+from contextlib import contextmanager
+from sqlalchemy import inspect, select, text
 from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev servers only
+    fcntl = None
+
+# Bump when a step in migrate() changes, so running workers and the deploy script re-run it.
+SCHEMA_VERSION = 5
+SCHEMA_VERSION_KEY = "schema_version"
+# Any fixed number works; every process just has to use the same one.
+_MIGRATION_LOCK_ID = 7_305_111
 
 
 def _sqlite_has_column(engine: Engine, table_name: str, column_name: str) -> bool:
@@ -23,9 +37,247 @@ def ensure_programme_columns(engine: Engine, is_sqlite: bool):
     columns_to_add = [
         ("description", "TEXT"),
         ("recipient_email", "VARCHAR"),
+        ("target_registered", "INTEGER"),
+        ("target_trained", "INTEGER"),
+        ("target_funded", "INTEGER"),
     ]
     for column_name, column_type in columns_to_add:
         if not checks(engine, "programmes", column_name):
-            with engine.connect() as conn:
+            # SQLAlchemy 1.4 connections have no commit(); begin() commits on exit.
+            with engine.begin() as conn:
                 conn.execute(text(f"ALTER TABLE programmes ADD COLUMN {column_name} {column_type}"))
-                conn.commit()
+
+
+def _ensure_seq_column(engine: Engine, is_sqlite: bool, table_name: str):
+    # Rows from before the commit-order cursor: their ids were the cursors clients hold,
+    # so seq starts out equal to id.
+    checks = _sqlite_has_column if is_sqlite else _postgres_has_column
+    if not checks(engine, table_name, "seq"):
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN seq INTEGER"))
+            conn.execute(text(f"UPDATE {table_name} SET seq = id"))
+
+
+def ensure_change_log_seq(engine: Engine, is_sqlite: bool):
+    _ensure_seq_column(engine, is_sqlite, "change_log")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_change_log_seq ON change_log (seq)"))
+
+
+def ensure_notification_seq(engine: Engine, is_sqlite: bool):
+    _ensure_seq_column(engine, is_sqlite, "notifications")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_notifications_seq ON notifications (seq)"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_notifications_user_id_seq ON notifications (user_id, seq)"
+        ))
+        # Feeds used to page on (user_id, id).
+        conn.execute(text("DROP INDEX IF EXISTS ix_notifications_user_id_id"))
+
+
+def merge_duplicate_reports(engine: Engine) -> int:
+    """Collapse monthly reports that share a programme and month (any day in the month) into
+    the newest one, moving it to day 1. Attachments of the dropped reports move to the kept
+    one; their partner and theme rows are deleted, since those index the kept report's text.
+    Returns the number of reports removed."""
+    from sqlalchemy.orm import Session
+    from models import MonthlyReport, ReportPartner, ReportTheme
+    from utils.change_log import record_changes
+    from utils.data_version import REPORTS_SCOPE, bump_version
+    from utils.upsert import merge_reports, report_recency
+
+    reports = MonthlyReport.__table__
+    derived = (ReportPartner.__table__, ReportTheme.__table__)
+    db = Session(bind=engine)
+    try:
+        groups: dict[tuple, list] = {}
+        for row in db.execute(
+            select(reports.c.id, reports.c.programme_name, reports.c.reporting_month, reports.c.created_at)
+        ):
+            groups.setdefault((row.programme_name, row.reporting_month.replace(day=1)), []).append(row)
+
+        dropped: dict[int, int] = {}
+        moved: list[tuple[int, object]] = []
+        for (_, month), members in groups.items():
+            members.sort(key=report_recency)
+            kept = members[-1]
+            dropped.update({row.id: kept.id for row in members[:-1]})
+            if kept.reporting_month != month:
+                moved.append((kept.id, month))
+        if not dropped and not moved:
+            return 0
+
+        merge_reports(db, dropped)
+        for report_id, month in moved:
+            for table in (reports, *derived):
+                key = table.c.id if table is reports else table.c.report_id
+                db.execute(table.update().where(key == report_id).values(reporting_month=month))
+        record_changes(db, "report", [report_id for report_id, _ in moved])
+        bump_version(db, REPORTS_SCOPE)
+        db.commit()
+    finally:
+        db.close()
+    for report_id, kept_id in sorted(dropped.items()):
+        print(f"Merged duplicate report {report_id} into report {kept_id}")
+    if moved:
+        print(f"Moved {len(moved)} report(s) to the first day of their month")
+    return len(dropped)
+
+
+def reclassify_report_partners(engine: Engine) -> int:
+    """Bring indexed partners in line with the current utils.partners categories. Returns
+    the number of partner rows whose category changed."""
+    from sqlalchemy.orm import Session
+    from utils.data_version import REPORTS_SCOPE, bump_version
+    from utils.partners import reclassify_partners
+
+    db = Session(bind=engine)
+    try:
+        updated = reclassify_partners(db)
+        if updated:
+            # Cached /reports/partners results are keyed on the reports data version.
+            bump_version(db, REPORTS_SCOPE)
+        db.commit()
+    finally:
+        db.close()
+    if updated:
+        print(f"Reclassified {updated} partner row(s)")
+    return updated
+
+
+def ensure_report_unique_index(engine: Engine):
+    # Tables created before the (programme_name, reporting_month) constraint need the
+    # matching unique index for ON CONFLICT upserts to work; without it every report
+    # write fails, so the migration must not carry on.
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_monthly_reports_programme_month "
+                "ON monthly_reports (programme_name, reporting_month)"
+            ))
+    except DBAPIError as exc:
+        raise RuntimeError(
+            f"Could not create unique index on monthly_reports (programme_name, reporting_month): {exc}"
+        ) from exc
+
+
+def has_report_unique_index(engine: Engine) -> bool:
+    """Whether monthly_reports has the unique (programme_name, reporting_month) key that
+    report upserts target, as a constraint or as a separately created index."""
+    inspector = inspect(engine)
+    key = {"programme_name", "reporting_month"}
+    try:
+        constraints = inspector.get_unique_constraints("monthly_reports")
+        indexes = inspector.get_indexes("monthly_reports")
+    except DBAPIError:
+        return False
+    return any(set(item["column_names"]) == key for item in constraints) or any(
+        item.get("unique") and set(item["column_names"]) == key for item in indexes
+    )
+
+
+def schema_version(engine: Engine) -> int:
+    """Version recorded by the last completed migrate(); 0 for a new or older database."""
+    try:
+        with engine.connect() as conn:
+            value = conn.execute(
+                text("SELECT value FROM app_meta WHERE key = :key"), {"key": SCHEMA_VERSION_KEY}
+            ).scalar()
+    except DBAPIError:
+        # app_meta does not exist yet.
+        return 0
+    return int(value) if value else 0
+
+
+@contextmanager
+def migration_lock(engine: Engine):
+    """Let one process at a time run deploy steps: workers booting together would otherwise
+    race create_all and the catalogue inserts. PostgreSQL uses an advisory lock; SQLite a
+    lock file next to the database."""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _MIGRATION_LOCK_ID})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _MIGRATION_LOCK_ID})
+        return
+    database = engine.url.database
+    if fcntl is None or not database or database == ":memory:":
+        yield
+        return
+    with open(os.path.abspath(database) + ".migrate.lock", "w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def migrate(engine: Engine):
+    # Imported here so the schema check above stays usable without loading every model.
+    import models  # noqa: F401  (registers the tables on Base)
+    from database import Base
+
+    Base.metadata.create_all(bind=engine)
+    ensure_programme_columns(engine, engine.dialect.name == "sqlite")
+    ensure_change_log_seq(engine, engine.dialect.name == "sqlite")
+    ensure_notification_seq(engine, engine.dialect.name == "sqlite")
+    merge_duplicate_reports(engine)
+    ensure_report_unique_index(engine)
+    reclassify_report_partners(engine)
+    # Only reached when every step succeeded; a failed step raises, so the next boot or
+    # deploy retries instead of trusting a half-migrated database.
+    with engine.begin() as conn:
+        updated = conn.execute(
+            text("UPDATE app_meta SET value = :value WHERE key = :key"),
+            {"key": SCHEMA_VERSION_KEY, "value": str(SCHEMA_VERSION)},
+        ).rowcount
+        if not updated:
+            conn.execute(
+                text("INSERT INTO app_meta (key, value) VALUES (:key, :value)"),
+                {"key": SCHEMA_VERSION_KEY, "value": str(SCHEMA_VERSION)},
+            )
+
+
+def prepare_database(engine: Engine, session_factory, force: bool = False) -> dict:
+    """Deploy-phase work: schema migrations and the programme catalogue sync.
+
+    When nothing is pending this costs one schema-version lookup and a catalogue checksum
+    compare, so workers can call it on boot; otherwise the work runs under migration_lock
+    and is re-checked once the lock is held, so only the first process does it.
+    """
+    from utils.programme_catalogue import catalogue_changed, sync_if_changed
+
+    result = {"migrated": False, "catalogue": None}
+    if not force and schema_version(engine) >= SCHEMA_VERSION:
+        db = session_factory()
+        try:
+            if not catalogue_changed(db):
+                return result
+        except Exception:
+            # Unreadable catalogue: let the sync below report it.
+            db.rollback()
+        finally:
+            db.close()
+
+    with migration_lock(engine):
+        if force or schema_version(engine) < SCHEMA_VERSION:
+            migrate(engine)
+            result["migrated"] = True
+            print(f"Database schema migrated to v{SCHEMA_VERSION}")
+        db = session_factory()
+        try:
+            result["catalogue"] = sync_if_changed(db)
+        except Exception as exc:
+            db.rollback()
+            print(f"Error syncing programme catalogue: {exc}")
+        finally:
+            db.close()
+    catalogue = result["catalogue"]
+    if catalogue:
+        print(
+            f"Programme catalogue v{catalogue['version']} synced: "
+            f"{len(catalogue['inserted'])} added, {len(catalogue['updated'])} updated, {len(catalogue['renamed'])} renamed, {len(catalogue['merged'])} merged"
+        )
+    return result
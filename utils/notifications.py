@@ -0,0 +1,142 @@
+import json
+import os
+from datetime import datetime, timezone
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models import Notification, NotificationCounter, User
+from utils.change_log import mark_unstamped
+from utils.upsert import dialect_insert
+
+NOTIFICATION_PAGE_SIZE = int(os.getenv("NOTIFICATION_PAGE_SIZE", "20"))
+NOTIFICATION_MAX_PAGE_SIZE = 100
+# Longest a GET /notifications/?since=...&wait=... request is held open, and how often it rechecks.
+NOTIFICATION_LONG_POLL_SECONDS = float(os.getenv("NOTIFICATION_LONG_POLL_SECONDS", "25"))
+NOTIFICATION_POLL_SECONDS = float(os.getenv("NOTIFICATION_POLL_SECONDS", "1"))
+
+# Body text longer than this is cut in the feed; the link leads to the full record.
+_BODY_LIMIT = 1000
+
+
+def _adjust_unread(db: Session, deltas: dict[int, int]):
+    """Add to (or subtract from) each user's unread counter, creating missing rows."""
+    if not deltas:
+        return
+    table = NotificationCounter.__table__
+    stmt = dialect_insert(db, table)
+    stmt = stmt.on_conflict_do_update(index_elements=["user_id"], set_={"unread": table.c.unread + stmt.excluded.unread})
+    db.execute(stmt, [{"user_id": user_id, "unread": delta} for user_id, delta in deltas.items()])
+
+
+def notify_users(
+    db: Session,
+    user_ids,
+    kind: str,
+    title: str,
+    body: str | None = None,
+    link: str | None = None,
+    data: dict | None = None,
+) -> int:
+    """Write one notification per user and bump their unread counters. Does not commit,
+    so the notification lands in the same transaction as the change it reports."""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return 0
+    if body and len(body) > _BODY_LIMIT:
+        body = body[: _BODY_LIMIT - 3] + "..."
+    payload = json.dumps(data, default=str) if data is not None else None
+    db.execute(
+        Notification.__table__.insert(),
+        [
+            {"user_id": user_id, "kind": kind, "title": title, "body": body, "link": link, "data": payload}
+            for user_id in user_ids
+        ],
+    )
+    # Feeds page by seq, which is stamped once this transaction commits.
+    mark_unstamped(db, Notification.__table__)
+    _adjust_unread(db, {user_id: 1 for user_id in user_ids})
+    return len(user_ids)
+
+
+def notify_admins(db: Session, kind: str, title: str, body: str | None = None, link: str | None = None, data: dict | None = None) -> int:
+    admin_ids = [row.id for row in db.query(User.id).filter(User.role == "admin")]
+    return notify_users(db, admin_ids, kind, title, body, link, data)
+
+
+def unread_count(db: Session, user_id: int) -> int:
+    unread = db.query(NotificationCounter.unread).filter(NotificationCounter.user_id == user_id).scalar()
+    return unread or 0
+
+
+def latest_seq(db: Session, user_id: int) -> int:
+    """Newest feed cursor for the user (0 if none); an index-only lookup for long polls."""
+    return db.query(func.max(Notification.seq)).filter(Notification.user_id == user_id).scalar() or 0
+
+
+def _to_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "seq": row.seq,
+        "kind": row.kind,
+        "title": row.title,
+        "body": row.body,
+        "link": row.link,
+        "data": json.loads(row.data) if row.data else None,
+        "read": row.read_at is not None,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def list_notifications(
+    db: Session,
+    user_id: int,
+    before: int | None = None,
+    since: int | None = None,
+    limit: int = NOTIFICATION_PAGE_SIZE,
+    unread_only: bool = False,
+) -> list[dict]:
+    """Keyset page of a user's feed by seq: newest first below `before`, or oldest first
+    above `since`. Notifications whose transaction has not been stamped yet are left out."""
+    table = Notification.__table__
+    query = select(table).where(table.c.user_id == user_id, table.c.seq.isnot(None))
+    if unread_only:
+        query = query.where(table.c.read_at.is_(None))
+    if since is not None:
+        # Ascending so a client that stops at `limit` can resume from the last seq it got.
+        query = query.where(table.c.seq > since).order_by(table.c.seq)
+    else:
+        if before is not None:
+            query = query.where(table.c.seq < before)
+        query = query.order_by(table.c.seq.desc())
+    return [_to_dict(row) for row in db.execute(query.limit(limit))]
+
+
+def mark_read(db: Session, user_id: int, ids: list[int] | None = None, up_to: int | None = None) -> int:
+    """Mark unread notifications read and lower the counter by the number changed. Does not commit."""
+    table = Notification.__table__
+    query = table.update().where(table.c.user_id == user_id, table.c.read_at.is_(None))
+    if ids is not None:
+        query = query.where(table.c.id.in_(ids))
+    elif up_to is not None:
+        query = query.where(table.c.seq <= up_to)
+    changed = db.execute(query.values(read_at=datetime.now(timezone.utc))).rowcount
+    if changed:
+        _adjust_unread(db, {user_id: -changed})
+    return changed
+
+
+def notify_report_submitted(db: Session, report, source: str = "dashboard") -> int:
+    """In-app notice to every admin for a new or amended report, plus a separate
+    "challenges" notice when the report lists challenges. Does not commit."""
+    month = report.reporting_month.strftime("%Y-%m") if report.reporting_month else ""
+    via = " via the public form" if source == "form" else ""
+    body = (
+        f"{report.programme_name} ({report.focal_department or 'no department'}) reported for {month}{via}: "
+        f"{report.total_youth_registered} registered, {report.youth_trained} trained."
+    )
+    data = {"report_id": report.id, "programme_name": report.programme_name, "reporting_month": month}
+    count = notify_admins(db, "report_submitted", f"New report: {report.programme_name}", body, "/admin.html", data)
+    if report.challenges and report.challenges.strip():
+        count += notify_admins(
+            db, "challenges", f"Challenges reported: {report.programme_name}", report.challenges.strip(), "/admin.html", data
+        )
+    return count
@@ -0,0 +1,146 @@
+import re
+from datetime import date
+from typing import Iterable
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models import ReportPartner
+
+# (category, keywords) matched as whole words against the lower-cased partner name. The
+# more specific categories come first, and multi-word keywords are tried before single
+# words, so "World Bank" is development, not private, and "Federal Polytechnic" academic.
+PARTNER_CATEGORIES = (
+    ("development", ("development partner", "donor", "undp", "unicef", "world bank", "usaid", "giz")),
+    ("academic", ("academic", "university", "polytechnic", "college", "school")),
+    ("government", ("government", "ministry", "agency", "agencies", "federal")),
+    ("ngo", ("ngo", "cbo", "civil society", "foundation", "non-profit", "nonprofit")),
+    ("private", ("private", "company", "bank", "ltd", "plc")),
+)
+OTHER_CATEGORY = "other"
+CATEGORY_NAMES = tuple(name for name, _ in PARTNER_CATEGORIES) + (OTHER_CATEGORY,)
+PARTNER_NAME_MAX = 200
+TOP_PARTNERS = 20
+
+_SEPARATORS = re.compile(r"[,;\n]+")
+# (category, whole-word pattern), multi-word keywords first, then in category order.
+_KEYWORD_PATTERNS = [
+    (category, re.compile(rf"\b{re.escape(keyword)}\b"))
+    for _, _, category, keyword in sorted(
+        (-len(keyword.split()), order, category, keyword)
+        for order, (category, keywords) in enumerate(PARTNER_CATEGORIES)
+        for keyword in keywords
+    )
+]
+
+
+def classify_partner(name: str) -> str:
+    lowered = name.lower()
+    for category, pattern in _KEYWORD_PATTERNS:
+        if pattern.search(lowered):
+            return category
+    return OTHER_CATEGORY
+
+
+def parse_partnerships(text: str | None) -> list[tuple[str, str]]:
+    """Split the free-text partnerships field into (name, category) pairs, one per partner."""
+    partners = {}
+    for part in _SEPARATORS.split(text or ""):
+        name = " ".join(part.split())[:PARTNER_NAME_MAX]
+        if name and name.lower() not in partners:
+            partners[name.lower()] = (name, classify_partner(name))
+    return list(partners.values())
+
+
+def replace_partners(db: Session, reports: Iterable) -> int:
+    """Rewrite the partner rows of each report. `reports` yields objects or rows with id,
+    programme_name, reporting_month and partnerships. Does not commit."""
+    reports = list(reports)
+    if not reports:
+        return 0
+    table = ReportPartner.__table__
+    db.execute(table.delete().where(table.c.report_id.in_([report.id for report in reports])))
+    rows = [
+        {
+            "report_id": report.id,
+            "programme_name": report.programme_name,
+            "reporting_month": report.reporting_month,
+            "name": name,
+            "category": category,
+        }
+        for report in reports
+        for name, category in parse_partnerships(report.partnerships)
+    ]
+    if rows:
+        db.execute(table.insert(), rows)
+    return len(rows)
+
+
+def reclassify_partners(db: Session) -> int:
+    """Re-run classify_partner over the indexed partner names after the categories change,
+    updating only rows whose category moved. Returns the rows updated. Does not commit."""
+    table = ReportPartner.__table__
+    updated = 0
+    for name, category in db.execute(select(table.c.name, table.c.category).distinct()).all():
+        new_category = classify_partner(name)
+        if new_category != category:
+            updated += db.execute(
+                table.update().where(table.c.name == name, table.c.category == category).values(category=new_category)
+            ).rowcount
+    return updated
+
+
+def partner_summary(
+    db: Session,
+    programme: str | None = None,
+    start_month: date | None = None,
+    end_month: date | None = None,
+    include_archived: bool = False,
+    submitted_by: int | None = None,
+) -> dict:
+    # utils.archive imports the upsert helpers that call into this module.
+    from utils.archive import report_source
+
+    partners = ReportPartner.__table__
+    query = select(partners.c.category, partners.c.name, partners.c.report_id, partners.c.programme_name)
+    if not include_archived or submitted_by is not None:
+        reports = report_source(include_archive=include_archived)
+        query = query.join(reports, reports.c.id == partners.c.report_id)
+        if submitted_by is not None:
+            query = query.where(reports.c.submitted_by == submitted_by)
+    if programme:
+        query = query.where(partners.c.programme_name == programme)
+    if start_month:
+        query = query.where(partners.c.reporting_month >= start_month)
+    if end_month:
+        query = query.where(partners.c.reporting_month <= end_month)
+    scoped = query.subquery("partners")
+
+    by_category = {
+        category: {"category": category, "partners": 0, "reports": 0, "programmes": 0}
+        for category in CATEGORY_NAMES
+    }
+    for category, count, reports_count, programmes_count in db.execute(
+        select(
+            scoped.c.category,
+            func.count(),
+            func.count(func.distinct(scoped.c.report_id)),
+            func.count(func.distinct(scoped.c.programme_name)),
+        ).group_by(scoped.c.category)
+    ):
+        by_category[category] = {
+            "category": category,
+            "partners": int(count),
+            "reports": int(reports_count),
+            "programmes": int(programmes_count),
+        }
+
+    name_key = func.lower(scoped.c.name)
+    top = db.execute(
+        select(func.min(scoped.c.name), func.min(scoped.c.category), func.count())
+        .group_by(name_key)
+        .order_by(func.count().desc(), name_key)
+        .limit(TOP_PARTNERS)
+    ).all()
+    return {
+        "categories": list(by_category.values()),
+        "top_partners": [{"name": name, "category": category, "reports": int(count)} for name, category, count in top],
+    }
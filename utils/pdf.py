@@ -0,0 +1,156 @@
+"""Minimal PDF writer for generated documents (briefings).
+
+Supports A4 pages with Helvetica text, filled rectangles and lines, plus a few flow helpers
+(headings, wrapped paragraphs, tables, horizontal bars). Text is encoded as WinAnsi, so
+characters outside Latin-1 are replaced.
+"""
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+# Average Helvetica glyph width as a fraction of the font size, used for wrapping.
+_AVG_CHAR_WIDTH = 0.5
+
+
+def _escape(text: str) -> str:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _color(rgb: tuple[float, float, float]) -> str:
+    return " ".join(f"{c:.3f}" for c in rgb)
+
+
+def wrap(text: str, width: float, size: float) -> list[str]:
+    max_chars = max(1, int(width / (size * _AVG_CHAR_WIDTH)))
+    lines = []
+    for paragraph in (text or "").splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            while len(word) > max_chars:
+                if line:
+                    lines.append(line)
+                    line = ""
+                lines.append(word[:max_chars])
+                word = word[max_chars:]
+            candidate = f"{line} {word}" if line else word
+            if len(candidate) > max_chars:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+class PDFDocument:
+    def __init__(self, margin: float = 50):
+        self.margin = margin
+        self.pages: list[list[str]] = []
+        self.y = 0.0
+        self.new_page()
+
+    @property
+    def content_width(self) -> float:
+        return PAGE_WIDTH - 2 * self.margin
+
+    def new_page(self):
+        self.pages.append([])
+        self.y = PAGE_HEIGHT - self.margin
+
+    def _ensure_space(self, height: float):
+        if self.y - height < self.margin:
+            self.new_page()
+
+    # Drawing primitives (PDF coordinates: origin bottom-left)
+    def text(self, x: float, y: float, value: str, size: float = 10, bold: bool = False, rgb=(0, 0, 0)):
+        font = "F2" if bold else "F1"
+        self.pages[-1].append(
+            f"BT {_color(rgb)} rg /{font} {size} Tf {x:.2f} {y:.2f} Td ({_escape(value)}) Tj ET"
+        )
+
+    def rect(self, x: float, y: float, width: float, height: float, rgb=(0, 0, 0)):
+        self.pages[-1].append(f"{_color(rgb)} rg {x:.2f} {y:.2f} {width:.2f} {height:.2f} re f")
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, rgb=(0.8, 0.8, 0.8), width: float = 0.5):
+        self.pages[-1].append(f"{_color(rgb)} RG {width} w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S")
+
+    # Flow helpers (advance self.y)
+    def heading(self, value: str, size: float = 16, rgb=(0, 0.39, 0)):
+        self._ensure_space(size + 12)
+        self.y -= size + 4
+        self.text(self.margin, self.y, value, size=size, bold=True, rgb=rgb)
+        self.y -= 8
+
+    def paragraph(self, value: str, size: float = 10, bold: bool = False, indent: float = 0):
+        for line in wrap(value, self.content_width - indent, size):
+            self._ensure_space(size + 4)
+            self.y -= size + 4
+            self.text(self.margin + indent, self.y, line, size=size, bold=bold)
+        self.y -= 4
+
+    def table(self, header: list[str], rows: list[list], widths: list[float], size: float = 9):
+        """Single-line cells; values are truncated to fit their column."""
+        row_height = size + 8
+
+        def draw_row(values, bold):
+            self._ensure_space(row_height)
+            self.y -= row_height
+            x = self.margin
+            for value, width in zip(values, widths):
+                cell = wrap(str(value if value is not None else ""), width - 6, size)[0]
+                self.text(x + 3, self.y + 5, cell, size=size, bold=bold)
+                x += width
+            self.line(self.margin, self.y, self.margin + sum(widths), self.y)
+
+        draw_row(header, True)
+        for row in rows:
+            draw_row(row, False)
+        self.y -= 8
+
+    def bars(self, items: list[tuple[str, float]], size: float = 9, rgb=(0, 0.39, 0)):
+        """Horizontal bar per (label, value), scaled to the largest value."""
+        label_width = 120
+        bar_space = self.content_width - label_width - 60
+        largest = max([value for _, value in items] + [1])
+        for label, value in items:
+            self._ensure_space(size + 8)
+            self.y -= size + 8
+            self.text(self.margin, self.y + 2, wrap(label, label_width - 6, size)[0], size=size)
+            width = bar_space * (value / largest) if value > 0 else 0
+            self.rect(self.margin + label_width, self.y, max(width, 0.5), size + 2, rgb=rgb)
+            self.text(self.margin + label_width + width + 4, self.y + 2, f"{value:,.0f}", size=size)
+        self.y -= 8
+
+    def to_bytes(self) -> bytes:
+        objects = [
+            "<< /Type /Catalog /Pages 2 0 R >>",
+            None,  # page tree, filled in once page ids are known
+            "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        ]
+        page_ids = []
+        for index, commands in enumerate(self.pages, start=1):
+            footer = f"BT 0.5 0.5 0.5 rg /F1 8 Tf {PAGE_WIDTH - self.margin - 40:.2f} 25 Td (Page {index}) Tj ET"
+            stream = "\n".join(commands + [footer]).encode("latin-1")
+            objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode("latin-1") + stream + b"\nendstream")
+            content_id = len(objects)
+            objects.append(
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>"
+            )
+            page_ids.append(len(objects))
+        kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+        objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"
+
+        out = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(out))
+            body = body if isinstance(body, bytes) else body.encode("latin-1")
+            out += f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n"
+        xref = len(out)
+        out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+        for offset in offsets:
+            out += f"{offset:010d} 00000 n \n".encode("latin-1")
+        out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+        return bytes(out)
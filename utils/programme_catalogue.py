@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import (
+    AppMeta,
+    FormSubmission,
+    FormSubmissionArchive,
+    FormToken,
+    MonthlyReport,
+    MonthlyReportArchive,
+    Programme,
+    ReportPartner,
+    ReportTheme,
+)
+from utils.change_log import record_changes
+from utils.data_version import REPORTS_SCOPE, bump_version
+from utils.programme_registry import PROGRAMMES_SCOPE
+from utils.upsert import merge_reports, report_recency, upsert_statement
+
+CATALOGUE_PATH = os.getenv(
+    "PROGRAMME_CATALOGUE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "programmes.json"),
+)
+CATALOGUE_HASH_KEY = "programme_catalogue_sha256"
+# Admin-managed programme fields an alias row hands to the catalogue row when that has none.
+_ADMIN_FIELDS = ("description", "recipient_email", "target_registered", "target_trained", "target_funded")
+
+
+def load_catalogue(path: str = CATALOGUE_PATH) -> tuple[dict, str]:
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    catalogue = json.loads(raw)
+    names = [entry["name"] for entry in catalogue["programmes"]]
+    if len(names) != len(set(names)):
+        raise ValueError("Programme catalogue contains duplicate names")
+    return catalogue, hashlib.sha256(raw).hexdigest()
+
+
+def _stored_hash(db: Session) -> str | None:
+    return db.query(AppMeta.value).filter(AppMeta.key == CATALOGUE_HASH_KEY).scalar()
+
+
+def _rename_reports(db: Session, old: str, new: str) -> dict[int, int]:
+    """Move every report row of `old` to `new`. Where both already have a report for the same
+    month, the newer one is kept and the other merged into it (the unique key allows one).
+    Parquet-archived years are immutable files and keep the old name. Returns {dropped: kept}."""
+    reports = MonthlyReport.__table__
+    columns = (reports.c.id, reports.c.reporting_month, reports.c.created_at)
+    targets = {row.reporting_month: row for row in db.execute(select(*columns).where(reports.c.programme_name == new))}
+    renamed, dropped = [], {}
+    for row in db.execute(select(*columns).where(reports.c.programme_name == old)).all():
+        other = targets.get(row.reporting_month)
+        if other is None:
+            renamed.append(row.id)
+            continue
+        kept, lost = sorted((row, other), key=report_recency, reverse=True)
+        dropped[lost.id] = kept.id
+        if kept is row:
+            renamed.append(row.id)
+    merge_reports(db, dropped)
+
+    for table in (reports, ReportPartner.__table__, ReportTheme.__table__, MonthlyReportArchive.__table__):
+        db.execute(table.update().where(table.c.programme_name == old).values(programme_name=new))
+    record_changes(db, "report", renamed)
+    return dropped
+
+
+def _merge_programme(db: Session, alias: str, name: str) -> tuple[int, dict[int, int]]:
+    """Fold the `alias` programme row into the `name` row when both exist: reports move as in
+    a rename, form submissions (hot and archived) point at the kept id, admin fields the kept
+    row lacks are copied over, and the alias row is deleted. Form links issued for the alias
+    row stop working. Returns (deleted programme id, {dropped report: kept report})."""
+    alias_row = db.query(Programme).filter(Programme.name == alias).one()
+    kept_row = db.query(Programme).filter(Programme.name == name).one()
+    for field in _ADMIN_FIELDS:
+        if getattr(kept_row, field) is None and getattr(alias_row, field) is not None:
+            setattr(kept_row, field, getattr(alias_row, field))
+
+    submissions = FormSubmission.__table__
+    moved = [row.id for row in db.execute(select(submissions.c.id).where(submissions.c.programme_id == alias_row.id))]
+    for table in (submissions, FormSubmissionArchive.__table__):
+        db.execute(table.update().where(table.c.programme_id == alias_row.id).values(programme_id=kept_row.id))
+    tokens = FormToken.__table__
+    db.execute(tokens.delete().where(tokens.c.programme_id == alias_row.id))
+    record_changes(db, "submission", moved)
+
+    alias_id = alias_row.id
+    db.delete(alias_row)
+    db.flush()
+    return alias_id, _rename_reports(db, alias, name)
+
+
+def sync_catalogue(db: Session, path: str = CATALOGUE_PATH, dry_run: bool = False) -> dict:
+    """Diff the catalogue file against the programmes table and apply the changes in one
+    transaction. Only name and department are managed here; descriptions and recipient
+    emails stay under admin control. An alias that still has its own row next to the
+    catalogue name's row is merged into it and deleted."""
+    catalogue, checksum = load_catalogue(path)
+    existing = {name: department for name, department in db.query(Programme.name, Programme.department)}
+
+    names = {entry["name"] for entry in catalogue["programmes"]}
+    renamed, merged = [], []
+    for entry in catalogue["programmes"]:
+        for alias in entry.get("aliases", []):
+            if alias not in existing or alias in names:
+                continue
+            if entry["name"] in existing:
+                # Both spellings have a row: fold the alias row into the catalogue one.
+                merged.append({"from": alias, "to": entry["name"]})
+                existing.pop(alias)
+            else:
+                # Keep the row (and its id, recipient and reports) when only the spelling changed.
+                renamed.append({"from": alias, "to": entry["name"]})
+                existing[entry["name"]] = existing.pop(alias)
+
+    changes = [
+        {"name": entry["name"], "department": entry.get("department", "")}
+        for entry in catalogue["programmes"]
+        if existing.get(entry["name"]) != entry.get("department", "")
+    ]
+    inserted = [row["name"] for row in changes if row["name"] not in existing]
+    updated = [row["name"] for row in changes if row["name"] in existing]
+
+    if not dry_run:
+        for rename in renamed:
+            db.query(Programme).filter(Programme.name == rename["from"]).update(
+                {Programme.name: rename["to"]}, synchronize_session=False
+            )
+            dropped = _rename_reports(db, rename["from"], rename["to"])
+            rename["merged"] = [{"report": report_id, "into": kept_id} for report_id, kept_id in sorted(dropped.items())]
+        deleted = []
+        for merge in merged:
+            programme_id, reports = _merge_programme(db, merge["from"], merge["to"])
+            deleted.append(programme_id)
+            merge["merged"] = [{"report": report_id, "into": kept_id} for report_id, kept_id in sorted(reports.items())]
+        record_changes(db, "programme", deleted, "delete")
+        if renamed or merged:
+            bump_version(db, REPORTS_SCOPE)
+        if changes:
+            db.execute(upsert_statement(db, Programme.__table__, ["name"], ["department"]), changes)
+        if changes or renamed or merged:
+            bump_version(db, PROGRAMMES_SCOPE)
+            touched = [row["name"] for row in changes] + [rename["to"] for rename in renamed + merged]
+            ids = dict(db.query(Programme.name, Programme.id).filter(Programme.name.in_(touched)))
+            record_changes(db, "programme", [ids[name] for name in inserted], "insert")
+            record_changes(db, "programme", [ids[name] for name in ids if name not in inserted])
+        meta = db.query(AppMeta).filter(AppMeta.key == CATALOGUE_HASH_KEY).first()
+        if meta:
+            meta.value = checksum
+        else:
+            db.add(AppMeta(key=CATALOGUE_HASH_KEY, value=checksum))
+        db.commit()
+
+    return {
+        "version": catalogue.get("version"),
+        "checksum": checksum,
+        "inserted": inserted,
+        "updated": updated,
+        "renamed": renamed,
+        "merged": merged,
+        "dry_run": dry_run,
+    }
+
+
+def catalogue_changed(db: Session, path: str = CATALOGUE_PATH) -> bool:
+    _, checksum = load_catalogue(path)
+    return _stored_hash(db) != checksum
+
+
+def sync_if_changed(db: Session, path: str = CATALOGUE_PATH) -> dict | None:
+    """Run the sync only when the catalogue file differs from the last applied one."""
+    if not catalogue_changed(db, path):
+        return None
+    return sync_catalogue(db, path)
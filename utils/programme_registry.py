@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Programme
+from utils.data_version import get_version
+
+PROGRAMMES_SCOPE = "programmes"
+# How often a worker asks the DB whether another worker changed the catalogue.
+PROGRAMME_CACHE_CHECK_SECONDS = float(os.getenv("PROGRAMME_CACHE_CHECK_SECONDS", "5"))
+
+
+@dataclass(frozen=True)
+class ProgrammeRecord:
+    id: int
+    name: str
+    department: str
+    description: str | None = None
+    recipient_email: str | None = None
+    target_registered: int | None = None
+    target_trained: int | None = None
+    target_funded: int | None = None
+
+    @classmethod
+    def from_model(cls, programme: Programme) -> "ProgrammeRecord":
+        return cls(
+            id=programme.id,
+            name=programme.name,
+            department=programme.department,
+            description=programme.description,
+            recipient_email=programme.recipient_email,
+            target_registered=programme.target_registered,
+            target_trained=programme.target_trained,
+            target_funded=programme.target_funded,
+        )
+
+
+class ProgrammeRegistry:
+    """Process-local copy of the programmes table.
+
+    Writers bump the "programmes" data version in the same transaction as their change
+    and write the new record through; other workers notice the version change on their
+    next check and reload the (small) table.
+    """
+
+    def __init__(self, check_seconds: float = PROGRAMME_CACHE_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._by_id: dict[int, ProgrammeRecord] = {}
+        self._version: int | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, primary: Session):
+        with self._lock:
+            version = get_version(primary, PROGRAMMES_SCOPE)
+            self._by_id = {p.id: ProgrammeRecord.from_model(p) for p in primary.query(Programme).all()}
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def load(self, db: Session | None = None):
+        """Reload from the primary. The caller's session is never read: on a replica it could
+        hand stale rows to every later request in this worker."""
+        primary = SessionLocal()
+        try:
+            self._load(primary)
+        finally:
+            primary.close()
+
+    def _refresh(self, db: Session | None = None):
+        if self._version is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return
+        primary = SessionLocal()
+        try:
+            if self._version is not None and get_version(primary, PROGRAMMES_SCOPE) == self._version:
+                self._checked_at = time.monotonic()
+                return
+            self._load(primary)
+        finally:
+            primary.close()
+
+    def get(self, db: Session, programme_id: int) -> ProgrammeRecord | None:
+        self._refresh(db)
+        return self._by_id.get(programme_id)
+
+    def all(self, db: Session) -> list[ProgrammeRecord]:
+        self._refresh(db)
+        return sorted(self._by_id.values(), key=lambda p: p.id)
+
+    def put(self, record: ProgrammeRecord, version: int | None = None):
+        """Write a committed change through. If the caller's bump was the only change
+        since our last load, adopt its version and skip the reload."""
+        with self._lock:
+            self._by_id = {**self._by_id, record.id: record}
+            if version is not None and self._version is not None and version == self._version + 1:
+                self._version = version
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+
+registry = ProgrammeRegistry()
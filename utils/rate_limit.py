@@ -0,0 +1,218 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from utils.form_tokens import hash_token
+from utils.throttle import TokenBucket
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Optional SQLite file shared by every worker on the host; in-memory buckets are per worker.
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "")
+# Limits are per request.client.host. Under server.py, uvicorn's proxy headers already set
+# that to the real client when FORWARDED_ALLOW_IPS trusts the router (see README, Deploying).
+# This is only for a plain `uvicorn main:app` behind a proxy without --proxy-headers: take
+# the first X-Forwarded-For address instead.
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() in ("1", "true", "yes")
+# Buckets kept in memory per worker; the least recently used are dropped first.
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+# Shed rate-limited routes with 503 once this share of the DB pool is checked out.
+LOAD_SHED_POOL_RATIO = float(os.getenv("LOAD_SHED_POOL_RATIO", "1.0"))
+LOAD_SHED_RETRY_SECONDS = int(os.getenv("LOAD_SHED_RETRY_SECONDS", "1"))
+
+
+def parse_limit(value: str) -> tuple[float, float] | None:
+    """Parse "count/seconds" into (tokens per second, burst capacity); "off" disables the limit."""
+    value = value.strip().lower()
+    if value in ("", "0", "off", "none"):
+        return None
+    count, _, seconds = value.partition("/")
+    count = float(count)
+    return count / float(seconds or 1), count
+
+
+# Requests per client IP, by longest matching path prefix. "off" exempts a prefix.
+# Override with RATE_LIMITS, e.g. "/auth/request-otp=3/300,/forms/=120/60".
+RATE_LIMITS = {
+    "/auth/request-otp": "5/300",
+    "/auth/verify-otp": "10/300",
+    "/auth/admin-bypass": "5/300",
+    "/forms/": "60/60",
+    # Admin form routes are behind a session; they are not limited.
+    "/forms/admin/": "off",
+}
+for _item in os.getenv("RATE_LIMITS", "").split(","):
+    if "=" in _item:
+        _prefix, _limit = _item.split("=", 1)
+        RATE_LIMITS[_prefix.strip()] = _limit
+RATE_LIMITS = {prefix: parse_limit(limit) for prefix, limit in RATE_LIMITS.items()}
+
+# Per-key limits: one form link, and one email address asking for or trying OTP codes.
+FORM_TOKEN_RATE_LIMIT = parse_limit(os.getenv("FORM_TOKEN_RATE_LIMIT", "20/60"))
+OTP_EMAIL_RATE_LIMIT = parse_limit(os.getenv("OTP_EMAIL_RATE_LIMIT", "5/600"))
+
+
+class MemoryBucketStore:
+    """Token buckets for this worker only, bounded to `max_keys` (LRU)."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, rate: float, capacity: float) -> float:
+        """Take one token; returns 0 when allowed, otherwise seconds until a retry can succeed."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, capacity)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+        if bucket.try_acquire():
+            return 0.0
+        return max(bucket.wait_time(), 0.001)
+
+
+class SQLiteBucketStore:
+    """Token buckets in a local SQLite file so every worker on the host shares them.
+    Each acquire is one short IMMEDIATE transaction on a single row."""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, rate: float, capacity: float) -> float:
+        conn = self._connect()
+        # Wall clock, not monotonic: the timestamps are compared across processes.
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                "INSERT INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                # Idle buckets are full again; dropping them changes nothing.
+                conn.execute("DELETE FROM rate_limit_buckets WHERE updated < ?", (now - 86400,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return 0.0 if allowed else max((1 - tokens) / rate, 0.001)
+
+
+store = SQLiteBucketStore(RATE_LIMIT_SQLITE_PATH) if RATE_LIMIT_SQLITE_PATH else MemoryBucketStore()
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for", "")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def match_rule(path: str) -> tuple[str, tuple[float, float] | None] | None:
+    """Longest configured prefix of `path` and its limit, or None when no rule applies."""
+    matches = [prefix for prefix in RATE_LIMITS if path.startswith(prefix)]
+    if not matches:
+        return None
+    prefix = max(matches, key=len)
+    return prefix, RATE_LIMITS[prefix]
+
+
+def check_limit(key: str, limit: tuple[float, float] | None) -> float:
+    """Seconds the caller must wait (0 when allowed). Store failures fail open."""
+    if not RATE_LIMIT_ENABLED or limit is None:
+        return 0.0
+    try:
+        return store.acquire(key, *limit)
+    except Exception as exc:
+        print(f"Rate limit store error: {exc}")
+        return 0.0
+
+
+def enforce_key_limit(name: str, key: str, limit: tuple[float, float] | None):
+    """Per-key limit for endpoints whose key lives in the body (e.g. the OTP email)."""
+    retry_after = check_limit(f"{name}:{key.lower()}", limit)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please try again later",
+            headers={"Retry-After": _retry_seconds(retry_after)},
+        )
+
+
+def pool_saturated(engine) -> bool:
+    """True when the engine's connection pool has no connection left to hand out."""
+    pool = engine.pool
+    size = getattr(pool, "size", None)
+    max_overflow = getattr(pool, "_max_overflow", None)
+    if not callable(size) or max_overflow is None or max_overflow < 0:
+        # NullPool/StaticPool (SQLite) or unlimited overflow: nothing to saturate.
+        return False
+    return pool.checkedout() >= (size() + max_overflow) * LOAD_SHED_POOL_RATIO
+
+
+def _retry_seconds(retry_after: float) -> str:
+    return str(max(1, int(retry_after + 0.999)))
+
+
+def _reject(detail: str, status_code: int, retry_after: float) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"detail": detail}, headers={"Retry-After": _retry_seconds(retry_after)})
+
+
+def limit_request(request: Request, engine) -> JSONResponse | None:
+    """Rate limit and load-shed the configured public routes; None lets the request through."""
+    if not RATE_LIMIT_ENABLED:
+        return None
+    rule = match_rule(request.url.path)
+    if rule is None or rule[1] is None:
+        return None
+    prefix, limit = rule
+    retry_after = check_limit(f"ip:{prefix}:{client_ip(request)}", limit)
+    if not retry_after and prefix.startswith("/forms/") and request.query_params.get("token"):
+        retry_after = check_limit(f"form-token:{hash_token(request.query_params['token'])}", FORM_TOKEN_RATE_LIMIT)
+    if retry_after:
+        return _reject("Too many requests, please try again later", status.HTTP_429_TOO_MANY_REQUESTS, retry_after)
+    # Fail fast instead of queueing for a pooled connection behind a burst.
+    if pool_saturated(engine):
+        return _reject("Server busy, please retry shortly", status.HTTP_503_SERVICE_UNAVAILABLE, LOAD_SHED_RETRY_SECONDS)
+    return None
+
+
+async def limit_request_async(request: Request, engine) -> JSONResponse | None:
+    """limit_request for async middleware. A shared SQLite store can wait on the file lock
+    for up to its busy timeout, so it runs in the thread pool instead of on the event loop;
+    in-memory buckets are cheap enough to check inline."""
+    if isinstance(store, SQLiteBucketStore) and RATE_LIMIT_ENABLED:
+        return await run_in_threadpool(limit_request, request, engine)
+    return limit_request(request, engine)
@@ -0,0 +1,55 @@
+from sqlalchemy import text
+from database import SessionLocal, engine, read_engine
+from utils.data_version import REPORTS_SCOPE, get_version
+from utils.migrations import SCHEMA_VERSION, has_report_unique_index, schema_version
+from utils.programme_registry import registry
+from utils.rate_limit import pool_saturated
+
+# Set once the schema has been seen at SCHEMA_VERSION and the caches are filled; later
+# probes only check the connections.
+_warmed = False
+
+
+def _ping(target) -> str:
+    try:
+        with target.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as exc:
+        return f"error: {exc.__class__.__name__}"
+    return "ok"
+
+
+def _warm() -> str:
+    """Fill the per-worker caches the hot routes read on every request."""
+    db = SessionLocal()
+    try:
+        registry.load(db)
+        get_version(db, REPORTS_SCOPE)
+    finally:
+        db.close()
+    return "ok"
+
+
+def check_ready() -> tuple[bool, dict]:
+    """(ready, checks) for GET /ready. Not ready while the database is unreachable, its pool
+    is exhausted, or deploy migrations have not run yet."""
+    global _warmed
+    checks = {"database": _ping(engine)}
+    if read_engine is not engine:
+        checks["read_replica"] = _ping(read_engine)
+    checks["pool"] = "exhausted" if pool_saturated(engine) else "ok"
+    if checks["database"] == "ok" and not _warmed:
+        version = schema_version(engine)
+        if version < SCHEMA_VERSION:
+            checks["schema"] = f"v{version} < v{SCHEMA_VERSION}; run scripts/migrate.py"
+        elif not has_report_unique_index(engine):
+            # Report upserts need it; every report write would fail.
+            checks["schema"] = "monthly_reports unique index missing; run scripts/migrate.py"
+        else:
+            checks["schema"] = "ok"
+            try:
+                checks["caches"] = _warm()
+                _warmed = True
+            except Exception as exc:
+                checks["caches"] = f"error: {exc.__class__.__name__}"
+    return all(value == "ok" for value in checks.values()), checks
@@ -0,0 +1,165 @@
+import codecs
+import csv
+from datetime import datetime
+from typing import Iterable, Iterator
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from schemas import MonthlyReportCreate
+from utils.archive import archived_report_years
+from utils.data_version import REPORTS_SCOPE, bump_version
+from utils.upsert import upsert_reports
+
+IMPORT_CHUNK_SIZE = 500
+REPORT_FIELDS = list(MonthlyReportCreate.__fields__.keys())
+DATE_FIELDS = ("reporting_month", "programme_launch_date")
+
+
+def _normalize_header(value) -> str:
+    return str(value or "").strip().lower().replace(" ", "_")
+
+
+def _clean_value(field: str, value):
+    if isinstance(value, str):
+        value = value.strip()
+        if value == "":
+            return None
+    if value is None:
+        return None
+    if field in DATE_FIELDS:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, str) and len(value) == 7:
+            # Spreadsheets often carry the month only ("2026-02").
+            return f"{value}-01"
+    return value
+
+
+def _clean_row(raw: dict) -> dict:
+    # Columns missing from the file are treated as empty cells.
+    row = dict.fromkeys(REPORT_FIELDS)
+    for key, value in raw.items():
+        field = _normalize_header(key)
+        if field in REPORT_FIELDS:
+            row[field] = _clean_value(field, value)
+    return row
+
+
+def iter_csv_rows(fileobj) -> Iterator[tuple[int, dict]]:
+    # Decode incrementally so large uploads are never read into memory at once.
+    reader = csv.DictReader(codecs.iterdecode(fileobj, "utf-8-sig"))
+    for index, raw in enumerate(reader, start=2):
+        yield index, _clean_row(raw)
+
+
+def iter_xlsx_rows(fileobj) -> Iterator[tuple[int, dict]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import requires the 'openpyxl' package")
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(value) for value in next(rows, [])]
+        for index, values in enumerate(rows, start=2):
+            if values is None or all(value is None for value in values):
+                continue
+            yield index, _clean_row(dict(zip(header, values)))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename: str) -> Iterator[tuple[int, dict]]:
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        return iter_xlsx_rows(fileobj)
+    if name.endswith(".csv") or not name:
+        return iter_csv_rows(fileobj)
+    raise ValueError("Unsupported file type, expected .csv or .xlsx")
+
+
+def _format_errors(exc: ValidationError) -> list[str]:
+    messages = []
+    for error in exc.errors():
+        location = ".".join(str(part) for part in error.get("loc", ()))
+        messages.append(f"{location}: {error.get('msg')}" if location else error.get("msg"))
+    return messages
+
+
+class ImportInterrupted(Exception):
+    """The file could not be read or written to the end. Chunks committed before that stay
+    imported; `result` counts them."""
+
+    def __init__(self, error: Exception, result: dict):
+        super().__init__(str(error))
+        self.error = error
+        self.result = result
+
+
+def _flush(db: Session, chunk: list[dict]):
+    if chunk:
+        # Rows for an existing programme + month amend that report instead of duplicating it.
+        if upsert_reports(db, chunk):
+            bump_version(db, REPORTS_SCOPE)
+        db.commit()
+
+
+def import_reports(
+    db: Session,
+    rows: Iterable[tuple[int, dict]],
+    submitted_by: int | None = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    dry_run: bool = False,
+) -> dict:
+    """Validate rows one at a time and upsert the valid ones in chunked bulk statements.
+
+    Each chunk commits on its own. If reading or writing fails part way, the current chunk
+    is rolled back and ImportInterrupted is raised with the counts so far.
+    """
+    chunk = []
+    errors = []
+    imported = 0
+    total = 0
+    archived_years: dict[int, bool] = {}
+
+    def summary() -> dict:
+        return {
+            "total_rows": total,
+            "imported": imported,
+            "failed": len(errors),
+            "dry_run": dry_run,
+            "errors": errors,
+        }
+
+    try:
+        for row_number, row in rows:
+            total += 1
+            try:
+                report = MonthlyReportCreate(**row)
+            except ValidationError as exc:
+                errors.append({"row": row_number, "errors": _format_errors(exc)})
+                continue
+            year = report.reporting_month.year
+            if year not in archived_years:
+                archived_years[year] = bool(archived_report_years(db, {year}))
+            if archived_years[year]:
+                errors.append({"row": row_number, "errors": [f"reporting_month: year {year} is archived"]})
+                continue
+            values = report.dict()
+            values["submitted_by"] = submitted_by
+            values["created_at"] = datetime.utcnow()
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                if not dry_run:
+                    _flush(db, chunk)
+                imported += len(chunk)
+                chunk = []
+
+        if chunk and not dry_run:
+            _flush(db, chunk)
+        imported += len(chunk)
+    except Exception as exc:
+        db.rollback()
+        raise ImportInterrupted(exc, summary()) from exc
+
+    return summary()
@@ -0,0 +1,34 @@
+import orjson
+from fastapi.responses import Response
+
+
+class RawJSONResponse(Response):
+    """Response whose body is already-encoded JSON bytes; no re-validation or re-encoding."""
+
+    media_type = "application/json"
+
+
+def encode_rows(columns: tuple[str, ...], rows, raw_json_columns: tuple[str, ...] = ()) -> bytes:
+    """Encode selected column tuples as a JSON array of objects.
+
+    Columns listed in raw_json_columns hold JSON text written by the app itself and are
+    spliced into the output as-is instead of being parsed and encoded again.
+    """
+    raw_indexes = [columns.index(name) for name in raw_json_columns]
+    plain_indexes = [i for i in range(len(columns)) if i not in raw_indexes]
+    plain_names = [columns[i] for i in plain_indexes]
+
+    if not raw_indexes:
+        return orjson.dumps([dict(zip(columns, row)) for row in rows])
+
+    parts = []
+    for row in rows:
+        encoded = orjson.dumps({name: row[i] for name, i in zip(plain_names, plain_indexes)})
+        extras = b"".join(
+            b',"' + columns[i].encode() + b'":' + (row[i].encode() if row[i] else b"null")
+            for i in raw_indexes
+        )
+        if len(encoded) == 2:
+            extras = extras[1:]
+        parts.append(encoded[:-1] + extras + b"}")
+    return b"[" + b",".join(parts) + b"]"
@@ -2,8 +2,6 @@ import secrets
 import uuid
 from datetime import datetime, timedelta
 import os
-from dotenv import load_dotenv
-load_dotenv()
 
 SESSION_EXPIRE_DAYS = int(os.getenv("SESSION_EXPIRE_DAYS", 30))
 
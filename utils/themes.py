@@ -0,0 +1,403 @@
+"""Recurring themes in the challenges / mitigation_strategies text of monthly reports.
+
+Reports are tokenized into a sparse TF-IDF matrix and grouped with spherical k-means.
+Each theme keeps the sum of its members' vectors, so later reports are assigned to the
+nearest theme and folded into it without a full refit. A refit (new vocabulary and
+themes) happens when there is no model yet or the corpus has grown by THEME_REFIT_RATIO.
+"""
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+import numpy as np
+from scipy import sparse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import AppMeta, ChallengeTheme, ReportTheme
+from utils.archive import report_source
+from utils.data_version import THEMES_SCOPE, bump_version
+
+THEME_COUNT = int(os.getenv("THEME_COUNT", "8"))
+THEME_MAX_TERMS = int(os.getenv("THEME_MAX_TERMS", "5000"))
+# Terms used by fewer reports than this are left out of the vocabulary.
+THEME_MIN_DF = int(os.getenv("THEME_MIN_DF", "2"))
+# Reports less similar than this to every theme stay unclassified.
+THEME_MIN_SIMILARITY = float(os.getenv("THEME_MIN_SIMILARITY", "0.1"))
+# Refit once reports assigned incrementally reach this fraction of the fitted corpus.
+THEME_REFIT_RATIO = float(os.getenv("THEME_REFIT_RATIO", "1.0"))
+THEME_BATCH_SIZE = int(os.getenv("THEME_BATCH_SIZE", "2000"))
+THEME_LABEL_TERMS = 4
+THEME_TOP_TERMS = 10
+_KMEANS_ITERATIONS = 30
+_MODEL_KEY = "challenge_theme_model"
+
+_TOKEN = re.compile(r"[a-z][a-z']{2,}")
+STOPWORDS = frozenset(
+    """
+    about above after again against all also and any are around because been before being
+    between both but can could did does doing done due during each even every few for from
+    further had has have having her here him his how into its itself just more most much must
+    not now off once only other our out over own same she should some such than that the their
+    them then there these they this those through too under until very was were what when where
+    which while who whom why will with would you your yet per via within without across along
+    among ensure ensured ensuring including etc however still well able many month months
+    monthly report reported reporting programme programmes program programs youth youths
+    participant participants challenge challenges issue issues strategy strategies mitigation
+    mitigate mitigated plan plans planned ongoing various several currently made make making
+    need needed needs affected affect some lot
+    """.split()
+)
+
+_lock = threading.Lock()
+
+
+def tokenize(text: str | None) -> list[str]:
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower()):
+        token = token.strip("'")
+        # Light plural folding so "delays" and "delay" share a term.
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 4 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+            token = token[:-1]
+        if len(token) > 2 and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def report_text(challenges: str | None, mitigation: str | None) -> str:
+    return f"{challenges or ''}\n{mitigation or ''}"
+
+
+def vectorize(documents: list[list[str]], vocabulary: dict[str, int], idf: np.ndarray) -> sparse.csr_matrix:
+    """Sublinear TF-IDF rows (1 + log tf) * idf, L2-normalised; unknown terms are dropped."""
+    indptr = [0]
+    indices = []
+    counts = []
+    for tokens in documents:
+        terms = Counter(vocabulary[token] for token in tokens if token in vocabulary)
+        indices.extend(terms.keys())
+        counts.extend(terms.values())
+        indptr.append(len(indices))
+    indices = np.array(indices, dtype=np.int32)
+    data = (1.0 + np.log(np.array(counts, dtype=np.float32))) * idf[indices]
+    matrix = sparse.csr_matrix((data, indices, np.array(indptr)), shape=(len(documents), len(vocabulary)))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    return sparse.diags(np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)) @ matrix
+
+
+def build_vocabulary(documents: list[list[str]]) -> tuple[dict[str, int], np.ndarray]:
+    df = Counter(token for tokens in documents for token in set(tokens))
+    terms = [term for term, count in df.most_common(THEME_MAX_TERMS) if count >= THEME_MIN_DF]
+    terms.sort()
+    n = len(documents)
+    idf = np.array([math.log((1 + n) / (1 + df[term])) + 1.0 for term in terms], dtype=np.float32)
+    return {term: index for index, term in enumerate(terms)}, idf
+
+
+def _normalise(sums: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(sums, axis=1, keepdims=True)
+    return np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0)
+
+
+def spherical_kmeans(matrix: sparse.csr_matrix, k: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Cluster L2-normalised rows by cosine similarity. Returns (labels, centroid sums)."""
+    rng = np.random.default_rng(seed)
+    n = matrix.shape[0]
+    # k-means++ seeding on cosine distance.
+    chosen = [int(rng.integers(n))]
+    best = np.asarray((matrix @ matrix[chosen[0]].T).todense()).ravel()
+    for _ in range(1, k):
+        distance = np.clip(1.0 - best, 0.0, None) ** 2
+        total = distance.sum()
+        pick = int(rng.choice(n, p=distance / total)) if total > 0 else int(rng.integers(n))
+        chosen.append(pick)
+        best = np.maximum(best, np.asarray((matrix @ matrix[pick].T).todense()).ravel())
+    centroids = matrix[chosen].toarray()
+
+    labels = np.full(n, -1)
+    for _ in range(_KMEANS_ITERATIONS):
+        similarity = np.asarray(matrix @ centroids.T)
+        new_labels = similarity.argmax(axis=1)
+        membership = sparse.csr_matrix((np.ones(n), (new_labels, np.arange(n))), shape=(k, n))
+        sums = np.asarray((membership @ matrix).todense())
+        empty = np.flatnonzero(membership.getnnz(axis=1) == 0)
+        if len(empty):
+            # Restart empty themes on the reports that fit their current theme worst.
+            worst = np.argsort(similarity[np.arange(n), new_labels])[: len(empty)]
+            sums[empty] = matrix[worst].toarray()
+            new_labels[worst] = empty
+        centroids = _normalise(sums)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    membership = sparse.csr_matrix((np.ones(n), (labels, np.arange(n))), shape=(k, n))
+    return labels, np.asarray((membership @ matrix).todense())
+
+
+def _top_terms(centroid: np.ndarray, terms: list[str], count: int = THEME_TOP_TERMS) -> list[str]:
+    order = np.argsort(centroid)[::-1][:count]
+    return [terms[index] for index in order if centroid[index] > 0]
+
+
+def _load_model(db: Session) -> dict | None:
+    row = db.get(AppMeta, _MODEL_KEY)
+    return json.loads(row.value) if row and row.value else None
+
+
+def _save_model(db: Session, model: dict):
+    row = db.get(AppMeta, _MODEL_KEY) or AppMeta(key=_MODEL_KEY)
+    row.value = json.dumps(model)
+    db.add(row)
+
+
+def _theme_rows(db: Session) -> list[ChallengeTheme]:
+    return db.query(ChallengeTheme).order_by(ChallengeTheme.id).all()
+
+
+def _report_rows(db: Session, pending_only: bool, limit: int | None = None):
+    reports = report_source()
+    query = select(
+        reports.c.id,
+        reports.c.programme_name,
+        reports.c.reporting_month,
+        reports.c.challenges,
+        reports.c.mitigation_strategies,
+    )
+    if pending_only:
+        themes = ReportTheme.__table__
+        query = query.outerjoin(themes, themes.c.report_id == reports.c.id).where(themes.c.report_id.is_(None))
+    query = query.order_by(reports.c.id)
+    if limit:
+        query = query.limit(limit)
+    return db.execute(query).all()
+
+
+def _assignment(row, theme_id, similarity) -> dict:
+    return {
+        "report_id": row.id,
+        "theme_id": theme_id,
+        "programme_name": row.programme_name,
+        "reporting_month": row.reporting_month,
+        "similarity": similarity,
+    }
+
+
+def refit(db: Session) -> dict:
+    """Rebuild the vocabulary and themes from every report. Does not commit."""
+    rows = _report_rows(db, pending_only=False)
+    documents = [tokenize(report_text(row.challenges, row.mitigation_strategies)) for row in rows]
+    vocabulary, idf = build_vocabulary(documents)
+    matrix = vectorize(documents, vocabulary, idf)
+    has_text = np.flatnonzero(matrix.getnnz(axis=1) > 0)
+
+    db.execute(ReportTheme.__table__.delete())
+    db.execute(ChallengeTheme.__table__.delete())
+    terms = sorted(vocabulary, key=vocabulary.get)
+    theme_ids = np.full(len(rows), -1)
+    similarity = np.zeros(len(rows))
+    k = min(THEME_COUNT, len(has_text))
+    if k:
+        labels, sums = spherical_kmeans(matrix[has_text], k)
+        centroids = _normalise(sums)
+        scores = np.asarray(matrix[has_text] @ centroids.T)[np.arange(len(has_text)), labels]
+        themes = []
+        for index in range(k):
+            top = _top_terms(centroids[index], terms)
+            theme = ChallengeTheme(
+                label=", ".join(top[:THEME_LABEL_TERMS]) or "Unlabelled",
+                terms=json.dumps(top),
+                size=int((labels == index).sum()),
+                centroid=sums[index].astype(np.float32).tobytes(),
+            )
+            db.add(theme)
+            themes.append(theme)
+        db.flush()
+        lookup = np.array([theme.id for theme in themes])
+        theme_ids[has_text] = lookup[labels]
+        similarity[has_text] = scores
+
+    assignments = [
+        _assignment(
+            row,
+            int(theme_ids[i]) if theme_ids[i] >= 0 and similarity[i] >= THEME_MIN_SIMILARITY else None,
+            round(float(similarity[i]), 4) if theme_ids[i] >= 0 else None,
+        )
+        for i, row in enumerate(rows)
+    ]
+    for start in range(0, len(assignments), THEME_BATCH_SIZE):
+        db.execute(ReportTheme.__table__.insert(), assignments[start : start + THEME_BATCH_SIZE])
+    _save_model(
+        db,
+        {
+            "terms": terms,
+            "idf": idf.tolist(),
+            "documents": len(rows),
+            "assigned_since_fit": 0,
+            "fitted_at": datetime.now(timezone.utc).isoformat(),
+        },
+    )
+    bump_version(db, THEMES_SCOPE)
+    return {"mode": "refit", "reports": len(rows), "themes": k}
+
+
+def assign_pending(db: Session, model: dict) -> dict:
+    """Assign reports without a theme row to the nearest theme and fold them into its
+    centroid. Does not commit."""
+    themes = _theme_rows(db)
+    vocabulary = {term: index for index, term in enumerate(model["terms"])}
+    idf = np.array(model["idf"], dtype=np.float32)
+    sums = (
+        np.vstack([np.frombuffer(theme.centroid, dtype=np.float32) for theme in themes])
+        if themes
+        else np.zeros((0, len(vocabulary)), dtype=np.float32)
+    )
+    assigned = 0
+    while True:
+        rows = _report_rows(db, pending_only=True, limit=THEME_BATCH_SIZE)
+        if not rows:
+            break
+        documents = [tokenize(report_text(row.challenges, row.mitigation_strategies)) for row in rows]
+        matrix = vectorize(documents, vocabulary, idf)
+        if len(themes):
+            similarity = np.asarray(matrix @ _normalise(sums.astype(np.float64)).T)
+            best = similarity.argmax(axis=1)
+            scores = similarity[np.arange(len(rows)), best]
+        else:
+            best = np.zeros(len(rows), dtype=int)
+            scores = np.zeros(len(rows))
+        accepted = (scores >= THEME_MIN_SIMILARITY) & (matrix.getnnz(axis=1) > 0) & (len(themes) > 0)
+        if accepted.any():
+            membership = sparse.csr_matrix(
+                (np.ones(int(accepted.sum())), (best[accepted], np.flatnonzero(accepted))),
+                shape=(len(themes), len(rows)),
+            )
+            sums += np.asarray((membership @ matrix).todense(), dtype=np.float32)
+            for index, added in enumerate(np.bincount(best[accepted], minlength=len(themes))):
+                themes[index].size += int(added)
+        db.execute(
+            ReportTheme.__table__.insert(),
+            [
+                _assignment(
+                    row,
+                    themes[best[i]].id if accepted[i] else None,
+                    round(float(scores[i]), 4) if matrix.getnnz(axis=1)[i] else None,
+                )
+                for i, row in enumerate(rows)
+            ],
+        )
+        assigned += len(rows)
+
+    if assigned:
+        terms = model["terms"]
+        for index, theme in enumerate(themes):
+            theme.centroid = sums[index].tobytes()
+            top = _top_terms(sums[index], terms)
+            theme.terms = json.dumps(top)
+            theme.label = ", ".join(top[:THEME_LABEL_TERMS]) or "Unlabelled"
+        model["assigned_since_fit"] += assigned
+        _save_model(db, model)
+        bump_version(db, THEMES_SCOPE)
+    return {"mode": "incremental", "reports": assigned, "themes": len(themes)}
+
+
+def update_themes(db: Session, force_refit: bool = False) -> dict:
+    """Incremental theme update, or a full refit when due. Commits."""
+    with _lock:
+        model = _load_model(db)
+        due = (
+            force_refit
+            or model is None
+            or model["assigned_since_fit"] + pending_count(db) >= max(1, model["documents"]) * THEME_REFIT_RATIO
+        )
+        try:
+            result = refit(db) if due else assign_pending(db, model)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return result
+
+
+def run_theme_update(force_refit: bool = False):
+    """Background task entry point: uses its own session and logs instead of raising."""
+    db = SessionLocal()
+    try:
+        result = update_themes(db, force_refit)
+        print(f"Challenge themes updated ({result['mode']}): {result['reports']} report(s), {result['themes']} theme(s)")
+    except Exception as exc:
+        print(f"Error updating challenge themes: {exc}")
+    finally:
+        db.close()
+
+
+def pending_count(db: Session) -> int:
+    reports = report_source()
+    themes = ReportTheme.__table__
+    return db.execute(
+        select(func.count())
+        .select_from(reports.outerjoin(themes, themes.c.report_id == reports.c.id))
+        .where(themes.c.report_id.is_(None))
+    ).scalar()
+
+
+def theme_summary(
+    db: Session,
+    programme: str | None = None,
+    start_month=None,
+    end_month=None,
+) -> dict:
+    assignments = ReportTheme.__table__
+    filters = []
+    if programme:
+        filters.append(assignments.c.programme_name == programme)
+    if start_month:
+        filters.append(assignments.c.reporting_month >= start_month)
+    if end_month:
+        filters.append(assignments.c.reporting_month <= end_month)
+    classified = [*filters, assignments.c.theme_id.isnot(None)]
+
+    counts = dict(
+        db.execute(
+            select(assignments.c.theme_id, func.count()).where(*classified).group_by(assignments.c.theme_id)
+        ).all()
+    )
+    themes = [
+        {"id": theme.id, "label": theme.label, "terms": json.loads(theme.terms), "reports": int(counts.get(theme.id, 0))}
+        for theme in _theme_rows(db)
+    ]
+    themes.sort(key=lambda item: item["reports"], reverse=True)
+    by_programme = [
+        {"theme_id": theme_id, "programme_name": name, "reports": int(count)}
+        for theme_id, name, count in db.execute(
+            select(assignments.c.theme_id, assignments.c.programme_name, func.count())
+            .where(*classified)
+            .group_by(assignments.c.theme_id, assignments.c.programme_name)
+            .order_by(assignments.c.theme_id, func.count().desc())
+        )
+    ]
+    by_month = [
+        {"theme_id": theme_id, "month": month.strftime("%Y-%m"), "reports": int(count)}
+        for theme_id, month, count in db.execute(
+            select(assignments.c.theme_id, assignments.c.reporting_month, func.count())
+            .where(*classified)
+            .group_by(assignments.c.theme_id, assignments.c.reporting_month)
+            .order_by(assignments.c.theme_id, assignments.c.reporting_month)
+        )
+    ]
+    unclassified = db.execute(
+        select(func.count()).where(*filters, assignments.c.theme_id.is_(None)).select_from(assignments)
+    ).scalar()
+    model = _load_model(db)
+    return {
+        "themes": themes,
+        "by_programme": by_programme,
+        "by_month": by_month,
+        "unclassified": int(unclassified),
+        "pending": pending_count(db),
+        "fitted_at": model["fitted_at"] if model else None,
+    }
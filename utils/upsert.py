@@ -0,0 +1,148 @@
+from datetime import date, datetime
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.orm import Session
+from models import Attachment, MonthlyReport, ReportPartner, ReportTheme
+from utils.change_log import record_changes
+from utils.partners import replace_partners
+
+REPORT_KEY = ("programme_name", "reporting_month")
+# created_at, the key columns and submitted_by (the report's owner) never change when a
+# report is amended.
+REPORT_UPDATE_COLUMNS = (
+    "focal_department",
+    "focal_aide_hm",
+    "focal_ministry_official",
+    "programme_launch_date",
+    "total_youth_registered",
+    "youth_trained",
+    "youth_funded",
+    "youth_with_outcomes",
+    "partnerships",
+    "challenges",
+    "mitigation_strategies",
+    "scale_up_plans",
+    "success_story",
+)
+NARRATIVE_COLUMNS = ("challenges", "mitigation_strategies")
+
+
+def dialect_insert(db: Session, table):
+    """Return the dialect-specific INSERT construct that supports ON CONFLICT."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Upsert is not supported for database dialect '{dialect}'")
+    return insert(table)
+
+
+def upsert_statement(db: Session, table, conflict_columns, update_columns):
+    stmt = dialect_insert(db, table)
+    excluded = stmt.excluded
+    set_ = {name: excluded[name] for name in update_columns}
+    # Only touch the row when something actually changed, so retries are no-op writes.
+    changed = or_(*[table.c[name].is_distinct_from(excluded[name]) for name in update_columns])
+    return stmt.on_conflict_do_update(index_elements=list(conflict_columns), set_=set_, where=changed)
+
+
+def _month_start(values: dict) -> dict:
+    month = values.get("reporting_month")
+    if isinstance(month, date) and month.day != 1:
+        return {**values, "reporting_month": month.replace(day=1)}
+    return values
+
+
+def upsert_reports(db: Session, rows: list[dict]) -> list[int]:
+    """Insert or amend monthly reports keyed on (programme_name, reporting_month). Does not commit.
+
+    Returns the ids of reports that were inserted or actually changed. Resubmitting
+    identical values writes nothing and returns no ids, so callers can skip their side
+    effects (version bumps, events, notifications).
+    """
+    if not rows:
+        return []
+    # The key is the month, so a mid-month date amends that month's report.
+    rows = [_month_start(row) for row in rows]
+    # A single statement cannot touch the same row twice, so the last row per key wins.
+    deduped = {tuple(row[name] for name in REPORT_KEY): row for row in rows}
+    # utils.archive imports data_version, which imports this module.
+    from utils.archive import ensure_years_open
+
+    # Archived months live outside monthly_reports, so the upsert below could not amend them.
+    ensure_years_open(db, [month for _, month in deduped])
+    columns = set().union(*(row.keys() for row in deduped.values()))
+    update_columns = [name for name in REPORT_UPDATE_COLUMNS if name in columns]
+    table = MonthlyReport.__table__
+    key_filter = tuple_(table.c.programme_name, table.c.reporting_month).in_(list(deduped.keys()))
+    snapshot = select(table.c.id, *[table.c[name] for name in update_columns]).where(key_filter)
+
+    before = {row.id: row for row in db.execute(snapshot)}
+    stmt = upsert_statement(db, table, REPORT_KEY, update_columns)
+    db.execute(stmt, list(deduped.values()))
+    after = {row.id: row for row in db.execute(snapshot)}
+
+    def differs(report_id: int, names) -> bool:
+        old, new = before[report_id], after[report_id]
+        return any(old._mapping[name] != new._mapping[name] for name in names if name in update_columns)
+
+    inserted = [report_id for report_id in after if report_id not in before]
+    updated = [report_id for report_id in after if report_id in before and differs(report_id, update_columns)]
+    # Feed for GET /sync/changes.
+    record_changes(db, "report", inserted, "insert")
+    record_changes(db, "report", updated, "update")
+    if "partnerships" in columns:
+        # Keep the report_partners index in the same transaction as the report text.
+        reparse = inserted + [report_id for report_id in updated if differs(report_id, ("partnerships",))]
+        if reparse:
+            replace_partners(
+                db,
+                db.execute(
+                    select(table.c.id, table.c.programme_name, table.c.reporting_month, table.c.partnerships)
+                    .where(table.c.id.in_(reparse))
+                ).all(),
+            )
+    retheme = [report_id for report_id in updated if differs(report_id, NARRATIVE_COLUMNS)]
+    if retheme:
+        # Changed narrative text is re-themed by the next challenge theme update.
+        themes = ReportTheme.__table__
+        db.execute(themes.delete().where(themes.c.report_id.in_(retheme)))
+    return inserted + updated
+
+
+def upsert_report(db: Session, values: dict) -> tuple[MonthlyReport, bool]:
+    """upsert_reports for one report: (the stored report, whether anything changed)."""
+    values = _month_start(values)
+    changed = bool(upsert_reports(db, [values]))
+    report = (
+        db.query(MonthlyReport)
+        .filter(
+            MonthlyReport.programme_name == values["programme_name"],
+            MonthlyReport.reporting_month == values["reporting_month"],
+        )
+        .populate_existing()
+        .one()
+    )
+    return report, changed
+
+
+def report_recency(row) -> tuple:
+    """Sort key for reports competing for one programme and month: the newest wins."""
+    return (row.created_at is not None, row.created_at or datetime.min, row.id)
+
+
+def merge_reports(db: Session, dropped: dict[int, int]):
+    """Delete each report in `dropped` in favour of the report it maps to. Attachments move
+    to the kept report; partner and theme rows of the dropped ones are deleted, since those
+    index the dropped text. Does not commit."""
+    if not dropped:
+        return
+    attachments = Attachment.__table__
+    for report_id, kept_id in dropped.items():
+        db.execute(attachments.update().where(attachments.c.report_id == report_id).values(report_id=kept_id))
+    for table in (ReportPartner.__table__, ReportTheme.__table__):
+        db.execute(table.delete().where(table.c.report_id.in_(list(dropped))))
+    reports = MonthlyReport.__table__
+    db.execute(reports.delete().where(reports.c.id.in_(list(dropped))))
+    record_changes(db, "report", list(dropped), "delete")